@@ -8,7 +8,11 @@ from app.api.api_v1.endpoints import (
     credit,
     autopartes,
     factoring,
-    cfdi
+    cfdi,
+    webhooks,
+    realtime,
+    kyc,
+    exports
 )
 
 api_router = APIRouter()
@@ -27,5 +31,17 @@ api_router.include_router(credit.router, prefix="/credit", tags=["Credit Lines"]
 api_router.include_router(factoring.router, prefix="/factoring", tags=["Factoring"])
 api_router.include_router(cfdi.router, prefix="/cfdi", tags=["CFDI"])
 
+# KYC Documents
+api_router.include_router(kyc.router, prefix="/kyc", tags=["KYC"])
+
+# Report Exports
+api_router.include_router(exports.router, prefix="/exports", tags=["Exports"])
+
+# Provider Callbacks
+api_router.include_router(webhooks.router, prefix="/webhooks", tags=["Webhooks"])
+
+# Realtime Push
+api_router.include_router(realtime.router, prefix="/realtime", tags=["Realtime"])
+
 # AutoPartes Marketplace
 api_router.include_router(autopartes.router, prefix="/autopartes", tags=["AutoPartes"])
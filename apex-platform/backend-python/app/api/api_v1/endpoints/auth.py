@@ -43,30 +43,32 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_async_session)
-) -> User:
-    """Get current authenticated user."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+async def authenticate_token(token: str, db: AsyncSession) -> Optional[User]:
+    """User named by a valid access token, or None."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: int = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except jwt.PyJWTError:
-        raise credentials_exception
+        return None
+    user_id: int = payload.get("sub")
+    if user_id is None:
+        return None
     
     result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
-    
+    return result.scalar_one_or_none()
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_session)
+) -> User:
+    """Get current authenticated user."""
+    user = await authenticate_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     return user
 
@@ -78,6 +80,13 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
     return current_user
 
 
+async def get_current_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
+    """Get current active user, requiring the admin role."""
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+
 @router.post("/register", response_model=UserResponse)
 async def register(
     user_data: UserCreate,
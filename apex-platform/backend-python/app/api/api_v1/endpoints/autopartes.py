@@ -0,0 +1,253 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, UploadFile, File, status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.models.autopartes import ProductCategory, ProductCondition
+from app.models.user import User, UserRole
+from app.schemas.autopartes import AutoPartPage, CatalogSearchPage, DiscountUpdate, DiscountUpdateResult
+from app.services.catalog_pricing import browse_by_price, set_discount
+from app.services.catalog_search import search_catalog, MIN_QUERY_LENGTH
+from app.services.fitment import search_parts_by_vehicle
+from app.services.interchange import find_alternatives
+from app.services.product_cache import CATALOG_TAG, get_product_detail, etag_matches
+from app.services.product_images import (
+    store_image, attach_image, get_part_by_sku, get_derivative, derivative_stats, FORMATS,
+)
+from app.services.product_counters import record_view, counter_stats
+from app.services.replenishment import list_suggestions
+from app.services.supplier_feed import import_supplier_feed
+from app.api.api_v1.endpoints.auth import get_current_active_user, get_current_admin_user
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=CatalogSearchPage)
+async def search(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, max_length=100),
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = Query(None, max_length=100),
+    condition: Optional[ProductCondition] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Ranked catalog search by text, part or OEM number, with facet counts."""
+    try:
+        return await search_catalog(
+            db, q, category=category, brand=brand, condition=condition,
+            min_price=min_price, max_price=max_price, limit=limit, cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get("/fitment", response_model=AutoPartPage)
+async def parts_for_vehicle(
+    make: str = Query(..., min_length=1, max_length=50),
+    model: str = Query(..., min_length=1, max_length=80),
+    year: int = Query(..., ge=1900, le=2100),
+    engine_type: Optional[str] = Query(None, max_length=30),
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = Query(None, max_length=100),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Parts that fit a vehicle, optionally filtered by engine, category and brand."""
+    try:
+        return await search_parts_by_vehicle(
+            db, make, model, year, engine_type=engine_type, category=category,
+            brand=brand, limit=limit, cursor=cursor,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.get("/interchange/{number}", response_model=AutoPartPage)
+@cached("catalog_interchange", ttl=settings.CATALOG_LISTING_CACHE_TTL_SECONDS, tags=(CATALOG_TAG,))
+async def interchangeable_parts(
+    number: str,
+    in_stock: bool = True,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """All parts interchangeable with an OEM, part or universal number, cheapest first."""
+    try:
+        page = await find_alternatives(db, number, in_stock=in_stock, limit=limit, cursor=cursor)
+        return AutoPartPage.model_validate(page, from_attributes=True)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.post("/feeds/import")
+async def import_catalog_feed(
+    feed: UploadFile = File(...),
+    supplier_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Apply a full supplier catalog feed (CSV or Excel) to the marketplace."""
+    if current_user.role not in (UserRole.PROVIDER, UserRole.DISTRIBUTOR, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only suppliers can import catalog feeds"
+        )
+    # Admins may import on behalf of a supplier; everyone else imports their own
+    if current_user.role != UserRole.ADMIN or supplier_id is None:
+        supplier_id = current_user.id
+    
+    report = await import_supplier_feed(db, supplier_id, feed.file, feed.filename or "")
+    return report.as_dict()
+
+
+@router.get("/browse", response_model=AutoPartPage)
+@cached("catalog_browse", ttl=settings.CATALOG_LISTING_CACHE_TTL_SECONDS, tags=(CATALOG_TAG,))
+async def browse(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = Query(None, max_length=100),
+    sort: str = Query("price_asc", pattern="^price_(asc|desc)$"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Browse listed parts by price after discount."""
+    page = await browse_by_price(
+        db, min_price=min_price, max_price=max_price, category=category, brand=brand,
+        descending=sort == "price_desc", limit=limit, cursor=cursor,
+    )
+    return AutoPartPage.model_validate(page, from_attributes=True)
+
+
+@router.post("/pricing/discount", response_model=DiscountUpdateResult)
+async def bulk_set_discount(
+    change: DiscountUpdate,
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Set the discount of every part of a brand, category and/or supplier."""
+    updated = await set_discount(
+        db, change.discount_percentage, brand=change.brand,
+        category=change.category, supplier_id=change.supplier_id,
+    )
+    return {"updated": updated}
+
+
+@router.get("/counters/metrics")
+async def view_and_sales_counter_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Write-behind counter buffer state and flush statistics for this worker."""
+    return counter_stats()
+
+
+@router.get("/replenishment/suggestions")
+async def purchase_suggestions(
+    supplier_id: Optional[int] = None,
+    urgent_only: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Suggested purchase order lines for a supplier's parts."""
+    if current_user.role not in (UserRole.PROVIDER, UserRole.DISTRIBUTOR, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only suppliers can view purchase suggestions"
+        )
+    # Admins may look at any supplier; everyone else sees their own
+    if current_user.role != UserRole.ADMIN or supplier_id is None:
+        supplier_id = current_user.id
+    
+    try:
+        return await list_suggestions(db, supplier_id, urgent_only=urgent_only, limit=limit, cursor=cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+
+@router.post("/images")
+async def upload_image(
+    image: UploadFile = File(...),
+    sku: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Upload a product image; optionally attach it to the part `sku`."""
+    if current_user.role not in (UserRole.PROVIDER, UserRole.DISTRIBUTOR, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only suppliers can upload product images"
+        )
+    part = None
+    if sku is not None:
+        part = await get_part_by_sku(db, sku)
+        if part is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+        if current_user.role != UserRole.ADMIN and part.supplier_id != current_user.id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+    
+    try:
+        stored = await store_image(image.file)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if part is not None:
+        await attach_image(db, part, stored)
+    return stored.as_dict()
+
+
+@router.get("/images/metrics")
+async def image_derivative_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Derivative render and eviction statistics for this worker."""
+    return derivative_stats()
+
+
+@router.get("/images/{digest}/{variant}.{fmt}")
+async def image_derivative(digest: str, variant: str, fmt: str):
+    """Resized product image, rendered on first request and cached on disk.
+
+    The URL names the original's content hash and the variant, so the
+    response never changes and may be cached indefinitely.
+    """
+    path = await get_derivative(digest, variant, fmt)
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Image not found")
+    return FileResponse(
+        path,
+        media_type=FORMATS[fmt],
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{digest[:16]}-{variant}-{fmt}"',
+        },
+    )
+
+
+@router.get("/{sku}")
+async def product_detail(
+    sku: str,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Product detail with live inventory; supports conditional GET via ETag."""
+    product = await get_product_detail(db, sku)
+    if product is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found")
+    record_view(sku)
+    
+    headers = {"ETag": product.etag, "Cache-Control": "no-cache"}
+    if etag_matches(if_none_match, product.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=product.body, media_type="application/json", headers=headers)
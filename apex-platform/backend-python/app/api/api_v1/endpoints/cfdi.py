@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_session
+from app.models.user import User, UserRole
+from app.services.cfdi_ingest import ingest_cfdi_archive
+from app.api.api_v1.endpoints.auth import get_current_active_user
+
+router = APIRouter()
+
+
+@router.post("/ingest")
+async def ingest_received_cfdis(
+    archive: UploadFile = File(...),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Register a zip archive of received CFDI XMLs as invoices.
+
+    CFDIs from issuers without an account are skipped and listed in the
+    report under `unknown_issuer_rfcs`.
+    """
+    if current_user.role not in (UserRole.PROVIDER, UserRole.DISTRIBUTOR, UserRole.ADMIN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only providers can ingest CFDI archives"
+        )
+    
+    report = await ingest_cfdi_archive(db, archive.file, receiver=current_user)
+    return report.as_dict()
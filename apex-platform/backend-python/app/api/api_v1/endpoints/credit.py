@@ -0,0 +1,120 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from datetime import date
+
+from app.core.database import get_async_session
+from app.models.user import User, UserRole
+from app.models.credit_line import CreditLine
+from app.models.portfolio_snapshot import PortfolioSnapshot
+from app.schemas.credit import (
+    AmortizationSchedule,
+    PayoffQuote,
+    PortfolioSnapshotResponse,
+    PortfolioSnapshotSummary,
+    CreditDrawRequest,
+    CreditDrawResponse,
+)
+from app.services.amortization import credit_line_schedule, early_payoff_quote
+from app.services.credit_draw import draw_credit, DrawRejection
+from app.api.api_v1.endpoints.auth import get_current_active_user, get_current_admin_user
+
+router = APIRouter()
+
+
+@router.get("/portfolio/snapshots", response_model=List[PortfolioSnapshotSummary])
+async def list_portfolio_snapshots(
+    limit: int = Query(30, ge=1, le=365),
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Most recent portfolio risk snapshots."""
+    result = await db.execute(
+        select(PortfolioSnapshot.snapshot_date, PortfolioSnapshot.line_count, PortfolioSnapshot.created_at)
+        .order_by(PortfolioSnapshot.snapshot_date.desc())
+        .limit(limit)
+    )
+    return result.mappings().all()
+
+
+@router.get("/portfolio/snapshots/{snapshot_date}", response_model=PortfolioSnapshotResponse)
+async def get_portfolio_snapshot(
+    snapshot_date: str,
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Portfolio risk metrics for a date, or the latest with `latest`."""
+    query = select(PortfolioSnapshot).order_by(PortfolioSnapshot.snapshot_date.desc()).limit(1)
+    if snapshot_date != "latest":
+        query = query.where(PortfolioSnapshot.snapshot_date == date.fromisoformat(snapshot_date))
+    
+    snapshot = (await db.execute(query)).scalar_one_or_none()
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Portfolio snapshot not found")
+    
+    return snapshot
+
+
+async def get_owned_credit_line(
+    credit_line_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+) -> CreditLine:
+    """Load a credit line belonging to the current user (admins see all)."""
+    result = await db.execute(select(CreditLine).where(CreditLine.id == credit_line_id))
+    credit_line = result.scalar_one_or_none()
+    
+    if credit_line is None or (
+        current_user.role != UserRole.ADMIN and credit_line.user_id != current_user.id
+    ):
+        raise HTTPException(status_code=404, detail="Credit line not found")
+    
+    return credit_line
+
+
+@router.get("/{credit_line_id}/schedule", response_model=AmortizationSchedule)
+async def get_schedule(credit_line: CreditLine = Depends(get_owned_credit_line)):
+    """Full amortization schedule for the outstanding balance."""
+    return {
+        "credit_line_id": credit_line.id,
+        "payment_frequency": credit_line.payment_frequency,
+        "outstanding": credit_line.used_amount,
+        "rows": credit_line_schedule(credit_line),
+    }
+
+
+@router.get("/{credit_line_id}/payoff-quote", response_model=PayoffQuote)
+async def get_payoff_quote(
+    after_period: int = Query(0, ge=0),
+    credit_line: CreditLine = Depends(get_owned_credit_line)
+):
+    """Early payoff amount after a number of scheduled payments."""
+    quote = early_payoff_quote(credit_line, after_period)
+    return {"credit_line_id": credit_line.id, **quote}
+
+
+@router.post("/{credit_line_id}/draw", response_model=CreditDrawResponse)
+async def draw(
+    credit_line_id: int,
+    draw_request: CreditDrawRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Draw funds from one of the current user's credit lines."""
+    result = await draw_credit(
+        db,
+        user_id=current_user.id,
+        credit_line_id=credit_line_id,
+        amount=draw_request.amount,
+        description=draw_request.description,
+        transaction_id=draw_request.idempotency_key,
+    )
+    
+    if not result.accepted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND if result.reason == DrawRejection.NOT_FOUND else status.HTTP_409_CONFLICT,
+            detail=result.reason
+        )
+    
+    return result.as_dict()
@@ -0,0 +1,110 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.core.database import get_async_session
+from app.models.report_export import ReportExport, ReportType, ExportStatus
+from app.models.user import User, UserRole
+from app.schemas.report_export import ExportRequest, ReportExportResponse
+from app.services.report_exports import (
+    download_url,
+    export_file,
+    export_filename,
+    export_stats,
+    request_export,
+)
+from app.api.api_v1.endpoints.auth import get_current_active_user, get_current_admin_user
+
+router = APIRouter()
+
+
+def _response(export: ReportExport) -> ReportExportResponse:
+    response = ReportExportResponse.model_validate(export)
+    if export.status == ExportStatus.COMPLETED:
+        response.download_url = download_url(export.id)
+    return response
+
+
+async def get_owned_export(
+    export_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+) -> ReportExport:
+    export = await db.get(ReportExport, export_id)
+    if export is None or export.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    return export
+
+
+@router.post("", response_model=ReportExportResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_export(
+    export_request: ExportRequest,
+    response: Response,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Queue a monthly Excel report; the user is notified over /realtime/ws when it is ready."""
+    if (
+        export_request.report_type == ReportType.PARTS_SALES
+        and current_user.role not in (UserRole.PROVIDER, UserRole.DISTRIBUTOR, UserRole.ADMIN)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only suppliers can export parts sales"
+        )
+    try:
+        export, created = await request_export(db, current_user.id, export_request.report_type, export_request.month)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return _response(export)
+
+
+@router.get("", response_model=List[ReportExportResponse])
+async def list_exports(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """The current user's exports, newest first."""
+    result = await db.execute(
+        select(ReportExport)
+        .where(ReportExport.user_id == current_user.id)
+        .order_by(ReportExport.id.desc())
+        .limit(limit)
+    )
+    return [_response(export) for export in result.scalars()]
+
+
+@router.get("/metrics")
+async def get_export_metrics(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Export backlog, rows written and throughput of this worker."""
+    return await export_stats(db)
+
+
+@router.get("/{export_id}", response_model=ReportExportResponse)
+async def get_export(export: ReportExport = Depends(get_owned_export)):
+    """Status of one export."""
+    return _response(export)
+
+
+@router.get("/{export_id}/download")
+async def download_export(export: ReportExport = Depends(get_owned_export)):
+    """The finished workbook, streamed from disk."""
+    if export.status != ExportStatus.COMPLETED or not export.file_path:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Export is {export.status.value}")
+    path = export_file(export.file_path)
+    if not path.exists():
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Export file has expired")
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename=export_filename(export.report_type, export.period_start),
+        headers={"Cache-Control": "private, no-store"},
+    )
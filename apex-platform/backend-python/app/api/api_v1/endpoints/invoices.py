@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.core.database import get_async_session
+from app.models.user import User, UserRole
+from app.schemas.invoice import InvoiceSearchPage, AgingReport
+from app.services.ar_aging import get_aging_report
+from app.services.invoice_search import search_invoices, MIN_QUERY_LENGTH
+from app.api.api_v1.endpoints.auth import get_current_active_user
+
+router = APIRouter()
+
+
+@router.get("/search", response_model=InvoiceSearchPage)
+async def search(
+    q: str = Query(..., min_length=MIN_QUERY_LENGTH, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Fuzzy search invoices by number, folio, series, receiver RFC or notes."""
+    # Support staff (admins) search every invoice; everyone else only their own
+    user_id = None if current_user.role == UserRole.ADMIN else current_user.id
+    return await search_invoices(db, q, limit=limit, cursor=cursor, user_id=user_id)
+
+
+@router.get("/aging", response_model=AgingReport)
+async def accounts_receivable_aging(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Accounts-receivable aging of the invoices issued by the current user."""
+    return await get_aging_report(db, current_user.id)
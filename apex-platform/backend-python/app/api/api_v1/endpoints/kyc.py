@@ -0,0 +1,200 @@
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Request, Response, status
+from fastapi.responses import FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.models.kyc_document import KYCDocument, KYCDocumentStatus, KYCDocumentType
+from app.models.user import User, UserRole
+from app.schemas.kyc import KYCDocumentResponse, KYCUploadCreate, KYCUploadStatus, KYCReviewDecision
+from app.services.kyc_uploads import (
+    KYCDocumentError,
+    append_chunk,
+    document_path,
+    kyc_upload_stats,
+    review_document,
+    start_upload,
+    store_document,
+    upload_expires_at,
+    upload_offset,
+)
+from app.api.api_v1.endpoints.auth import get_current_active_user, get_current_admin_user
+
+router = APIRouter()
+
+
+def _upload_error(exc: KYCDocumentError) -> HTTPException:
+    return HTTPException(status_code=exc.status_code, detail=str(exc))
+
+
+async def get_owned_upload(
+    upload_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+) -> KYCDocument:
+    document = await db.get(KYCDocument, upload_id)
+    if document is None or document.user_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Upload not found")
+    return document
+
+
+async def _upload_status(document: KYCDocument, offset: Optional[int] = None,
+                         completed: Optional[KYCDocument] = None) -> KYCUploadStatus:
+    return KYCUploadStatus(
+        upload_id=document.id,
+        offset=await upload_offset(document) if offset is None else offset,
+        size=document.size_bytes,
+        chunk_size=settings.KYC_UPLOAD_CHUNK_BYTES,
+        expires_at=upload_expires_at(document),
+        document=completed,
+    )
+
+
+@router.post("/documents", response_model=KYCDocumentResponse, status_code=status.HTTP_201_CREATED)
+async def upload_document(
+    request: Request,
+    response: Response,
+    document_type: KYCDocumentType,
+    filename: Optional[str] = Query(None, max_length=255),
+    content_length: Optional[int] = Header(None),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Upload a whole KYC document (PDF, JPEG or PNG) as the raw request body.
+
+    The body is streamed to disk, so large files do not sit in memory.
+    Sending a file already on record returns that document with 200.
+    """
+    # Release the pooled connection while the body streams in
+    await db.commit()
+    try:
+        document, created = await store_document(
+            db, current_user.id, document_type, request.stream(),
+            filename=filename, declared_size=content_length,
+        )
+    except KYCDocumentError as exc:
+        raise _upload_error(exc)
+    if not created:
+        response.status_code = status.HTTP_200_OK
+    return document
+
+
+@router.post("/uploads", response_model=KYCUploadStatus, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload: KYCUploadCreate,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Open a resumable upload; send the bytes with PATCH in chunks of about `chunk_size`."""
+    try:
+        document = await start_upload(
+            db, current_user.id, upload.document_type, upload.size, filename=upload.filename
+        )
+    except KYCDocumentError as exc:
+        raise _upload_error(exc)
+    return await _upload_status(document, offset=0)
+
+
+@router.get("/uploads/{upload_id}", response_model=KYCUploadStatus)
+async def get_upload(document: KYCDocument = Depends(get_owned_upload)):
+    """Bytes received so far; a client resumes from `offset` after a dropped connection."""
+    return await _upload_status(document)
+
+
+@router.patch("/uploads/{upload_id}", response_model=KYCUploadStatus)
+async def upload_chunk(
+    request: Request,
+    upload_offset_header: int = Header(..., alias="Upload-Offset", ge=0),
+    content_length: Optional[int] = Header(None),
+    document: KYCDocument = Depends(get_owned_upload),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Append the raw request body at Upload-Offset; the last chunk submits the document."""
+    await db.commit()
+    try:
+        stored, offset = await append_chunk(
+            db, document, upload_offset_header, request.stream(), declared_size=content_length
+        )
+    except KYCDocumentError as exc:
+        raise _upload_error(exc)
+    completed = stored if offset >= document.size_bytes else None
+    return await _upload_status(document, offset=offset, completed=completed)
+
+
+@router.get("/documents", response_model=List[KYCDocumentResponse])
+async def list_documents(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """The current user's submitted documents, newest first."""
+    result = await db.execute(
+        select(KYCDocument)
+        .where(KYCDocument.user_id == current_user.id, KYCDocument.status != KYCDocumentStatus.UPLOADING)
+        .order_by(KYCDocument.id.desc())
+    )
+    return result.scalars().all()
+
+
+@router.get("/documents/{document_id}/file")
+async def download_document(
+    document_id: int,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """The stored file, for its owner and for reviewers."""
+    document = await db.get(KYCDocument, document_id)
+    if (
+        document is None or document.sha256 is None
+        or (document.user_id != current_user.id and current_user.role != UserRole.ADMIN)
+    ):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    return FileResponse(
+        document_path(document.sha256),
+        media_type=document.content_type,
+        filename=document.filename,
+        headers={"Cache-Control": "private, no-store"},
+    )
+
+
+@router.get("/review", response_model=List[KYCDocumentResponse])
+async def review_queue(
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Screened documents awaiting a reviewer, oldest first."""
+    result = await db.execute(
+        select(KYCDocument)
+        .where(KYCDocument.status == KYCDocumentStatus.IN_REVIEW)
+        .order_by(KYCDocument.completed_at)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+@router.post("/documents/{document_id}/review", response_model=KYCDocumentResponse)
+async def review(
+    document_id: int,
+    decision: KYCReviewDecision,
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Approve or reject a document; the owner's KYC status follows their documents."""
+    try:
+        document = await review_document(db, document_id, current_user.id, decision.approved, decision.notes)
+    except KYCDocumentError as exc:
+        raise _upload_error(exc)
+    if document is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+    return document
+
+
+@router.get("/metrics")
+async def get_kyc_upload_metrics(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Upload streams, dedup hits and the screening and review backlog."""
+    return await kyc_upload_stats(db)
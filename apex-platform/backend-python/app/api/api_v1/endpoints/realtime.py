@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Query, WebSocket, status
+from typing import Optional
+
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+from app.services.realtime import get_hub, realtime_stats
+from app.api.api_v1.endpoints.auth import authenticate_token, get_current_admin_user
+
+router = APIRouter()
+
+
+@router.websocket("/ws")
+async def realtime_updates(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None)
+):
+    """Push wallet balance and transaction status changes of the signed-in user.
+
+    Browsers cannot set headers on a WebSocket, so the access token may be
+    passed as ?token=. Frames are {"updates": [...]}, each update carrying
+    the latest state of one wallet or transaction; after a reconnect the
+    client should refetch, since updates are not replayed.
+    """
+    if token is None:
+        scheme, _, credentials = websocket.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    
+    # The session is only held for the lookup, not for the socket's lifetime
+    user = None
+    if token:
+        async with AsyncSessionLocal() as db:
+            user = await authenticate_token(token, db)
+    if user is None or not user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    await websocket.accept()
+    await get_hub().serve(websocket, user.id)
+
+
+@router.get("/metrics")
+async def get_realtime_metrics(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Open sockets, queued and coalesced updates and slow-consumer drops on this worker."""
+    return realtime_stats()
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import get_async_session
+from app.models.user import User
+from app.services.webhook_inbox import ingest_stripe_event, wake_webhook_worker, webhook_stats
+from app.api.api_v1.endpoints.auth import get_current_admin_user
+
+router = APIRouter()
+
+
+@router.post("/stripe")
+async def receive_stripe_webhook(
+    request: Request,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Acknowledge a Stripe callback once it is verified and stored in the inbox."""
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stripe webhooks are not configured"
+        )
+    
+    stored = await ingest_stripe_event(db, await request.body(), request.headers.get("Stripe-Signature"))
+    if stored:
+        wake_webhook_worker()
+    return {"received": True, "duplicate": not stored}
+
+
+@router.get("/metrics")
+async def get_webhook_metrics(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Inbox backlog, oldest pending event and worker batch timings."""
+    return await webhook_stats(db)
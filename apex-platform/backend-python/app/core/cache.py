@@ -0,0 +1,452 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import math
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from fastapi import BackgroundTasks, Request, Response
+from pydantic import BaseModel
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+class TTLCache:
+    """Small in-process LRU cache whose entries expire after a fixed TTL."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value or None if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable):
+        """Remove a single entry if present."""
+        self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+logger = logging.getLogger(__name__)
+
+# Arguments that never take part in a cache key
+UNKEYED_TYPES = (AsyncSession, Request, Response, BackgroundTasks)
+KEYABLE_TYPES = (str, int, float, bool, Enum, date, datetime, Decimal, UUID)
+
+
+def _json_default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    raise TypeError(f"Cannot cache {type(value).__name__}")
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, default=_json_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class MemoryBackend:
+    """Process-local stand-in for Redis, for tests and local runs."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+
+    def _get(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [self._get(key) for key in keys]
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if self._get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr_many(self, keys: List[str]):
+        for key in keys:
+            self._data[key] = (math.inf, str(int(self._get(key) or 0) + 1).encode())
+
+
+class RedisBackend:
+    """Cache storage on the shared Redis client; calls fail fast with its short timeout."""
+
+    async def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        return await get_redis().mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: float):
+        await get_redis().set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await get_redis().set(key, value, nx=True, px=max(1, int(ttl * 1000))))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await get_redis().delete(*keys)
+
+    async def incr_many(self, keys: List[str]):
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.incr(key)
+            await pipe.execute()
+
+
+@dataclass
+class CacheMetrics:
+    local_hits: int = 0
+    shared_hits: int = 0
+    coalesced: int = 0
+    misses: int = 0
+    early_refreshes: int = 0
+    stale_served: int = 0
+    loads: int = 0
+    load_seconds: float = 0.0
+    backend_errors: int = 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        served = self.local_hits + self.shared_hits + self.coalesced
+        requests = served + self.misses
+        return {
+            **asdict(self),
+            "load_seconds": round(self.load_seconds, 3),
+            "hit_ratio": round(served / requests, 4) if requests else None,
+        }
+
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float  # Wall clock, shared by every worker
+    delta: float  # Seconds the value took to compute
+    tags: Dict[str, int]
+
+    def pack(self) -> bytes:
+        meta = {"x": self.expires_at, "d": self.delta, "t": self.tags}
+        return _dumps(meta) + b"\n" + _dumps(self.value)
+
+    @classmethod
+    def unpack(cls, raw: bytes) -> "_Entry":
+        meta, _, value = raw.partition(b"\n")
+        meta = json.loads(meta)
+        return cls(json.loads(value), meta["x"], meta["d"], meta["t"])
+
+    def should_refresh(self, beta: float) -> bool:
+        """XFetch: recompute early with a probability that rises towards expiry
+        and with the cost of the computation, so one caller refreshes a hot
+        key before it expires instead of every caller at once."""
+        return time.time() - self.delta * beta * math.log(1.0 - random.random()) >= self.expires_at
+
+
+class Cache:
+    """Namespaced read-through cache: in-process L1 in front of a shared backend.
+
+    Values are JSON documents (pydantic models are dumped), so hits and
+    misses return the same shapes. Concurrent misses for a key in a process
+    share one load, and a short backend lock lets one worker of the fleet
+    recompute while the others briefly wait for its result. Entries carry
+    the versions of their tags at load time; invalidate_tags() bumps the
+    versions, which makes every entry with that tag a miss without
+    tracking keys. The L1 copy is dropped at once in the invalidating
+    process and within local_ttl seconds in the others.
+    """
+
+    def __init__(self, namespace: str, backend, local_ttl: float, local_max_entries: int, beta: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.beta = beta
+        self.local_ttl = local_ttl
+        self.metrics = CacheMetrics()
+        self._local = TTLCache(maxsize=local_max_entries, ttl=local_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{settings.CACHE_KEY_PREFIX}{self.namespace}:{key}"
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]], ttl: float,
+                          tags: Sequence[str] = ()) -> Any:
+        full_key = self._key(key)
+        local = self._local.get(full_key) if self.local_ttl > 0 else None
+        if local is not None:
+            entry, epochs = local
+            if epochs == _local_epochs(entry.tags) and not entry.should_refresh(self.beta):
+                self.metrics.local_hits += 1
+                return entry.value
+
+        pending = self._inflight.get(full_key)
+        while pending is not None:
+            value = await asyncio.shield(pending)
+            if value is not _RETRY:
+                self.metrics.coalesced += 1
+                return value
+            pending = self._inflight.get(full_key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[full_key] = future
+        try:
+            value = await self._fetch(full_key, loader, ttl, list(tags))
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            # Only this caller went away: the first waiter takes over the load
+            future.set_result(_RETRY)
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Waiters see the exception; retrieve it so an unobserved future does not warn
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(full_key, None)
+
+    def _remember(self, full_key: str, entry: _Entry, epochs: Tuple[int, ...]):
+        if self.local_ttl > 0:
+            remaining = entry.expires_at - time.time()
+            if remaining > 0:
+                self._local.set(full_key, (entry, epochs), ttl=min(self.local_ttl, remaining))
+
+    async def _fetch(self, full_key: str, loader, ttl: float, tags: List[str]) -> Any:
+        # Local epochs as of before the read: an invalidation in this process
+        # during the load leaves the L1 copy already outdated
+        epochs = _local_epochs(tags)
+        tag_keys = [_tag_key(tag) for tag in tags]
+        backend_ok = True
+        try:
+            raw, *versions = await self.backend.get_many([full_key, *tag_keys])
+        except RedisError as exc:
+            logger.warning("Cache read failed for %s: %s", full_key, exc)
+            self.metrics.backend_errors += 1
+            raw, versions, backend_ok = None, [None] * len(tags), False
+        current = {tag: int(version or 0) for tag, version in zip(tags, versions)}
+
+        stale = None
+        if raw is not None:
+            entry = _Entry.unpack(raw)
+            if entry.tags == current and entry.expires_at > time.time():
+                if not entry.should_refresh(self.beta):
+                    self.metrics.shared_hits += 1
+                    self._remember(full_key, entry, epochs)
+                    return entry.value
+                stale = entry
+                self.metrics.early_refreshes += 1
+
+        lock_key = f"{full_key}:lock"
+        locked = True
+        if backend_ok:
+            try:
+                locked = await self.backend.add(lock_key, b"1", settings.CACHE_LOCK_TTL_MS / 1000)
+            except RedisError:
+                backend_ok = False
+        if not locked:
+            # Another worker is recomputing: serve the still-valid entry, or
+            # wait briefly for the fresh one before loading ourselves
+            if stale is not None:
+                self.metrics.stale_served += 1
+                return stale.value
+            waited = 0.0
+            while waited < settings.CACHE_LOCK_WAIT_SECONDS:
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+                waited += LOCK_POLL_SECONDS
+                try:
+                    raw = (await self.backend.get_many([full_key]))[0]
+                except RedisError:
+                    break
+                if raw is not None:
+                    entry = _Entry.unpack(raw)
+                    if entry.tags == current:
+                        self.metrics.coalesced += 1
+                        self._remember(full_key, entry, epochs)
+                        return entry.value
+
+        self.metrics.misses += 1
+        try:
+            started = time.perf_counter()
+            value = await loader()
+            delta = time.perf_counter() - started
+            self.metrics.loads += 1
+            self.metrics.load_seconds += delta
+            encoded = _dumps(value)
+            entry = _Entry(json.loads(encoded), time.time() + ttl, delta, current)
+            self._remember(full_key, entry, epochs)
+            if backend_ok:
+                try:
+                    await self.backend.set(full_key, entry.pack(), ttl)
+                except RedisError as exc:
+                    logger.warning("Cache write failed for %s: %s", full_key, exc)
+                    self.metrics.backend_errors += 1
+            return entry.value
+        finally:
+            if backend_ok and locked:
+                try:
+                    await self.backend.delete(lock_key)
+                except RedisError:
+                    pass
+
+    async def delete(self, *keys: str):
+        """Drop entries in this process and the shared backend, in one call."""
+        full_keys = [self._key(key) for key in keys]
+        for full_key in full_keys:
+            self._local.delete(full_key)
+        try:
+            await self.backend.delete(*full_keys)
+        except RedisError as exc:
+            logger.warning("Cache delete failed for %d keys: %s", len(full_keys), exc)
+            self.metrics.backend_errors += 1
+
+
+LOCK_POLL_SECONDS = 0.02
+
+# Result handed to waiters when the loading caller was cancelled
+_RETRY = object()
+
+_backend = None
+_caches: Dict[str, Cache] = {}
+_epochs: Dict[str, int] = {}
+
+
+def _tag_key(tag: str) -> str:
+    return f"{settings.CACHE_KEY_PREFIX}tag:{tag}"
+
+
+def _local_epochs(tags: Iterable[str]) -> Tuple[int, ...]:
+    return tuple(_epochs.get(tag, 0) for tag in tags)
+
+
+def get_cache_backend():
+    global _backend
+    if _backend is None:
+        _backend = MemoryBackend() if settings.CACHE_BACKEND == "memory" else RedisBackend()
+    return _backend
+
+
+def get_cache(namespace: str, local_ttl: Optional[float] = None,
+              local_max_entries: Optional[int] = None) -> Cache:
+    """The cache of a namespace, created on first use."""
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = _caches[namespace] = Cache(
+            namespace,
+            get_cache_backend(),
+            local_ttl=settings.CACHE_LOCAL_TTL_SECONDS if local_ttl is None else local_ttl,
+            local_max_entries=local_max_entries or settings.CACHE_LOCAL_MAX_ENTRIES,
+            beta=settings.CACHE_EARLY_REFRESH_BETA,
+        )
+    return cache
+
+
+async def invalidate_tags(*tags: str):
+    """Expire every cached entry carrying any of `tags`, in all workers."""
+    if not tags:
+        return
+    for tag in tags:
+        _epochs[tag] = _epochs.get(tag, 0) + 1
+    try:
+        await get_cache_backend().incr_many([_tag_key(tag) for tag in tags])
+    except RedisError as exc:
+        logger.warning("Cache invalidation failed for tags %s: %s", tags, exc)
+
+
+def _default_key(namespace: str, arguments: Dict[str, Any]) -> str:
+    parts = []
+    for name, value in sorted(arguments.items()):
+        if isinstance(value, UNKEYED_TYPES):
+            continue
+        if value is not None and not isinstance(value, KEYABLE_TYPES):
+            raise TypeError(f"cached({namespace!r}) cannot key on argument {name!r}; pass key=")
+        parts.append(f"{name}={value.value if isinstance(value, Enum) else value}")
+    return hashlib.blake2b("&".join(parts).encode(), digest_size=16).hexdigest()
+
+
+def cached(
+    namespace: str,
+    ttl: float,
+    key: Optional[Callable[..., str]] = None,
+    tags: Sequence[Union[str, Callable[..., str]]] = (),
+    local_ttl: Optional[float] = None,
+):
+    """Cache an async function or endpoint handler through get_cache(namespace).
+
+    The key defaults to the function's scalar arguments; sessions, requests
+    and responses are ignored, and any other argument (a User, say) must
+    be keyed explicitly with `key`, which is called with the bound
+    arguments. Tags are format strings over the arguments
+    ("ar_aging:issuer:{issuer_id}") or callables like `key`. The wrapper
+    keeps the signature, so FastAPI still resolves dependencies. Cached
+    values are shared: treat them as read-only.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache = get_cache(namespace, local_ttl=local_ttl)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = bound.arguments
+            cache_key = key(**arguments) if key is not None else _default_key(namespace, arguments)
+            entry_tags = [tag(**arguments) if callable(tag) else tag.format(**arguments) for tag in tags]
+            return await cache.get_or_load(cache_key, lambda: func(*args, **kwargs), ttl, entry_tags)
+
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Hit ratio and load counters per namespace."""
+    return {namespace: cache.metrics.as_dict() for namespace, cache in sorted(_caches.items())}
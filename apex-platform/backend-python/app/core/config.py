@@ -28,6 +28,7 @@ class Settings(BaseSettings):
     STRIPE_PUBLISHABLE_KEY: Optional[str] = None
     STRIPE_SECRET_KEY: Optional[str] = None
     STRIPE_WEBHOOK_SECRET: Optional[str] = None
+    STRIPE_WEBHOOK_TOLERANCE_SECONDS: int = 300  # Rejects replayed signatures older than this
     
     PLAID_CLIENT_ID: Optional[str] = None
     PLAID_SECRET: Optional[str] = None
@@ -46,10 +47,97 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT_SECONDS: float = 0.25  # Caches fall back to the database rather than wait
+    
+    # Response Cache
+    CACHE_BACKEND: str = "redis"  # "memory" keeps entries in-process, for local runs and tests
+    CACHE_KEY_PREFIX: str = "cache:"
+    CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0  # How stale a worker's L1 copy may be after another worker invalidates
+    CACHE_EARLY_REFRESH_BETA: float = 1.0  # >1 refreshes hot keys earlier, 0 disables early refresh
+    CACHE_LOCK_TTL_MS: int = 2000
+    CACHE_LOCK_WAIT_SECONDS: float = 0.5  # Wait for another worker's load before loading ourselves
+
+    # Invoice Search
+    INVOICE_SEARCH_SIMILARITY_THRESHOLD: float = 0.4
+    INVOICE_SEARCH_CACHE_TTL_SECONDS: int = 30
+    INVOICE_SEARCH_CACHE_MAX_ENTRIES: int = 2048
+    
+    # Background CPU Work
+    PROCESS_POOL_WORKERS: int = 0  # 0 = one per CPU
+    
+    # CFDI Bulk Ingest
+    CFDI_INGEST_BATCH_SIZE: int = 500
+    CFDI_MAX_XML_BYTES: int = 2 * 1024 * 1024  # 2MB per XML
+    
+    # Accounts Receivable Aging
+    AR_AGING_CACHE_TTL_SECONDS: int = 60
+    
+    # Credit Delinquency
+    DELINQUENCY_SUSPEND_DAYS: int = 30
+    DELINQUENCY_DEFAULT_DAYS: int = 90
+    DELINQUENCY_CHUNK_SIZE: int = 5000
+    DELINQUENCY_LOCK_TIMEOUT_MS: int = 2000
+    
+    # Portfolio Analytics
+    PORTFOLIO_CHUNK_SIZE: int = 50000
+    
+    # Credit Scoring
+    CREDIT_SCORING_BATCH_SIZE: int = 20000
+    CREDIT_SCORING_LOOKBACK_DAYS: int = 180
+    CREDIT_SCORING_WATERMARK_OVERLAP_SECONDS: int = 300  # Re-read recent changes in case of late commits
     
     # File Storage
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    IMAGE_MAX_PIXELS: int = 40_000_000  # Rejects decompression bombs before any decoding
+    IMAGE_WEBP_QUALITY: int = 80
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_DERIVATIVE_CACHE_MAX_BYTES: int = 5 * 1024 * 1024 * 1024  # 5GB of thumbnails and WebP renders
+    IMAGE_DERIVATIVE_CACHE_LOW_WATERMARK: float = 0.9  # Eviction trims the cache to this share
+    KYC_UPLOAD_CHUNK_BYTES: int = 1024 * 1024  # Suggested resumable chunk size, also the write buffer per request
+    KYC_UPLOAD_EXPIRY_HOURS: int = 24  # Unfinished resumable uploads are pruned after this
+    KYC_REQUIRED_DOCUMENTS: List[str] = ["identification", "proof_of_address", "tax_certificate"]
+    KYC_SCREENING_BATCH_SIZE: int = 20
+    KYC_SCREENING_POLL_INTERVAL_SECONDS: float = 5.0
+    
+    # Report Exports
+    EXPORT_BATCH_ROWS: int = 5000  # Rows per server-side cursor fetch, and per write to the sheet
+    EXPORT_TIMEZONE: str = "America/Mexico_City"  # Month boundaries and dates in the sheets
+    EXPORT_POLL_INTERVAL_SECONDS: float = 5.0
+    EXPORT_MAX_ATTEMPTS: int = 3
+    EXPORT_STALE_MINUTES: int = 30  # A RUNNING export this old is taken over by another worker
+    EXPORT_RETENTION_DAYS: int = 7
+    
+    # Outbound Provider Clients
+    PROVIDER_TIMEOUT_SECONDS: float = 10.0
+    PROVIDER_CONNECT_TIMEOUT_SECONDS: float = 3.0
+    PROVIDER_MAX_CONNECTIONS: int = 20  # Keep-alive pool per provider
+    PROVIDER_KEEPALIVE_EXPIRY_SECONDS: float = 5.0  # Pooled connections are recycled after this long
+    PROVIDER_MAX_CONCURRENCY: int = 20  # In-flight calls per provider and worker
+    PROVIDER_MAX_RETRIES: int = 3
+    PROVIDER_RETRY_BASE_DELAY_SECONDS: float = 0.2
+    PROVIDER_RETRY_MAX_DELAY_SECONDS: float = 5.0
+    PROVIDER_BREAKER_FAILURE_RATIO: float = 0.5  # Share of failed attempts in the window that opens the circuit
+    PROVIDER_BREAKER_MIN_CALLS: int = 20
+    PROVIDER_BREAKER_WINDOW_SECONDS: float = 10.0
+    PROVIDER_BREAKER_RESET_SECONDS: float = 30.0
+    PROVIDER_RESPONSE_CACHE_MAX_ENTRIES: int = 1024
+    
+    # Webhook Inbox
+    WEBHOOK_BATCH_SIZE: int = 500
+    WEBHOOK_POLL_INTERVAL_SECONDS: float = 1.0  # Fallback when no local delivery wakes the worker
+    WEBHOOK_MAX_ATTEMPTS: int = 10  # Failed batches after which an event is left for inspection
+    WEBHOOK_UNMATCHED_RETRY_SECONDS: float = 5.0  # First wait for a transaction not committed yet; doubles per attempt
+    WEBHOOK_UNMATCHED_RETRY_MAX_SECONDS: float = 600.0
+    WEBHOOK_RETENTION_DAYS: int = 30
+    
+    # Realtime Push
+    REALTIME_BROKER: str = "redis"  # "memory" keeps fan-out inside one process (tests, single worker)
+    REALTIME_CHANNEL_PREFIX: str = "realtime:user:"
+    REALTIME_MAX_PENDING_UPDATES: int = 256  # Distinct objects queued on one socket before it is dropped
+    REALTIME_COALESCE_MS: int = 100  # Minimum spacing of frames to one socket
+    REALTIME_SEND_TIMEOUT_SECONDS: float = 10.0
     
     # Mexican Services
     SAT_USER: Optional[str] = None
@@ -59,6 +147,32 @@ class Settings(BaseSettings):
     # AutoPartes
     AUTOPARTES_API_KEY: Optional[str] = None
     AUTOPARTES_API_URL: str = "https://api.autopartes.com/v1"
+    FITMENT_HOT_VEHICLES: int = 256  # Vehicles kept as in-process arrays
+    FITMENT_HOT_ADMIT_HITS: int = 3  # Lookups before a vehicle is cached
+    FITMENT_HOT_CACHE_TTL_SECONDS: int = 300
+    CATALOG_SEARCH_SIMILARITY_THRESHOLD: float = 0.3
+    CATALOG_FACET_CACHE_TTL_SECONDS: int = 120
+    CATALOG_FACET_CACHE_MAX_ENTRIES: int = 4096
+    CATALOG_LISTING_CACHE_TTL_SECONDS: int = 30
+    CART_RESERVATION_TTL_SECONDS: int = 900
+    RESERVATION_SWEEP_BATCH_SIZE: int = 5000
+    SUPPLIER_FEED_BATCH_SIZE: int = 10000
+    SUPPLIER_FEED_MIN_COVERAGE: float = 0.5  # Below this share of known SKUs, skip discontinuing
+    PRODUCT_CACHE_TTL_SECONDS: int = 3600  # Redis copy of the detail payload
+    PRODUCT_CACHE_LOCAL_TTL_SECONDS: int = 5  # In-process copy, bounds cross-worker staleness
+    PRODUCT_CACHE_LOCAL_MAX_ENTRIES: int = 10000
+    PRODUCT_STOCK_TTL_SECONDS: int = 30
+    COUNTER_FLUSH_INTERVAL_SECONDS: float = 5.0  # Upper bound on counter increments lost in a crash
+    COUNTER_MAX_PENDING_PARTS: int = 50000  # Flush early once this many parts are buffered
+    COUNTER_FLUSH_CHUNK_SIZE: int = 5000
+    REPLENISHMENT_VELOCITY_WINDOW_DAYS: int = 28
+    REPLENISHMENT_SERVICE_LEVEL_Z: float = 1.65  # Safety stock for ~95% cycle service level
+    REPLENISHMENT_REVIEW_PERIOD_DAYS: int = 7  # Demand covered beyond the reorder point
+    REPLENISHMENT_CHUNK_SIZE: int = 100000
+    BESTSELLER_HALF_LIFE_DAYS: float = 14.0  # A sale counts half as much after this many days
+    BESTSELLER_WINDOW_DAYS: int = 90  # Older sales weigh < 1% and are ignored
+    BESTSELLER_TOP_N: int = 20  # Bestsellers flagged per category
+    BESTSELLER_MIN_SCORE: float = 1.0
     
     # Financial Services
     KONFIO_API_KEY: Optional[str] = None
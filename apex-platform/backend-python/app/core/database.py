@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from app.core.config import settings
 import asyncio
 
@@ -46,8 +46,10 @@ async def init_db():
     """Initialize database tables."""
     async with async_engine.begin() as conn:
         # Import all models here to ensure they are created
-        from app.models import user, wallet, transaction, invoice, credit_line, autopartes
+        from app.models import user, wallet, transaction, invoice, invoice_aging, credit_line, portfolio_snapshot, autopartes, autopart_fitment, stock_reservation, interchange, autopart_sales, purchase_suggestion, job_watermark, webhook_event, kyc_document, report_export
         
+        # Trigram indexes on the models depend on pg_trgm
+        await conn.execute(text('CREATE EXTENSION IF NOT EXISTS "pg_trgm"'))
         await conn.run_sync(Base.metadata.create_all)
 
 
@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import os
+
+from app.core.config import settings
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Shared process pool for CPU-bound work (parsing, scoring, imaging)."""
+    global _process_pool
+    if _process_pool is None:
+        workers = settings.PROCESS_POOL_WORKERS or os.cpu_count() or 1
+        _process_pool = ProcessPoolExecutor(max_workers=workers)
+    return _process_pool
+
+
+def shutdown_executors():
+    """Stop the shared pools; called on application shutdown."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=True, cancel_futures=True)
+        _process_pool = None
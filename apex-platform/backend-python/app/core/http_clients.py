@@ -0,0 +1,400 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any, Tuple, Deque
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+LATENCY_SAMPLES = 2048  # Recent calls kept per provider for percentiles
+BREAKER_BUCKETS = 10  # Resolution of the breaker's sliding window
+
+
+class ProviderError(Exception):
+    """A provider call failed after retries (transport error or retryable status)."""
+
+    def __init__(self, provider: str, message: str, status_code: Optional[int] = None):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.status_code = status_code
+
+
+class ProviderUnavailable(ProviderError):
+    """The provider's circuit is open; the call was not attempted."""
+
+
+@dataclass
+class ProviderConfig:
+    name: str
+    base_url: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    auth: Optional[Tuple[str, str]] = None
+    http2: bool = True
+    timeout: float = 10.0
+    connect_timeout: float = 3.0
+    max_connections: int = 20
+    keepalive_expiry: float = 5.0
+    max_concurrency: int = 20
+    max_retries: int = 3
+    retry_base_delay: float = 0.2
+    retry_max_delay: float = 5.0
+    breaker_failure_ratio: float = 0.5
+    breaker_min_calls: int = 20
+    breaker_window_seconds: float = 10.0
+    breaker_reset_seconds: float = 30.0
+
+
+class CircuitBreaker:
+    """Failure-rate breaker: closed -> open -> half-open probe -> closed.
+
+    Attempt outcomes are counted in BREAKER_BUCKETS buckets sliding over
+    the last `window_seconds`, so old outcomes age out a bucket at a time
+    instead of the whole window resetting at once. Once at least
+    `min_calls` attempts were made and the share that failed reaches
+    `failure_ratio`, calls are rejected for `reset_seconds`; then a single
+    probe is let through and its outcome closes or re-opens the circuit.
+    A rate rather than a run of failures keeps a burst of retries from
+    tripping an otherwise healthy provider.
+    """
+
+    def __init__(self, failure_ratio: float, min_calls: int, window_seconds: float, reset_seconds: float):
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.reset_seconds = reset_seconds
+        self.bucket_seconds = window_seconds / BREAKER_BUCKETS
+        self.buckets: Deque[list] = deque()  # [bucket number, attempts, failures]
+        self.attempts = 0
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def release_probe(self):
+        """Give up a half-open probe that ended without an outcome (cancelled)."""
+        self.probing = False
+
+    def _record(self, failed: bool) -> Tuple[int, int]:
+        now = int(time.monotonic() // self.bucket_seconds)
+        while self.buckets and self.buckets[0][0] <= now - BREAKER_BUCKETS:
+            _, attempts, failures = self.buckets.popleft()
+            self.attempts -= attempts
+            self.failures -= failures
+        if not self.buckets or self.buckets[-1][0] != now:
+            self.buckets.append([now, 0, 0])
+        self.buckets[-1][1] += 1
+        self.buckets[-1][2] += failed
+        self.attempts += 1
+        self.failures += failed
+        return self.attempts, self.failures
+
+    def _open(self):
+        self.times_opened += 1
+        self.opened_at = time.monotonic()
+        self.probing = False
+        self.buckets.clear()
+        self.attempts = self.failures = 0
+
+    def record_success(self):
+        if self.probing:
+            self.opened_at = None
+            self.probing = False
+        self._record(False)
+
+    def record_failure(self):
+        if self.probing:
+            self._open()
+            return
+        attempts, failures = self._record(True)
+        if self.opened_at is None and attempts >= self.min_calls and failures >= self.failure_ratio * attempts:
+            self._open()
+
+
+class ProviderMetrics:
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+        self.cache_hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.status_counts: Dict[int, int] = {}
+
+    def summary(self) -> Dict[str, Any]:
+        samples = sorted(self.latencies)
+
+        def percentile(q: float) -> Optional[float]:
+            if not samples:
+                return None
+            return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 2)
+
+        return {
+            "calls": self.calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "cache_hits": self.cache_hits,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "status_counts": dict(self.status_counts),
+            "latency_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "p99": percentile(0.99)},
+        }
+
+
+class ProviderClient:
+    """Pooled, rate-limited and fault-tolerant client for one external provider.
+
+    One httpx.AsyncClient per provider keeps connections (HTTP/2 where the
+    provider supports it) alive across requests. A semaphore caps
+    concurrent calls; idempotent requests, or POSTs carrying an
+    idempotency key, are retried on transport errors and retryable
+    statuses with full-jitter exponential backoff, honouring Retry-After.
+    A circuit breaker fails fast while the provider is down, and GETs can
+    opt into a short response cache with single-flight loading.
+    """
+
+    def __init__(self, config: ProviderConfig, cache_max_entries: int = 1024):
+        self.config = config
+        self.client = httpx.AsyncClient(
+            base_url=config.base_url,
+            headers=config.headers,
+            auth=config.auth,
+            http2=config.http2,
+            timeout=httpx.Timeout(config.timeout, connect=config.connect_timeout),
+            limits=httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+        )
+        self.breaker = CircuitBreaker(
+            config.breaker_failure_ratio, config.breaker_min_calls,
+            config.breaker_window_seconds, config.breaker_reset_seconds,
+        )
+        self.metrics = ProviderMetrics()
+        self._semaphore = asyncio.Semaphore(config.max_concurrency)
+        self._cache = TTLCache(maxsize=cache_max_entries, ttl=60)
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+
+    async def get(self, url: str, cache_ttl: Optional[float] = None, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, cache_ttl=cache_ttl, **kwargs)
+
+    async def post(self, url: str, idempotency_key: Optional[str] = None, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, idempotency_key=idempotency_key, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        cache_ttl: Optional[float] = None,
+        idempotency_key: Optional[str] = None,
+        **kwargs,
+    ) -> httpx.Response:
+        """Send a request and return the provider's response, including 4xx.
+
+        Raises ProviderUnavailable while the circuit is open, and
+        ProviderError when a retriable request still fails after
+        max_retries. Non-retriable requests return their 5xx response.
+        """
+        method = method.upper()
+        if cache_ttl is None or method != "GET":
+            return await self._send(method, url, idempotency_key, kwargs)
+
+        key = (url, tuple(sorted((kwargs.get("params") or {}).items())))
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.metrics.cache_hits += 1
+            return cached
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.metrics.cache_hits += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            response = await self._send(method, url, None, kwargs)
+            if response.status_code == 200 and "no-store" not in response.headers.get("cache-control", ""):
+                self._cache.set(key, response, ttl=cache_ttl)
+            future.set_result(response)
+            return response
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _send(self, method: str, url: str, idempotency_key: Optional[str], kwargs: Dict[str, Any]) -> httpx.Response:
+        name = self.config.name
+        retriable = method in IDEMPOTENT_METHODS or idempotency_key is not None
+        if idempotency_key is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Idempotency-Key": idempotency_key}
+        self.metrics.calls += 1
+
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                self.metrics.rejected += 1
+                raise ProviderUnavailable(name, "circuit open")
+
+            retry_after = None
+            started = time.perf_counter()
+            async with self._semaphore:
+                self.metrics.attempts += 1
+                self.metrics.in_flight += 1
+                self.metrics.max_in_flight = max(self.metrics.max_in_flight, self.metrics.in_flight)
+                try:
+                    response = await self.client.request(method, url, **kwargs)
+                except httpx.TransportError as exc:
+                    response, error = None, exc
+                except BaseException:
+                    self.breaker.release_probe()
+                    raise
+                finally:
+                    self.metrics.in_flight -= 1
+            self.metrics.latencies.append(time.perf_counter() - started)
+
+            if response is not None:
+                status = response.status_code
+                self.metrics.status_counts[status] = self.metrics.status_counts.get(status, 0) + 1
+                if status not in RETRYABLE_STATUSES and status < 500:
+                    self.breaker.record_success()
+                    return response
+                error = ProviderError(name, f"{method} {url} returned {status}", status)
+                retry_after = _retry_after(response)
+                if status == 429:
+                    # Throttling is the provider working as intended, not an outage
+                    self.breaker.record_success()
+                else:
+                    self.breaker.record_failure()
+            else:
+                self.breaker.record_failure()
+
+            # A request that never connected was not sent and is always safe to repeat
+            can_retry = retriable or isinstance(error, httpx.ConnectError)
+            if not can_retry or attempt >= self.config.max_retries:
+                self.metrics.failures += 1
+                if isinstance(error, ProviderError):
+                    if response is not None and not retriable:
+                        return response
+                    raise error
+                raise ProviderError(name, f"{method} {url} failed: {error!r}") from error
+
+            delay = random.uniform(0, min(self.config.retry_max_delay, self.config.retry_base_delay * 2 ** attempt))
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, self.config.retry_max_delay))
+            attempt += 1
+            self.metrics.retries += 1
+            logger.info("Retrying %s %s on %s in %.2fs (attempt %d)", method, url, name, delay, attempt)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"circuit": self.breaker.state, "times_opened": self.breaker.times_opened, **self.metrics.summary()}
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None  # HTTP-date form; fall back to the backoff delay
+
+
+def _bearer(token: Optional[str]) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def _basic(user: Optional[str], password: Optional[str]) -> Optional[Tuple[str, str]]:
+    return (user, password) if user and password else None
+
+
+def provider_configs() -> Dict[str, ProviderConfig]:
+    """Provider endpoints and credentials from settings, with shared defaults."""
+    defaults = dict(
+        timeout=settings.PROVIDER_TIMEOUT_SECONDS,
+        connect_timeout=settings.PROVIDER_CONNECT_TIMEOUT_SECONDS,
+        max_connections=settings.PROVIDER_MAX_CONNECTIONS,
+        keepalive_expiry=settings.PROVIDER_KEEPALIVE_EXPIRY_SECONDS,
+        max_concurrency=settings.PROVIDER_MAX_CONCURRENCY,
+        max_retries=settings.PROVIDER_MAX_RETRIES,
+        retry_base_delay=settings.PROVIDER_RETRY_BASE_DELAY_SECONDS,
+        retry_max_delay=settings.PROVIDER_RETRY_MAX_DELAY_SECONDS,
+        breaker_failure_ratio=settings.PROVIDER_BREAKER_FAILURE_RATIO,
+        breaker_min_calls=settings.PROVIDER_BREAKER_MIN_CALLS,
+        breaker_window_seconds=settings.PROVIDER_BREAKER_WINDOW_SECONDS,
+        breaker_reset_seconds=settings.PROVIDER_BREAKER_RESET_SECONDS,
+    )
+    configs = [
+        ProviderConfig("stripe", "https://api.stripe.com/v1", headers=_bearer(settings.STRIPE_SECRET_KEY), **defaults),
+        ProviderConfig("plaid", f"https://{settings.PLAID_ENV}.plaid.com", **defaults),
+        ProviderConfig("konfio", settings.KONFIO_API_URL, headers=_bearer(settings.KONFIO_API_KEY), **defaults),
+        ProviderConfig("kueski", settings.KUESKI_API_URL, headers=_bearer(settings.KUESKI_API_KEY), **defaults),
+        ProviderConfig("facturama", settings.FACTURAMA_API_URL,
+                       auth=_basic(settings.FACTURAMA_USER, settings.FACTURAMA_PASSWORD), **defaults),
+        ProviderConfig("sat", settings.SAT_ENDPOINT, auth=_basic(settings.SAT_USER, settings.SAT_PASSWORD), **defaults),
+        ProviderConfig("autopartes", settings.AUTOPARTES_API_URL,
+                       headers=_bearer(settings.AUTOPARTES_API_KEY), **defaults),
+    ]
+    return {config.name: config for config in configs}
+
+
+_clients: Dict[str, ProviderClient] = {}
+
+
+def get_provider_client(name: str) -> ProviderClient:
+    """Shared client for a provider; created on first use."""
+    client = _clients.get(name)
+    if client is None:
+        configs = provider_configs()
+        if name not in configs:
+            raise KeyError(f"Unknown provider {name!r}")
+        client = _clients[name] = ProviderClient(configs[name], settings.PROVIDER_RESPONSE_CACHE_MAX_ENTRIES)
+    return client
+
+
+def provider_stats() -> Dict[str, Any]:
+    return {name: client.stats() for name, client in _clients.items()}
+
+
+async def close_provider_clients():
+    """Close every provider connection pool; called on application shutdown."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -0,0 +1,27 @@
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Redis:
+    """Shared Redis client; connections are pooled and opened lazily."""
+    global _redis
+    if _redis is None:
+        _redis = Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+        )
+    return _redis
+
+
+async def close_redis():
+    """Close the shared client; called on application shutdown."""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
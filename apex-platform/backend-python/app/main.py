@@ -6,8 +6,17 @@ import time
 import uvicorn
 from contextlib import asynccontextmanager
 
+from app.core.cache import cache_stats
 from app.core.config import settings
 from app.core.database import init_db
+from app.core.executors import shutdown_executors
+from app.core.http_clients import close_provider_clients, provider_stats
+from app.core.redis import close_redis
+from app.services.kyc_uploads import start_kyc_screening, stop_kyc_screening
+from app.services.product_counters import start_counter_flusher, stop_counter_flusher
+from app.services.realtime import start_realtime, stop_realtime
+from app.services.report_exports import start_export_worker, stop_export_worker
+from app.services.webhook_inbox import start_webhook_worker, stop_webhook_worker
 from app.api.api_v1.api import api_router
 
 
@@ -16,9 +25,21 @@ async def lifespan(app: FastAPI):
     """Manage application lifespan events."""
     # Startup
     await init_db()
+    start_counter_flusher()
+    start_webhook_worker()
+    start_kyc_screening()
+    start_export_worker()
+    await start_realtime()
     yield
     # Shutdown
-    pass
+    await stop_realtime()
+    await stop_export_worker()
+    await stop_kyc_screening()
+    await stop_webhook_worker()
+    await stop_counter_flusher()
+    shutdown_executors()
+    await close_redis()
+    await close_provider_clients()
 
 
 app = FastAPI(
@@ -97,6 +118,18 @@ async def health_check():
     }
 
 
+@app.get("/health/providers")
+async def provider_health():
+    """Circuit state, retries and latency percentiles of outbound provider clients."""
+    return provider_stats()
+
+
+@app.get("/health/caches")
+async def cache_health():
+    """Hit ratio, loads and backend errors per response cache namespace."""
+    return cache_stats()
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
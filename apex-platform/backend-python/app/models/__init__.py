@@ -3,14 +3,38 @@ from .user import User
 from .wallet import Wallet
 from .transaction import Transaction
 from .invoice import Invoice
+from .invoice_aging import InvoiceAgingSummary, InvoiceAgingMeta, InvoiceAgingDirty
 from .credit_line import CreditLine
+from .portfolio_snapshot import PortfolioSnapshot
 from .autopartes import AutoPart
+from .autopart_fitment import AutoPartFitment
+from .stock_reservation import StockReservation
+from .interchange import InterchangeNumber
+from .autopart_sales import AutoPartDailySales
+from .purchase_suggestion import PurchaseSuggestion
+from .job_watermark import JobWatermark
+from .webhook_event import WebhookEvent
+from .kyc_document import KYCDocument
+from .report_export import ReportExport
 
 __all__ = [
     "User",
     "Wallet", 
     "Transaction",
     "Invoice",
+    "InvoiceAgingSummary",
+    "InvoiceAgingMeta",
+    "InvoiceAgingDirty",
     "CreditLine",
-    "AutoPart"
+    "PortfolioSnapshot",
+    "AutoPart",
+    "AutoPartFitment",
+    "StockReservation",
+    "InterchangeNumber",
+    "AutoPartDailySales",
+    "PurchaseSuggestion",
+    "JobWatermark",
+    "WebhookEvent",
+    "KYCDocument",
+    "ReportExport"
 ]
@@ -0,0 +1,104 @@
+from sqlalchemy import Column, Integer, SmallInteger, String, Enum, ForeignKey, Index, DDL, event
+from app.core.database import Base
+from app.models.autopartes import ProductCategory
+
+# Sentinels for "fits any" when a compatibility list on AutoPart is empty
+ANY_VALUE = "*"
+ANY_YEAR = 0
+
+
+class AutoPartFitment(Base):
+    """Normalized vehicle fitment rows derived from AutoPart compatibility lists.
+
+    One row per (make, model, year, engine type) a listed part fits, with
+    values lower-cased. Empty lists on the part become the ANY_VALUE /
+    ANY_YEAR wildcards, matching AutoPart.is_compatible_with_vehicle.
+    category and brand are copied from the part so filtered lookups are
+    answered from the index alone. Rows are maintained by a trigger on
+    autoparts.
+    """
+    __tablename__ = "autopart_fitments"
+    __table_args__ = (
+        Index("ix_autopart_fitments_vehicle_filters", "make", "model", "year", "category", "brand", "part_id"),
+        Index("ix_autopart_fitments_part_id", "part_id"),
+    )
+
+    make = Column(String(50), primary_key=True)
+    model = Column(String(80), primary_key=True)
+    year = Column(SmallInteger, primary_key=True)
+    engine_type = Column(String(30), primary_key=True)
+    part_id = Column(Integer, ForeignKey("autoparts.id", ondelete="CASCADE"), primary_key=True)
+
+    # Denormalized filters
+    category = Column(Enum(ProductCategory), nullable=False)
+    brand = Column(String(100), nullable=False)
+
+    def __repr__(self):
+        return f"<AutoPartFitment(part_id={self.part_id}, {self.make} {self.model} {self.year} {self.engine_type})>"
+
+
+# Expands one part's JSON lists into fitment rows (cross product, wildcards
+# for empty lists). Only ACTIVE and OUT_OF_STOCK parts are indexed; years
+# that are not four digits are skipped rather than failing the write.
+FITMENT_ROWS_SQL = """
+    SELECT DISTINCT
+           lower(trim(mk.value)) AS make,
+           lower(trim(md.value)) AS model,
+           CAST(yr.value AS smallint) AS year,
+           lower(trim(en.value)) AS engine_type,
+           p.id AS part_id,
+           p.category,
+           lower(p.brand) AS brand
+    FROM autoparts p
+    CROSS JOIN LATERAL json_array_elements_text(
+        CASE WHEN json_typeof(p.compatible_makes) = 'array' AND json_array_length(p.compatible_makes) > 0
+             THEN p.compatible_makes ELSE '["*"]'::json END) AS mk(value)
+    CROSS JOIN LATERAL json_array_elements_text(
+        CASE WHEN json_typeof(p.compatible_models) = 'array' AND json_array_length(p.compatible_models) > 0
+             THEN p.compatible_models ELSE '["*"]'::json END) AS md(value)
+    CROSS JOIN LATERAL json_array_elements_text(
+        CASE WHEN json_typeof(p.compatible_years) = 'array' AND json_array_length(p.compatible_years) > 0
+             THEN p.compatible_years ELSE '[0]'::json END) AS yr(value)
+    CROSS JOIN LATERAL json_array_elements_text(
+        CASE WHEN json_typeof(p.engine_types) = 'array' AND json_array_length(p.engine_types) > 0
+             THEN p.engine_types ELSE '["*"]'::json END) AS en(value)
+    WHERE p.status IN ('ACTIVE', 'OUT_OF_STOCK')
+      AND (yr.value ~ '^[0-9]{4}$' OR yr.value = '0')
+"""
+
+FITMENT_TRIGGER_DDL = [
+    f"""
+CREATE OR REPLACE FUNCTION autoparts_refresh_fitment() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM autopart_fitments WHERE part_id = NEW.id;
+    INSERT INTO autopart_fitments (make, model, year, engine_type, part_id, category, brand)
+    {FITMENT_ROWS_SQL} AND p.id = NEW.id;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    "DROP TRIGGER IF EXISTS autoparts_fitment_insert ON autoparts",
+    """
+CREATE TRIGGER autoparts_fitment_insert AFTER INSERT ON autoparts
+    FOR EACH ROW EXECUTE FUNCTION autoparts_refresh_fitment()
+""",
+    "DROP TRIGGER IF EXISTS autoparts_fitment_update ON autoparts",
+    """
+CREATE TRIGGER autoparts_fitment_update
+    AFTER UPDATE OF compatible_makes, compatible_models, compatible_years, engine_types,
+                    category, brand, status
+    ON autoparts
+    FOR EACH ROW
+    WHEN (OLD.compatible_makes::text IS DISTINCT FROM NEW.compatible_makes::text
+          OR OLD.compatible_models::text IS DISTINCT FROM NEW.compatible_models::text
+          OR OLD.compatible_years::text IS DISTINCT FROM NEW.compatible_years::text
+          OR OLD.engine_types::text IS DISTINCT FROM NEW.engine_types::text
+          OR OLD.category IS DISTINCT FROM NEW.category
+          OR OLD.brand IS DISTINCT FROM NEW.brand
+          OR (OLD.status IN ('ACTIVE', 'OUT_OF_STOCK')) IS DISTINCT FROM (NEW.status IN ('ACTIVE', 'OUT_OF_STOCK')))
+    EXECUTE FUNCTION autoparts_refresh_fitment()
+""",
+]
+
+for statement in FITMENT_TRIGGER_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class AutoPartDailySales(Base):
+    """Units and revenue sold per part and day.
+
+    Written by the product counter flush alongside AutoPart.total_sold, so
+    demand over any recent window is a range scan instead of an order
+    history query. Replenishment reads sales velocity from here.
+    """
+    __tablename__ = "autopart_daily_sales"
+    __table_args__ = (
+        # Recent days, and rows touched since a job's watermark
+        Index("ix_autopart_daily_sales_day_updated_at", "day", "updated_at"),
+    )
+
+    part_id = Column(Integer, ForeignKey("autoparts.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    quantity = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<AutoPartDailySales(part_id={self.part_id}, day={self.day}, quantity={self.quantity})>"
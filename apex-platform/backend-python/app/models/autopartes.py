@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Enum, ForeignKey, JSON, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.core.database import Base
 import enum
 from typing import Optional, List, Dict, Any
@@ -37,8 +38,47 @@ class ProductStatus(str, enum.Enum):
     DISCONTINUED = "discontinued"
 
 
+FINAL_PRICE_SQL = (
+    "CASE WHEN discount_percentage > 0 "
+    "THEN selling_price * (1 - discount_percentage / 100) ELSE selling_price END"
+)
+PROFIT_MARGIN_SQL = (
+    "CASE WHEN cost_price = 0 THEN 0 "
+    "ELSE (selling_price - cost_price) / cost_price * 100 END"
+)
+
+# Weighted Spanish document for catalog full-text search
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('spanish', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(brand, '') || ' ' || coalesce(part_number, '') || ' ' "
+    "|| coalesce(oem_number, '')), 'A') || "
+    "setweight(to_tsvector('spanish', coalesce(subcategory, '') || ' ' || coalesce(keywords::text, '')), 'B') || "
+    "setweight(to_tsvector('spanish', coalesce(description, '')), 'C')"
+)
+
+
 class AutoPart(Base):
     __tablename__ = "autoparts"
+    __table_args__ = (
+        Index("ix_autoparts_search_vector", "search_vector", postgresql_using="gin"),
+        # Trigram indexes for fuzzy part number matching (requires pg_trgm)
+        Index("ix_autoparts_part_number_trgm", "part_number",
+              postgresql_using="gin", postgresql_ops={"part_number": "gin_trgm_ops"}),
+        Index("ix_autoparts_oem_number_trgm", "oem_number",
+              postgresql_using="gin", postgresql_ops={"oem_number": "gin_trgm_ops"}),
+        # Keyset price browsing over listed parts, overall and per category
+        Index("ix_autoparts_listed_final_price", "final_price", "id",
+              postgresql_where=text("status IN ('ACTIVE', 'OUT_OF_STOCK')")),
+        Index("ix_autoparts_listed_category_final_price", "category", "final_price", "id",
+              postgresql_where=text("status IN ('ACTIVE', 'OUT_OF_STOCK')")),
+        Index("ix_autoparts_profit_margin", "profit_margin"),
+        # Interchangeable alternatives by price; stock is checked on the few
+        # heap rows per group so reservations keep their HOT updates
+        Index("ix_autoparts_listed_interchange_final_price", "interchange_group_id", "final_price", "id",
+              postgresql_where=text("status IN ('ACTIVE', 'OUT_OF_STOCK')")),
+        # Currently flagged bestsellers, revisited by the ranking job
+        Index("ix_autoparts_bestsellers", "id", postgresql_where=text("is_bestseller")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -47,6 +87,7 @@ class AutoPart(Base):
     part_number = Column(String(100), index=True, nullable=False)
     oem_number = Column(String(100), nullable=True, index=True)
     universal_part_number = Column(String(100), nullable=True)
+    interchange_group_id = Column(Integer, nullable=True)  # Parts sharing any part number; see InterchangeNumber
     
     # Basic Information
     name = Column(String(255), nullable=False, index=True)
@@ -75,6 +116,9 @@ class AutoPart(Base):
     selling_price = Column(Float, nullable=False)
     msrp = Column(Float, nullable=True)  # Manufacturer suggested retail price
     discount_percentage = Column(Float, default=0.0, nullable=False)
+    # Maintained by Postgres so the catalog can sort, filter and index on them
+    final_price = Column(Float, Computed(FINAL_PRICE_SQL, persisted=True))  # Price after discount
+    profit_margin = Column(Float, Computed(PROFIT_MARGIN_SQL, persisted=True))  # Margin percentage over cost
     
     # Inventory
     stock_quantity = Column(Integer, default=0, nullable=False)
@@ -116,6 +160,7 @@ class AutoPart(Base):
     supplier_sku = Column(String(100), nullable=True)
     lead_time_days = Column(Integer, default=7, nullable=False)
     minimum_order_quantity = Column(Integer, default=1, nullable=False)
+    feed_hash = Column(String(32), nullable=True)  # Hash of the last supplier feed row applied
     
     # Additional Information
     installation_difficulty = Column(String(20), nullable=True)  # easy, medium, hard, professional
@@ -126,6 +171,9 @@ class AutoPart(Base):
     # Metadata
     metadata = Column(JSON, nullable=True)
     
+    # Full-text search document, maintained by Postgres
+    search_vector = Column(TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True))
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
@@ -147,20 +195,6 @@ class AutoPart(Base):
         """Check if product is low in stock."""
         return self.available_quantity <= self.minimum_stock
     
-    @property
-    def profit_margin(self) -> float:
-        """Calculate profit margin percentage."""
-        if self.cost_price == 0:
-            return 0.0
-        return ((self.selling_price - self.cost_price) / self.cost_price) * 100
-    
-    @property
-    def final_price(self) -> float:
-        """Calculate final price after discount."""
-        if self.discount_percentage > 0:
-            return self.selling_price * (1 - self.discount_percentage / 100)
-        return self.selling_price
-    
     def is_compatible_with_vehicle(self, make: str, model: str, year: int) -> bool:
         """Check if part is compatible with specific vehicle."""
         if self.compatible_makes and make not in self.compatible_makes:
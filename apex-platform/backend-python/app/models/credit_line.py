@@ -79,6 +79,9 @@ class CreditLine(Base):
     total_interest_paid = Column(Float, default=0.0, nullable=False)
     days_past_due = Column(Integer, default=0, nullable=False)
     late_payment_count = Column(Integer, default=0, nullable=False)
+    # Set when the delinquency batch suspended the line, which is the only
+    # kind of suspension it lifts again once the line is current
+    suspended_by_delinquency = Column(Boolean, default=False, nullable=False)
     
     # Collateral and Guarantees
     collateral_required = Column(Boolean, default=False, nullable=False)
@@ -95,8 +98,8 @@ class CreditLine(Base):
     metadata = Column(JSON, nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True, index=True)
     
     # Relationships
     user = relationship("User", back_populates="credit_lines")
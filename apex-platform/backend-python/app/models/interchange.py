@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, Index, Sequence
+from app.core.database import Base
+
+# Source of interchange group ids for parts linked between full rebuilds
+interchange_group_seq = Sequence("interchange_group_seq", metadata=Base.metadata)
+
+
+class InterchangeNumber(Base):
+    """Normalized part number and the interchange group it belongs to.
+
+    Every part, OEM and universal part number in the catalog maps to one
+    group; all parts sharing any number (directly or through other parts)
+    carry the same AutoPart.interchange_group_id.
+    """
+    __tablename__ = "interchange_numbers"
+    __table_args__ = (
+        Index("ix_interchange_numbers_group_id", "group_id"),
+    )
+
+    number = Column(String(100), primary_key=True)
+    group_id = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<InterchangeNumber(number={self.number}, group_id={self.group_id})>"
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Enum, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, Enum, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.core.database import Base
 import enum
 from typing import Optional, List, Dict, Any
@@ -52,6 +52,21 @@ class CFDIUse(str, enum.Enum):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Trigram indexes backing fuzzy invoice search (requires pg_trgm)
+        Index("ix_invoices_invoice_number_trgm", "invoice_number",
+              postgresql_using="gin", postgresql_ops={"invoice_number": "gin_trgm_ops"}),
+        Index("ix_invoices_folio_trgm", "folio",
+              postgresql_using="gin", postgresql_ops={"folio": "gin_trgm_ops"}),
+        Index("ix_invoices_series_trgm", "series",
+              postgresql_using="gin", postgresql_ops={"series": "gin_trgm_ops"}),
+        Index("ix_invoices_notes_trgm", "notes",
+              postgresql_using="gin", postgresql_ops={"notes": "gin_trgm_ops"}),
+        # Covering partial index for accounts-receivable aging
+        Index("ix_invoices_outstanding", "issuer_id", "receiver_id", "due_date",
+              postgresql_where=text("status IN ('SENT', 'OVERDUE')"),
+              postgresql_include=["total", "exchange_rate"]),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     
@@ -0,0 +1,107 @@
+from sqlalchemy import Column, Integer, Float, Date, DateTime, ForeignKey, CheckConstraint, DDL, event
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class InvoiceAgingSummary(Base):
+    """Precomputed accounts-receivable aging per (issuer, receiver) pair.
+
+    Amounts are outstanding invoice totals in MXN, bucketed by days past
+    due_date as of `as_of_date`.
+    """
+    __tablename__ = "invoice_aging_summary"
+
+    issuer_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    receiver_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+
+    # Aging Buckets
+    current_amount = Column(Float, default=0.0, nullable=False)
+    days_1_30 = Column(Float, default=0.0, nullable=False)
+    days_31_60 = Column(Float, default=0.0, nullable=False)
+    days_61_90 = Column(Float, default=0.0, nullable=False)
+    days_over_90 = Column(Float, default=0.0, nullable=False)
+    total_outstanding = Column(Float, default=0.0, nullable=False)
+    invoice_count = Column(Integer, default=0, nullable=False)
+
+    # Freshness
+    as_of_date = Column(Date, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<InvoiceAgingSummary(issuer_id={self.issuer_id}, receiver_id={self.receiver_id}, total={self.total_outstanding})>"
+
+
+class InvoiceAgingMeta(Base):
+    """Single row holding the date invoice_aging_summary is bucketed for.
+
+    Full rebuilds hold the row FOR UPDATE and incremental folds FOR SHARE,
+    so a fold never buckets pairs with the date of a snapshot that is
+    being replaced.
+    """
+    __tablename__ = "invoice_aging_meta"
+    __table_args__ = (
+        CheckConstraint("id = 1", name="ck_invoice_aging_meta_single_row"),
+    )
+
+    id = Column(Integer, primary_key=True, default=1)
+    as_of_date = Column(Date, nullable=True)
+    rebuilt_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<InvoiceAgingMeta(as_of_date={self.as_of_date})>"
+
+
+class InvoiceAgingDirty(Base):
+    """Queue of (issuer, receiver) pairs whose aging must be recomputed.
+
+    Filled by statement-level triggers on invoices, so ORM writes, bulk
+    imports and set-based updates are all captured.
+    """
+    __tablename__ = "invoice_aging_dirty"
+
+    issuer_id = Column(Integer, primary_key=True)
+    receiver_id = Column(Integer, primary_key=True)
+    marked_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+AGING_TRIGGER_DDL = [
+    """
+CREATE OR REPLACE FUNCTION invoices_mark_aging_dirty() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO invoice_aging_dirty (issuer_id, receiver_id)
+        SELECT DISTINCT issuer_id, receiver_id FROM old_rows
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'INSERT') THEN
+        INSERT INTO invoice_aging_dirty (issuer_id, receiver_id)
+        SELECT DISTINCT issuer_id, receiver_id FROM new_rows
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+""",
+    "DROP TRIGGER IF EXISTS invoices_aging_insert ON invoices",
+    """
+CREATE TRIGGER invoices_aging_insert AFTER INSERT ON invoices
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION invoices_mark_aging_dirty()
+""",
+    "DROP TRIGGER IF EXISTS invoices_aging_update ON invoices",
+    """
+CREATE TRIGGER invoices_aging_update AFTER UPDATE ON invoices
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION invoices_mark_aging_dirty()
+""",
+    "DROP TRIGGER IF EXISTS invoices_aging_delete ON invoices",
+    """
+CREATE TRIGGER invoices_aging_delete AFTER DELETE ON invoices
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION invoices_mark_aging_dirty()
+""",
+]
+
+# Idempotent so it also installs on databases created before these tables existed
+for statement in AGING_TRIGGER_DDL:
+    event.listen(Base.metadata, "after_create", DDL(statement))
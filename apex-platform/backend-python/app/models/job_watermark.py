@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class JobWatermark(Base):
+    """High-water mark of the last change processed by an incremental batch job."""
+    __tablename__ = "job_watermarks"
+
+    name = Column(String(100), primary_key=True)
+    value = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<JobWatermark(name={self.name}, value={self.value})>"
@@ -0,0 +1,66 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Enum, ForeignKey, Index
+from sqlalchemy.sql import func, text
+from app.core.database import Base
+import enum
+
+
+class KYCDocumentType(str, enum.Enum):
+    IDENTIFICATION = "identification"  # INE or passport
+    PROOF_OF_ADDRESS = "proof_of_address"
+    TAX_CERTIFICATE = "tax_certificate"  # Constancia de situación fiscal
+    BANK_STATEMENT = "bank_statement"
+    OTHER = "other"
+
+
+class KYCDocumentStatus(str, enum.Enum):
+    UPLOADING = "uploading"
+    QUEUED = "queued"
+    IN_REVIEW = "in_review"
+    APPROVED = "approved"
+    REJECTED = "rejected"
+
+
+class KYCDocument(Base):
+    """A document a user submitted for KYC review.
+
+    Resumable uploads create the row in UPLOADING with the declared size;
+    the bytes received so far live in a part file whose length is the
+    resume offset. Complete documents are stored once per content hash
+    and move QUEUED (automated screening) -> IN_REVIEW (an admin) ->
+    APPROVED or REJECTED.
+    """
+    __tablename__ = "kyc_documents"
+    __table_args__ = (
+        # The same file uploaded twice by a user is one document
+        Index("uq_kyc_documents_user_sha256", "user_id", "sha256", unique=True,
+              postgresql_where=text("sha256 IS NOT NULL")),
+        # Screening worker claims in arrival order
+        Index("ix_kyc_documents_queued", "id",
+              postgresql_where=text("status = 'QUEUED'")),
+        # Prune of abandoned resumable uploads
+        Index("ix_kyc_documents_uploading", "created_at",
+              postgresql_where=text("status = 'UPLOADING'")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    document_type = Column(Enum(KYCDocumentType), nullable=False)
+    status = Column(Enum(KYCDocumentStatus), default=KYCDocumentStatus.QUEUED, nullable=False)
+
+    # File
+    filename = Column(String(255), nullable=True)
+    content_type = Column(String(100), nullable=True)  # Sniffed from the first bytes
+    size_bytes = Column(BigInteger, nullable=False)
+    sha256 = Column(String(64), nullable=True)  # Set once every byte is received
+
+    # Review
+    review_notes = Column(Text, nullable=True)
+    reviewed_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    reviewed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<KYCDocument(id={self.id}, user_id={self.user_id}, type={self.document_type}, status={self.status})>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Date, DateTime, JSON, LargeBinary
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PortfolioSnapshot(Base):
+    """Dated credit portfolio risk metrics computed by the analytics job.
+
+    Dashboards read these rows instead of aggregating credit_lines live.
+    `status_vector` holds the per-line payment status buckets (compressed
+    NumPy arrays) so the next snapshot can compute roll rates.
+    """
+    __tablename__ = "portfolio_snapshots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    snapshot_date = Column(Date, unique=True, index=True, nullable=False)
+    
+    # Results
+    line_count = Column(Integer, default=0, nullable=False)
+    metrics = Column(JSON, nullable=False)
+    status_vector = Column(LargeBinary, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<PortfolioSnapshot(id={self.id}, date={self.snapshot_date}, lines={self.line_count})>"
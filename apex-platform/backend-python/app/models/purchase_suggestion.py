@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class PurchaseSuggestion(Base):
+    """Suggested purchase order line for a part at or below its reorder point.
+
+    Maintained by the replenishment planner: a full run replaces every row,
+    incremental runs recompute parts with new sales or an open suggestion.
+    """
+    __tablename__ = "purchase_suggestions"
+
+    part_id = Column(Integer, ForeignKey("autoparts.id", ondelete="CASCADE"), primary_key=True)
+    supplier_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+
+    # Suggestion
+    quantity = Column(Integer, nullable=False)
+    unit_cost = Column(Float, nullable=False)
+    urgent = Column(Boolean, default=False, nullable=False)  # Stocks out before the order can arrive
+
+    # Inputs the suggestion was computed from
+    inventory_position = Column(Integer, nullable=False)
+    reorder_point = Column(Integer, nullable=False)
+    order_up_to = Column(Integer, nullable=False)
+    daily_demand = Column(Float, nullable=False)
+
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<PurchaseSuggestion(part_id={self.part_id}, supplier_id={self.supplier_id}, quantity={self.quantity})>"
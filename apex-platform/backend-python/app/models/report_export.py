@@ -0,0 +1,57 @@
+from sqlalchemy import Column, BigInteger, Integer, String, Date, DateTime, Text, Enum, ForeignKey, Index
+from sqlalchemy.sql import func, text
+from app.core.database import Base
+import enum
+
+
+class ReportType(str, enum.Enum):
+    INVOICES = "invoices"
+    TRANSACTIONS = "transactions"
+    PARTS_SALES = "parts_sales"
+
+
+class ExportStatus(str, enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class ReportExport(Base):
+    """A requested Excel report, built by the export worker and kept on disk.
+
+    The period covers [period_start, period_end) in EXPORT_TIMEZONE. A
+    RUNNING export whose worker died is picked up again once it is older
+    than EXPORT_STALE_MINUTES, or failed if that was its last attempt.
+    """
+    __tablename__ = "report_exports"
+    __table_args__ = (
+        # One export of a report and period in flight per user
+        Index("uq_report_exports_active", "user_id", "report_type", "period_start", unique=True,
+              postgresql_where=text("status IN ('QUEUED', 'RUNNING')")),
+        # Worker claims in request order
+        Index("ix_report_exports_pending", "id",
+              postgresql_where=text("status IN ('QUEUED', 'RUNNING')")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    report_type = Column(Enum(ReportType), nullable=False)
+    period_start = Column(Date, nullable=False)
+    period_end = Column(Date, nullable=False)
+    status = Column(Enum(ExportStatus), default=ExportStatus.QUEUED, nullable=False)
+
+    # Result
+    row_count = Column(Integer, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    file_path = Column(String(500), nullable=True)  # Relative to UPLOAD_DIR
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ReportExport(id={self.id}, user_id={self.user_id}, type={self.report_type}, status={self.status})>"
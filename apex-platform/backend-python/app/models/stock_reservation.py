@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index
+from sqlalchemy.sql import func, text
+from app.core.database import Base
+import enum
+
+
+class ReservationStatus(str, enum.Enum):
+    ACTIVE = "active"
+    COMMITTED = "committed"
+    RELEASED = "released"
+    EXPIRED = "expired"
+
+
+class StockReservation(Base):
+    """Units of a part held for a cart until checkout or expiry.
+
+    The held quantity is also counted in AutoPart.reserved_quantity; rows
+    leave the ACTIVE state when the cart checks out, is released, or the
+    sweeper expires them.
+    """
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        # One active hold per part and cart
+        Index("uq_stock_reservations_active_cart_part", "cart_id", "part_id", unique=True,
+              postgresql_where=text("status = 'ACTIVE'")),
+        # Sweeper scan of holds past their expiry
+        Index("ix_stock_reservations_active_expiry", "expires_at",
+              postgresql_where=text("status = 'ACTIVE'")),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    cart_id = Column(String(64), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    part_id = Column(Integer, ForeignKey("autoparts.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(Enum(ReservationStatus), default=ReservationStatus.ACTIVE, nullable=False)
+
+    # Timestamps
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+
+    def __repr__(self):
+        return f"<StockReservation(id={self.id}, cart={self.cart_id}, part={self.part_id}, qty={self.quantity}, status={self.status})>"
@@ -83,8 +83,8 @@ class Transaction(Base):
     retry_count = Column(Integer, default=0, nullable=False)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True, index=True)
     
     # Relationships
     user = relationship("User", foreign_keys=[user_id], back_populates="transactions")
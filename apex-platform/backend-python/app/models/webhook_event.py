@@ -0,0 +1,40 @@
+from sqlalchemy import Column, BigInteger, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func, text
+from app.core.database import Base
+
+
+class WebhookEvent(Base):
+    """Raw provider callback, stored as received before any processing.
+
+    Rows are only appended by the webhook endpoint; the inbox workers
+    stamp processed_at (or count failed attempts and set a retry time)
+    and never change the payload. The unique (provider, event_id) index
+    drops redelivered events at insert time.
+    """
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        Index("uq_webhook_events_provider_event", "provider", "event_id", unique=True),
+        # Worker claims in arrival order
+        Index("ix_webhook_events_pending", "id",
+              postgresql_where=text("processed_at IS NULL")),
+        # Earlier pending events of the same object hold back later ones
+        Index("ix_webhook_events_pending_external", "external_id", "id",
+              postgresql_where=text("processed_at IS NULL")),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    provider = Column(String(32), nullable=False)
+    event_id = Column(String(255), nullable=False)
+    event_type = Column(String(100), nullable=False)
+    external_id = Column(String(100), nullable=True)  # Matches Transaction.external_id
+    payload = Column(Text, nullable=False)  # Body exactly as signed by the provider
+
+    # Processing
+    attempts = Column(Integer, default=0, nullable=False)
+    last_error = Column(Text, nullable=True)
+    not_before = Column(DateTime(timezone=True), nullable=True)  # Retry backoff for events not yet matched
+    received_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<WebhookEvent(id={self.id}, provider={self.provider}, type={self.event_type}, external_id={self.external_id})>"
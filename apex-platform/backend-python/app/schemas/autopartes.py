@@ -0,0 +1,60 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from app.models.autopartes import ProductCategory, ProductStatus
+
+
+class AutoPartSummary(BaseModel):
+    id: int
+    sku: str
+    part_number: str
+    name: str
+    category: ProductCategory
+    brand: str
+    selling_price: float
+    discount_percentage: float
+    final_price: float
+    available_quantity: int
+    status: ProductStatus
+    primary_image_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AutoPartPage(BaseModel):
+    items: List[AutoPartSummary]
+    next_cursor: Optional[str] = None
+
+
+class CatalogSearchHit(AutoPartSummary):
+    score: float
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class CatalogFacets(BaseModel):
+    total: int
+    category: List[FacetCount]
+    brand: List[FacetCount]
+    condition: List[FacetCount]
+    price_range: List[FacetCount]
+
+
+class CatalogSearchPage(BaseModel):
+    items: List[CatalogSearchHit]
+    next_cursor: Optional[str] = None
+    facets: CatalogFacets
+
+
+class DiscountUpdate(BaseModel):
+    discount_percentage: float = Field(..., ge=0, lt=100)
+    brand: Optional[str] = None
+    category: Optional[ProductCategory] = None
+    supplier_id: Optional[int] = None
+
+
+class DiscountUpdateResult(BaseModel):
+    updated: int
@@ -0,0 +1,57 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+from datetime import datetime, date
+from app.models.credit_line import PaymentFrequency
+
+
+class ScheduleRow(BaseModel):
+    period: int
+    due_date: datetime
+    payment: float
+    interest: float
+    principal: float
+    balance: float
+
+
+class AmortizationSchedule(BaseModel):
+    credit_line_id: int
+    payment_frequency: PaymentFrequency
+    outstanding: float
+    rows: List[ScheduleRow]
+
+
+class PayoffQuote(BaseModel):
+    credit_line_id: int
+    after_period: int
+    payoff_amount: float
+    interest_saved: float
+
+
+class PortfolioSnapshotSummary(BaseModel):
+    snapshot_date: date
+    line_count: int
+    created_at: datetime
+
+
+class PortfolioSnapshotResponse(PortfolioSnapshotSummary):
+    metrics: Dict[str, Any]
+    
+    class Config:
+        from_attributes = True
+
+
+class CreditDrawRequest(BaseModel):
+    amount: float = Field(..., gt=0)
+    description: Optional[str] = Field(None, max_length=255)
+    idempotency_key: Optional[str] = Field(None, min_length=8, max_length=50)
+
+
+class CreditDrawResponse(BaseModel):
+    accepted: bool
+    credit_line_id: int
+    amount: float
+    transaction_id: Optional[str]
+    used_amount: Optional[float]
+    available_amount: Optional[float]
+    wallet_available_credit: Optional[float]
+    replayed: bool = False
@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime, date
+from app.models.invoice import InvoiceStatus
+
+
+class InvoiceSearchHit(BaseModel):
+    id: int
+    invoice_number: str
+    folio: Optional[str]
+    series: Optional[str]
+    receiver_rfc: Optional[str]
+    total: float
+    currency: str
+    status: InvoiceStatus
+    issue_date: datetime
+    due_date: datetime
+    score: float
+
+
+class InvoiceSearchPage(BaseModel):
+    items: List[InvoiceSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class AgingBuckets(BaseModel):
+    current_amount: float
+    days_1_30: float
+    days_31_60: float
+    days_61_90: float
+    days_over_90: float
+    total_outstanding: float
+
+
+class AgingReceiverRow(AgingBuckets):
+    receiver_id: int
+    business_name: Optional[str]
+    rfc: Optional[str]
+    invoice_count: int
+
+
+class AgingReport(BaseModel):
+    issuer_id: int
+    as_of_date: date
+    refreshed_at: Optional[datetime]
+    totals: AgingBuckets
+    receivers: List[AgingReceiverRow]
@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from app.models.kyc_document import KYCDocumentType, KYCDocumentStatus
+
+
+class KYCDocumentResponse(BaseModel):
+    id: int
+    user_id: int
+    document_type: KYCDocumentType
+    status: KYCDocumentStatus
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size_bytes: int
+    sha256: Optional[str] = None
+    review_notes: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    reviewed_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class KYCUploadCreate(BaseModel):
+    document_type: KYCDocumentType
+    size: int = Field(..., gt=0)
+    filename: Optional[str] = Field(None, max_length=255)
+
+
+class KYCUploadStatus(BaseModel):
+    upload_id: int
+    offset: int
+    size: int
+    chunk_size: int
+    expires_at: datetime
+    document: Optional[KYCDocumentResponse] = None  # Set once the last chunk is in
+
+
+class KYCReviewDecision(BaseModel):
+    approved: bool
+    notes: Optional[str] = Field(None, max_length=2000)
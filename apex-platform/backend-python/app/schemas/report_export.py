@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import date, datetime
+from app.models.report_export import ReportType, ExportStatus
+
+
+class ExportRequest(BaseModel):
+    report_type: ReportType
+    month: str = Field(..., pattern=r"^\d{4}-(0[1-9]|1[0-2])$")  # YYYY-MM
+
+
+class ReportExportResponse(BaseModel):
+    id: int
+    report_type: ReportType
+    period_start: date
+    period_end: date
+    status: ExportStatus
+    row_count: Optional[int] = None
+    size_bytes: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    completed_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
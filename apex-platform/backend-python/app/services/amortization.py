@@ -0,0 +1,208 @@
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Sequence
+import numpy as np
+from dateutil.relativedelta import relativedelta
+
+from app.core.cache import TTLCache
+from app.models.credit_line import CreditLine, PaymentFrequency
+
+PERIODS_PER_YEAR = {
+    PaymentFrequency.WEEKLY: 52,
+    PaymentFrequency.BIWEEKLY: 26,
+    PaymentFrequency.MONTHLY: 12,
+    PaymentFrequency.QUARTERLY: 4,
+}
+
+PERIOD_STEP = {
+    PaymentFrequency.WEEKLY: timedelta(weeks=1),
+    PaymentFrequency.BIWEEKLY: timedelta(weeks=2),
+    PaymentFrequency.MONTHLY: relativedelta(months=1),
+    PaymentFrequency.QUARTERLY: relativedelta(months=3),
+}
+
+_schedule_cache = TTLCache(maxsize=10000, ttl=24 * 60 * 60)
+
+
+@dataclass
+class ScheduleBatch:
+    """Amortization schedules for many loans in flat arrays.
+
+    Rows for loan i live in the slice starts[i]:starts[i] + lengths[i] of
+    the payment, interest, principal and balance arrays. Loans with the same
+    number of periods are stored in one contiguous block.
+    """
+    starts: np.ndarray
+    lengths: np.ndarray
+    payment: np.ndarray
+    interest: np.ndarray
+    principal: np.ndarray
+    balance: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def rows(self, index: int) -> Dict[str, np.ndarray]:
+        """Per-period arrays for a single loan."""
+        start = int(self.starts[index])
+        window = slice(start, start + int(self.lengths[index]))
+        return {
+            "payment": self.payment[window],
+            "interest": self.interest[window],
+            "principal": self.principal[window],
+            "balance": self.balance[window],
+        }
+
+
+def _group_schedule(principal: np.ndarray, rate: np.ndarray, periods: int):
+    """Closed-form annuity schedule for loans sharing the same period count.
+
+    Returns (payment, interest, principal, balance) matrices of shape
+    (loans, periods), rounded to cents with the last row absorbing drift.
+    """
+    k = np.arange(1, periods + 1, dtype=np.float64)
+    zero_rate = rate == 0
+    safe_rate = np.where(zero_rate, 1.0, rate)
+
+    growth_n = (1.0 + safe_rate) ** periods
+    payment = np.where(
+        zero_rate,
+        principal / periods,
+        principal * safe_rate * growth_n / (growth_n - 1.0),
+    )
+
+    # Balance after k payments: P(1+r)^k - A((1+r)^k - 1)/r, or P - A k at zero rate
+    growth_k = np.cumprod(np.broadcast_to(1.0 + safe_rate[:, None], (len(rate), periods)), axis=1)
+    balance = np.where(
+        zero_rate[:, None],
+        principal[:, None] - payment[:, None] * k[None, :],
+        principal[:, None] * growth_k - payment[:, None] * (growth_k - 1.0) / safe_rate[:, None],
+    )
+    opening = np.empty_like(balance)
+    opening[:, 0] = principal
+    opening[:, 1:] = balance[:, :-1]
+
+    interest = np.round(opening * rate[:, None], 2)
+    payments = np.broadcast_to(np.round(payment, 2)[:, None], balance.shape).copy()
+    principal_paid = np.round(payments - interest, 2)
+
+    # Recompute the balance on rounded amounts and settle the residual at the
+    # end, re-rounding so the last row is in cents and still splits exactly
+    balance = np.round(principal[:, None] - np.cumsum(principal_paid, axis=1), 2)
+    principal_paid[:, -1] = np.round(principal_paid[:, -1] + balance[:, -1], 2)
+    payments[:, -1] = np.round(interest[:, -1] + principal_paid[:, -1], 2)
+    balance[:, -1] = 0.0
+    return payments, interest, principal_paid, balance
+
+
+def amortization_schedules(
+    principal: Sequence[float],
+    annual_rate: Sequence[float],
+    periods: Sequence[int],
+    periods_per_year: Sequence[int],
+) -> ScheduleBatch:
+    """Compute level-payment amortization schedules for any number of loans.
+
+    `annual_rate` is a percentage like CreditLine.interest_rate. Loans are
+    grouped by period count so each group is a single dense NumPy
+    computation with no per-period Python loop.
+    """
+    principal = np.asarray(principal, dtype=np.float64)
+    rate = np.asarray(annual_rate, dtype=np.float64) / 100.0 / np.asarray(periods_per_year, dtype=np.float64)
+    periods = np.maximum(np.asarray(periods, dtype=np.int64), 1)
+
+    starts = np.empty(len(periods), dtype=np.int64)
+    size = int(periods.sum())
+    out = {name: np.empty(size, dtype=np.float64) for name in ("payment", "interest", "principal", "balance")}
+
+    block_start = 0
+    for count in np.unique(periods):
+        members = np.flatnonzero(periods == count)
+        block_end = block_start + len(members) * int(count)
+        starts[members] = block_start + np.arange(len(members)) * count
+        group = _group_schedule(principal[members], rate[members], int(count))
+        for name, values in zip(("payment", "interest", "principal", "balance"), group):
+            out[name][block_start:block_end] = values.ravel()
+        block_start = block_end
+
+    return ScheduleBatch(starts=starts, lengths=periods, **out)
+
+
+def _remaining_periods(credit_line: CreditLine) -> int:
+    per_year = PERIODS_PER_YEAR[credit_line.payment_frequency]
+    total = max(1, round(credit_line.term_months * per_year / 12))
+    return max(1, total - credit_line.total_payments_made)
+
+
+def _version(credit_line: CreditLine) -> tuple:
+    """Inputs that determine a schedule; any change yields a new cache entry."""
+    return (
+        credit_line.id,
+        credit_line.used_amount,
+        credit_line.interest_rate,
+        credit_line.term_months,
+        credit_line.total_payments_made,
+        credit_line.payment_frequency,
+        credit_line.next_payment_date,
+    )
+
+
+def schedules_for_credit_lines(credit_lines: List[CreditLine]) -> ScheduleBatch:
+    """Vectorized schedules for the outstanding balance of many credit lines."""
+    return amortization_schedules(
+        [line.used_amount for line in credit_lines],
+        [line.interest_rate for line in credit_lines],
+        [_remaining_periods(line) for line in credit_lines],
+        [PERIODS_PER_YEAR[line.payment_frequency] for line in credit_lines],
+    )
+
+
+def credit_line_schedule(credit_line: CreditLine, start: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Dated schedule for one credit line, cached per credit line version and start."""
+    key = _version(credit_line) + (start,)
+    cached = _schedule_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if credit_line.used_amount <= 0:
+        _schedule_cache.set(key, [])
+        return []
+
+    rows = schedules_for_credit_lines([credit_line]).rows(0)
+    step = PERIOD_STEP[credit_line.payment_frequency]
+    due = start or credit_line.next_payment_date or datetime.utcnow() + step
+
+    schedule = []
+    for period in range(len(rows["payment"])):
+        schedule.append({
+            "period": period + 1,
+            "due_date": due + step * period,
+            "payment": float(rows["payment"][period]),
+            "interest": float(rows["interest"][period]),
+            "principal": float(rows["principal"][period]),
+            "balance": float(rows["balance"][period]),
+        })
+    _schedule_cache.set(key, schedule)
+    return schedule
+
+
+def early_payoff_quote(credit_line: CreditLine, after_period: int = 0) -> Dict[str, Any]:
+    """Amount needed to settle the line right after `after_period` scheduled payments.
+
+    The quote is the outstanding principal at that point plus the interest
+    accrued for the next period, and the interest saved versus the schedule.
+    """
+    schedule = credit_line_schedule(credit_line)
+    if not schedule:
+        return {"after_period": after_period, "payoff_amount": 0.0, "interest_saved": 0.0}
+    if not 0 <= after_period < len(schedule):
+        raise ValueError(f"after_period must be between 0 and {len(schedule) - 1}")
+
+    outstanding = credit_line.used_amount if after_period == 0 else schedule[after_period - 1]["balance"]
+    next_interest = schedule[after_period]["interest"]
+    remaining_interest = sum(row["interest"] for row in schedule[after_period:])
+    return {
+        "after_period": after_period,
+        "payoff_amount": round(outstanding + next_interest, 2),
+        "interest_saved": round(remaining_interest - next_interest, 2),
+    }
@@ -0,0 +1,220 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional, Dict, Any
+import asyncio
+
+from app.core.cache import cached, invalidate_tags
+from app.core.config import settings
+
+BUCKETS = ("current_amount", "days_1_30", "days_31_60", "days_61_90", "days_over_90")
+
+REPORT_TAG = "ar_aging"
+
+# Buckets for the outstanding invoices of the pairs in `scope`, in MXN
+_AGED_SELECT = """
+    SELECT i.issuer_id, i.receiver_id,
+           SUM(CASE WHEN d.days <= 0 THEN d.amount ELSE 0 END) AS current_amount,
+           SUM(CASE WHEN d.days BETWEEN 1 AND 30 THEN d.amount ELSE 0 END) AS days_1_30,
+           SUM(CASE WHEN d.days BETWEEN 31 AND 60 THEN d.amount ELSE 0 END) AS days_31_60,
+           SUM(CASE WHEN d.days BETWEEN 61 AND 90 THEN d.amount ELSE 0 END) AS days_61_90,
+           SUM(CASE WHEN d.days > 90 THEN d.amount ELSE 0 END) AS days_over_90,
+           SUM(d.amount) AS total_outstanding,
+           COUNT(*) AS invoice_count
+    FROM invoices i
+    {scope_join}
+    CROSS JOIN LATERAL (
+        SELECT CAST(:as_of AS date) - CAST(i.due_date AS date) AS days,
+               i.total * i.exchange_rate AS amount
+    ) d
+    WHERE i.status IN ('SENT', 'OVERDUE')
+    GROUP BY i.issuer_id, i.receiver_id
+"""
+
+_UPSERT_COLUMNS = ", ".join(BUCKETS + ("total_outstanding", "invoice_count"))
+_UPSERT_SET = ", ".join(f"{column} = EXCLUDED.{column}" for column in BUCKETS + (
+    "total_outstanding", "invoice_count", "as_of_date", "refreshed_at"))
+
+FULL_REFRESH_SQL = [
+    "DELETE FROM invoice_aging_dirty",
+    "DELETE FROM invoice_aging_summary",
+    f"""
+    INSERT INTO invoice_aging_summary (issuer_id, receiver_id, {_UPSERT_COLUMNS}, as_of_date, refreshed_at)
+    SELECT a.*, CAST(:as_of AS date), now()
+    FROM ({_AGED_SELECT.format(scope_join="")}) a
+    """,
+]
+
+# Drains the dirty queue (optionally for one issuer) and recomputes only those
+# pairs in a single statement; pairs with nothing outstanding are removed.
+INCREMENTAL_REFRESH_SQL = f"""
+WITH dirty AS (
+    DELETE FROM invoice_aging_dirty
+    WHERE CAST(:issuer_id AS integer) IS NULL OR issuer_id = :issuer_id
+    RETURNING issuer_id, receiver_id
+),
+fresh AS (
+    {_AGED_SELECT.format(scope_join="JOIN dirty s ON s.issuer_id = i.issuer_id AND s.receiver_id = i.receiver_id")}
+),
+upserted AS (
+    INSERT INTO invoice_aging_summary (issuer_id, receiver_id, {_UPSERT_COLUMNS}, as_of_date, refreshed_at)
+    SELECT f.*, CAST(:as_of AS date), now() FROM fresh f
+    ON CONFLICT (issuer_id, receiver_id) DO UPDATE SET {_UPSERT_SET}
+    RETURNING 1
+),
+removed AS (
+    DELETE FROM invoice_aging_summary s
+    USING dirty d
+    WHERE s.issuer_id = d.issuer_id AND s.receiver_id = d.receiver_id
+      AND NOT EXISTS (
+          SELECT 1 FROM fresh f WHERE f.issuer_id = d.issuer_id AND f.receiver_id = d.receiver_id
+      )
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM dirty) AS dirty,
+       (SELECT count(*) FROM upserted) AS upserted,
+       (SELECT count(*) FROM removed) AS removed
+"""
+
+
+# One indexed round trip on the request path: the summary date and whether
+# the issuer has anything queued. No meta row means no rebuild ran yet.
+REPORT_STATE_SQL = """
+SELECT m.as_of_date,
+       EXISTS (SELECT 1 FROM invoice_aging_dirty d WHERE d.issuer_id = :issuer_id) AS dirty
+FROM invoice_aging_meta m
+WHERE m.id = 1
+"""
+
+ENSURE_META_SQL = "INSERT INTO invoice_aging_meta (id) VALUES (1) ON CONFLICT (id) DO NOTHING"
+SET_META_SQL = "UPDATE invoice_aging_meta SET as_of_date = :as_of, rebuilt_at = now() WHERE id = 1"
+
+
+async def _summary_as_of(db: AsyncSession, lock: str = "") -> Optional[date]:
+    return (await db.execute(
+        text(f"SELECT as_of_date FROM invoice_aging_meta WHERE id = 1 {lock}")
+    )).scalar()
+
+
+async def refresh_aging_summary(db: AsyncSession, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """Bring invoice_aging_summary up to date; run by the scheduled job.
+
+    Buckets shift with the calendar, so the first refresh of a new day
+    rebuilds the whole table in one transaction; otherwise only the
+    (issuer, receiver) pairs queued by the invoice triggers are recomputed.
+    """
+    as_of = as_of or date.today()
+    summary_as_of = await _summary_as_of(db)
+
+    if summary_as_of is None or summary_as_of < as_of:
+        await db.execute(text(ENSURE_META_SQL))
+        # Serializes rebuilds and waits out in-flight folds; readers keep
+        # seeing the old snapshot until the commit
+        summary_as_of = await _summary_as_of(db, "FOR UPDATE")
+        if summary_as_of is None or summary_as_of < as_of:
+            for statement in FULL_REFRESH_SQL:
+                await db.execute(text(statement), {"as_of": as_of})
+            await db.execute(text(SET_META_SQL), {"as_of": as_of})
+            await db.commit()
+            await invalidate_tags(REPORT_TAG)
+            return {"mode": "full", "as_of": as_of}
+
+    summary_as_of = await _summary_as_of(db, "FOR SHARE")
+    result = (await db.execute(
+        text(INCREMENTAL_REFRESH_SQL), {"as_of": summary_as_of, "issuer_id": None}
+    )).mappings().one()
+    await db.commit()
+    if result["dirty"]:
+        await invalidate_tags(REPORT_TAG)
+    return {"mode": "incremental", "as_of": summary_as_of, **result}
+
+
+async def fold_issuer_changes(db: AsyncSession, issuer_id: int) -> Dict[str, Any]:
+    """Recompute the pairs of one issuer queued by the invoice triggers.
+
+    Request-path counterpart of refresh_aging_summary: it never rebuilds,
+    and buckets the changed pairs as of the date the rest of the summary
+    was built for, so a report never mixes two days. The meta row is held
+    FOR SHARE, so a fold waits for a running rebuild and uses its date.
+    """
+    as_of = await _summary_as_of(db, "FOR SHARE")
+    if as_of is None:
+        # Nothing to fold into until the scheduled job builds the summary
+        await db.rollback()
+        return {"mode": "skipped", "as_of": None}
+    result = (await db.execute(
+        text(INCREMENTAL_REFRESH_SQL), {"as_of": as_of, "issuer_id": issuer_id}
+    )).mappings().one()
+    await db.commit()
+    if result["dirty"]:
+        await invalidate_tags(f"{REPORT_TAG}:issuer:{issuer_id}")
+    return {"mode": "incremental", "as_of": as_of, **result}
+
+
+async def get_aging_report(db: AsyncSession, issuer_id: int) -> Dict[str, Any]:
+    """AR aging for one issuer, broken down by receiver.
+
+    Reads the summary date and checks the issuer's dirty queue in one
+    indexed query; only when the issuer has queued changes are they folded
+    into the summary table, which invalidates the issuer's cached report.
+    The daily rebuild is left to the scheduled job (`main`); `as_of_date`
+    is the date the summary was bucketed for.
+    """
+    state = (await db.execute(
+        text(REPORT_STATE_SQL), {"issuer_id": issuer_id}
+    )).mappings().one_or_none()
+    as_of = state["as_of_date"] if state else None
+    if state and state["dirty"]:
+        as_of = (await fold_issuer_changes(db, issuer_id))["as_of"]
+    return await _cached_aging_report(db, issuer_id, as_of or date.today())
+
+
+# Refreshes happen outside the cached function: tag versions are read
+# before the load, so a refresh inside it would store its own result stale
+@cached("ar_aging", ttl=settings.AR_AGING_CACHE_TTL_SECONDS,
+        tags=(REPORT_TAG, REPORT_TAG + ":issuer:{issuer_id}"))
+async def _cached_aging_report(db: AsyncSession, issuer_id: int, as_of: date) -> Dict[str, Any]:
+    rows = (await db.execute(
+        text(f"""
+            SELECT s.receiver_id, u.business_name, u.rfc,
+                   {", ".join("s." + column for column in BUCKETS)},
+                   s.total_outstanding, s.invoice_count, s.as_of_date, s.refreshed_at
+            FROM invoice_aging_summary s
+            JOIN users u ON u.id = s.receiver_id
+            WHERE s.issuer_id = :issuer_id
+            ORDER BY s.total_outstanding DESC
+        """),
+        {"issuer_id": issuer_id},
+    )).mappings().all()
+
+    totals = {column: 0.0 for column in BUCKETS + ("total_outstanding",)}
+    receivers = []
+    for row in rows:
+        receivers.append(dict(row))
+        for column in totals:
+            totals[column] += row[column]
+
+    report = {
+        "issuer_id": issuer_id,
+        "as_of_date": as_of,
+        "refreshed_at": max((row["refreshed_at"] for row in rows), default=None),
+        "totals": totals,
+        "receivers": receivers,
+    }
+    return report
+
+
+async def main():
+    """Entry point for the periodic refresh job (cron or worker beat).
+
+    Schedule it shortly after midnight, for the daily rebuild, and then
+    every few minutes to drain the changes no report has folded in yet.
+    """
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        result = await refresh_aging_summary(db)
+        print(f"AR aging refresh: {result}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
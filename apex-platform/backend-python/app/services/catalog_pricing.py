@@ -0,0 +1,92 @@
+from sqlalchemy import select, update, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Dict, Any
+
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.autopartes import AutoPart, ProductCategory, ProductStatus
+from app.services.product_cache import invalidate_products
+
+LISTED_STATUSES = (ProductStatus.ACTIVE, ProductStatus.OUT_OF_STOCK)
+
+
+async def browse_by_price(
+    db: AsyncSession,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = None,
+    min_margin: Optional[float] = None,
+    descending: bool = False,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Listed parts in a price range ordered by (final_price, id).
+
+    Keyset pagination over the generated final_price column, served by the
+    (final_price, id) and (category, final_price, id) partial indexes.
+    """
+    stmt = select(AutoPart).where(AutoPart.status.in_(LISTED_STATUSES))
+    if min_price is not None:
+        stmt = stmt.where(AutoPart.final_price >= min_price)
+    if max_price is not None:
+        stmt = stmt.where(AutoPart.final_price <= max_price)
+    if category is not None:
+        stmt = stmt.where(AutoPart.category == category)
+    if brand is not None:
+        stmt = stmt.where(AutoPart.brand == brand)
+    if min_margin is not None:
+        stmt = stmt.where(AutoPart.profit_margin >= min_margin)
+
+    values = decode_cursor(cursor, 2)
+    key = tuple_(AutoPart.final_price, AutoPart.id)
+    if values is not None:
+        after = tuple_(float(values[0]), int(values[1]))
+        stmt = stmt.where(key < after if descending else key > after)
+    if descending:
+        stmt = stmt.order_by(AutoPart.final_price.desc(), AutoPart.id.desc())
+    else:
+        stmt = stmt.order_by(AutoPart.final_price, AutoPart.id)
+
+    parts: List[AutoPart] = list((await db.execute(stmt.limit(limit + 1))).scalars().all())
+    next_cursor = None
+    if len(parts) > limit:
+        parts = parts[:limit]
+        next_cursor = encode_cursor([parts[-1].final_price, parts[-1].id])
+    return {"items": parts, "next_cursor": next_cursor}
+
+
+async def set_discount(
+    db: AsyncSession,
+    discount_percentage: float,
+    brand: Optional[str] = None,
+    category: Optional[ProductCategory] = None,
+    supplier_id: Optional[int] = None,
+) -> int:
+    """Set discount_percentage for every part matching the filters in one UPDATE.
+
+    final_price and profit_margin follow automatically; cached product
+    payloads of the affected SKUs are invalidated. Returns parts changed.
+    """
+    if not 0 <= discount_percentage < 100:
+        raise ValueError("Discount percentage must be between 0 and 100")
+    if brand is None and category is None and supplier_id is None:
+        raise ValueError("Repricing needs at least one of brand, category or supplier")
+
+    stmt = (
+        update(AutoPart)
+        .where(AutoPart.discount_percentage != discount_percentage)
+        .values(discount_percentage=discount_percentage)
+        .returning(AutoPart.sku)
+        .execution_options(synchronize_session=False)
+    )
+    if brand is not None:
+        stmt = stmt.where(AutoPart.brand == brand)
+    if category is not None:
+        stmt = stmt.where(AutoPart.category == category)
+    if supplier_id is not None:
+        stmt = stmt.where(AutoPart.supplier_id == supplier_id)
+
+    skus = (await db.execute(stmt)).scalars().all()
+    await db.commit()
+    await invalidate_products(skus)
+    return len(skus)
@@ -0,0 +1,213 @@
+from sqlalchemy import select, union, func, or_, tuple_, literal, literal_column, cast, Integer, Float
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.autopartes import AutoPart, ProductCategory, ProductCondition, ProductStatus
+
+MIN_QUERY_LENGTH = 2
+
+TS_CONFIG = literal_column("'spanish'::regconfig")
+LISTED_STATUSES = (ProductStatus.ACTIVE, ProductStatus.OUT_OF_STOCK)
+
+# Price range facet edges in MXN, on the discounted price
+PRICE_EDGES = (200.0, 500.0, 1000.0, 2500.0, 5000.0)
+PRICE_LABELS = ("0-200", "200-500", "500-1000", "1000-2500", "2500-5000", "5000+")
+BRAND_FACET_LIMIT = 25
+
+# Ranking: text relevance plus part-number similarity, boosted by popularity
+NUMBER_MATCH_WEIGHT = 2.0
+BESTSELLER_BOOST = 0.25
+RATING_BOOST = 0.1  # Per rating star
+
+_facet_cache = TTLCache(
+    maxsize=settings.CATALOG_FACET_CACHE_MAX_ENTRIES,
+    ttl=settings.CATALOG_FACET_CACHE_TTL_SECONDS,
+)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _number_match(column, query: str, prefix: str):
+    """Trigram similarity or prefix match, both served by gin_trgm_ops."""
+    return or_(column.op("%")(query), column.ilike(prefix, escape="\\"))
+
+
+def _matching_ids(query: str, tsquery):
+    """Union of parts matched by full text or by part/OEM number.
+
+    Each branch is a separate indexable predicate so Postgres can use the
+    tsvector and trigram GIN indexes instead of scanning the catalog.
+    """
+    prefix = f"{_escape_like(query)}%"
+    by_text = select(AutoPart.id.label("id")).where(AutoPart.search_vector.op("@@")(tsquery))
+    by_number = select(AutoPart.id.label("id")).where(_number_match(AutoPart.part_number, query, prefix))
+    by_oem = select(AutoPart.id.label("id")).where(_number_match(AutoPart.oem_number, query, prefix))
+    return union(by_text, by_number, by_oem).subquery("matches")
+
+
+def _filters(
+    category: Optional[ProductCategory],
+    brand: Optional[str],
+    condition: Optional[ProductCondition],
+    min_price: Optional[float],
+    max_price: Optional[float],
+) -> list:
+    clauses = [AutoPart.status.in_(LISTED_STATUSES)]
+    if category is not None:
+        clauses.append(AutoPart.category == category)
+    if brand is not None:
+        clauses.append(func.lower(AutoPart.brand) == brand.lower())
+    if condition is not None:
+        clauses.append(AutoPart.condition == condition)
+    if min_price is not None:
+        clauses.append(AutoPart.final_price >= min_price)
+    if max_price is not None:
+        clauses.append(AutoPart.final_price <= max_price)
+    return clauses
+
+
+def _score(query: str, tsquery):
+    relevance = func.ts_rank_cd(AutoPart.search_vector, tsquery, 32) + NUMBER_MATCH_WEIGHT * func.greatest(
+        func.coalesce(func.similarity(AutoPart.part_number, query), 0.0),
+        func.coalesce(func.similarity(AutoPart.oem_number, query), 0.0),
+    )
+    boost = (1 + BESTSELLER_BOOST * cast(AutoPart.is_bestseller, Integer)) * (1 + RATING_BOOST * AutoPart.rating_average)
+    return cast(relevance * boost, Float)
+
+
+async def _facets(db: AsyncSession, matches, clauses: list) -> Dict[str, Any]:
+    """Facet counts over the whole filtered match set in one grouping-sets query."""
+    price_bucket = func.width_bucket(AutoPart.final_price, cast(literal(list(PRICE_EDGES)), ARRAY(Float))).label("price_bucket")
+    stmt = (
+        select(
+            AutoPart.category,
+            AutoPart.brand,
+            AutoPart.condition,
+            price_bucket,
+            func.grouping(AutoPart.category, AutoPart.brand, AutoPart.condition, price_bucket).label("grouping"),
+            func.count().label("count"),
+        )
+        .join(matches, matches.c.id == AutoPart.id)
+        .where(*clauses)
+        .group_by(func.grouping_sets(
+            tuple_(AutoPart.category), tuple_(AutoPart.brand), tuple_(AutoPart.condition), tuple_(price_bucket), tuple_(),
+        ))
+    )
+    rows = (await db.execute(stmt)).all()
+
+    # grouping() has a bit set for every column not in the row's grouping set
+    facets: Dict[str, Any] = {"total": 0, "category": [], "brand": [], "condition": [], "price_range": []}
+    for row in rows:
+        if row.grouping == 0b1111:
+            facets["total"] = row.count
+        elif row.grouping == 0b0111:
+            facets["category"].append({"value": row.category.value, "count": row.count})
+        elif row.grouping == 0b1011:
+            facets["brand"].append({"value": row.brand, "count": row.count})
+        elif row.grouping == 0b1101:
+            facets["condition"].append({"value": row.condition.value, "count": row.count})
+        elif row.grouping == 0b1110:
+            facets["price_range"].append({"value": PRICE_LABELS[row.price_bucket], "count": row.count})
+
+    for name in ("category", "brand", "condition"):
+        facets[name].sort(key=lambda item: (-item["count"], item["value"]))
+    facets["brand"] = facets["brand"][:BRAND_FACET_LIMIT]
+    facets["price_range"].sort(key=lambda item: PRICE_LABELS.index(item["value"]))
+    return facets
+
+
+async def search_catalog(
+    db: AsyncSession,
+    query: str,
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = None,
+    condition: Optional[ProductCondition] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Ranked catalog search with facet counts.
+
+    Matches Spanish full text over name, brand, keywords and description,
+    plus fuzzy part and OEM numbers. Results are ordered by (score desc,
+    id desc) with an opaque keyset cursor. Facets for the same query and
+    filters are cached, so paging does not recount them.
+    """
+    query = " ".join(query.split())
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(f"Search query must have at least {MIN_QUERY_LENGTH} characters")
+
+    after: Optional[Tuple[float, int]] = None
+    values = decode_cursor(cursor, 2)
+    if values is not None:
+        after = (float(values[0]), int(values[1]))
+
+    # The threshold applies to the % operator for this transaction only
+    await db.execute(
+        select(func.set_config(
+            "pg_trgm.similarity_threshold",
+            str(settings.CATALOG_SEARCH_SIMILARITY_THRESHOLD),
+            True,
+        ))
+    )
+
+    tsquery = func.websearch_to_tsquery(TS_CONFIG, query)
+    matches = _matching_ids(query, tsquery)
+    clauses = _filters(category, brand, condition, min_price, max_price)
+
+    ranked = (
+        select(
+            AutoPart.id,
+            AutoPart.sku,
+            AutoPart.part_number,
+            AutoPart.name,
+            AutoPart.category,
+            AutoPart.brand,
+            AutoPart.selling_price,
+            AutoPart.discount_percentage,
+            AutoPart.final_price,
+            AutoPart.available_quantity,
+            AutoPart.status,
+            AutoPart.primary_image_url,
+            _score(query, tsquery).label("score"),
+        )
+        .join(matches, matches.c.id == AutoPart.id)
+        .where(*clauses)
+        .subquery("ranked")
+    )
+    stmt = select(ranked)
+    if after is not None:
+        stmt = stmt.where(tuple_(ranked.c.score, ranked.c.id) < tuple_(after[0], after[1]))
+    stmt = stmt.order_by(ranked.c.score.desc(), ranked.c.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).mappings().all()
+    items: List[Dict[str, Any]] = [dict(row) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([float(last["score"]), last["id"]])
+
+    signature = (
+        query.lower(),
+        category, brand.lower() if brand else None, condition, min_price, max_price,
+    )
+    facets = _facet_cache.get(signature)
+    if facets is None:
+        facets = await _facets(db, matches, clauses)
+        _facet_cache.set(signature, facets)
+
+    return {"items": items, "next_cursor": next_cursor, "facets": facets}
+
+
+def clear_facet_cache():
+    """Drop cached facet counts, e.g. after bulk catalog changes."""
+    _facet_cache.clear()
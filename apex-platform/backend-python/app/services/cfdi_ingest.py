@@ -0,0 +1,309 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from io import BytesIO
+from typing import Optional, List, Dict, Any, Iterator, Tuple, BinaryIO
+import asyncio
+import time
+import zipfile
+from zoneinfo import ZoneInfo
+
+from lxml import etree
+
+from app.core.config import settings
+from app.core.executors import get_process_pool
+from app.models.invoice import Invoice, InvoiceStatus, PaymentTerms, CFDIUse
+from app.models.user import User
+
+MAX_REPORTED_ERRORS = 500  # Keep the report bounded for very broken archives
+IN_FLIGHT_BATCHES = 4  # Parsed batches queued ahead of the database writer
+CFDI_TIMEZONE = ZoneInfo("America/Mexico_City")  # Fecha carries no offset
+
+
+@dataclass
+class IngestReport:
+    files_total: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    failed: int = 0
+    # Files rejected because no account has the issuer's RFC; also in `failed`
+    unknown_issuer: int = 0
+    unknown_issuer_rfcs: List[str] = field(default_factory=list)
+    errors: List[Dict[str, str]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        if self.elapsed_seconds == 0:
+            return 0.0
+        return self.files_total / self.elapsed_seconds
+
+    def add_error(self, filename: str, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"file": filename, "error": message})
+
+    def add_unknown_issuer(self, filename: str, rfc: str):
+        self.unknown_issuer += 1
+        if rfc not in self.unknown_issuer_rfcs and len(self.unknown_issuer_rfcs) < MAX_REPORTED_ERRORS:
+            self.unknown_issuer_rfcs.append(rfc)
+        self.add_error(filename, f"unknown issuer RFC {rfc}")
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "files_total": self.files_total,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "failed": self.failed,
+            "unknown_issuer": self.unknown_issuer,
+            "unknown_issuer_rfcs": self.unknown_issuer_rfcs,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "files_per_second": round(self.files_per_second, 1),
+        }
+
+
+def _local(tag) -> str:
+    return etree.QName(tag).localname
+
+
+def _float(value: Optional[str], default: float = 0.0) -> float:
+    return float(value) if value not in (None, "") else default
+
+
+def parse_cfdi(content: bytes) -> Dict[str, Any]:
+    """Extract invoice fields from one CFDI 3.3/4.0 document with iterparse.
+
+    Namespaces are matched by local name so both CFDI versions are accepted.
+    Elements are cleared as soon as their attributes are read.
+    """
+    data: Dict[str, Any] = {"items": []}
+    context = etree.iterparse(
+        BytesIO(content),
+        events=("end",),
+        resolve_entities=False,
+        no_network=True,
+    )
+    for _, element in context:
+        name = _local(element.tag)
+        attrs = element.attrib
+        if name == "Comprobante":
+            data.update(
+                series=attrs.get("Serie"),
+                folio=attrs.get("Folio"),
+                issue_date=attrs.get("Fecha"),
+                subtotal=_float(attrs.get("SubTotal")),
+                discount_amount=_float(attrs.get("Descuento")),
+                total=_float(attrs.get("Total")),
+                currency=attrs.get("Moneda", "MXN"),
+                exchange_rate=_float(attrs.get("TipoCambio"), 1.0),
+                payment_form=attrs.get("FormaPago", "99"),
+                payment_method=attrs.get("MetodoPago", "PUE"),
+            )
+        elif name == "Emisor":
+            data["issuer_rfc"] = attrs.get("Rfc")
+        elif name == "Receptor":
+            data["receiver_rfc"] = attrs.get("Rfc")
+            data["cfdi_use"] = attrs.get("UsoCFDI")
+        elif name == "Concepto":
+            data["items"].append({
+                "clave_prod_serv": attrs.get("ClaveProdServ"),
+                "cantidad": _float(attrs.get("Cantidad")),
+                "clave_unidad": attrs.get("ClaveUnidad"),
+                "descripcion": attrs.get("Descripcion"),
+                "valor_unitario": _float(attrs.get("ValorUnitario")),
+                "importe": _float(attrs.get("Importe")),
+            })
+        elif name == "Impuestos" and "TotalImpuestosTrasladados" in attrs:
+            # Only the document-level Impuestos node carries the total
+            data["tax_amount"] = _float(attrs.get("TotalImpuestosTrasladados"))
+        elif name == "TimbreFiscalDigital":
+            data["cfdi_uuid"] = (attrs.get("UUID") or "").upper() or None
+        element.clear()
+    del context
+
+    for required in ("total", "issuer_rfc", "cfdi_uuid", "issue_date"):
+        if not data.get(required):
+            raise ValueError(f"missing {required}")
+    return data
+
+
+def parse_batch(batch: List[Tuple[str, bytes]]) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """Process-pool entry point: parse a batch of (filename, xml bytes)."""
+    results = []
+    for filename, content in batch:
+        try:
+            results.append((filename, parse_cfdi(content), None))
+        except (etree.XMLSyntaxError, ValueError) as exc:
+            results.append((filename, None, str(exc) or exc.__class__.__name__))
+    return results
+
+
+def iter_archive_batches(
+    archive: BinaryIO,
+    batch_size: int,
+    report: IngestReport,
+) -> Iterator[List[Tuple[str, bytes]]]:
+    """Yield (filename, bytes) batches straight from the zip, never extracting to disk."""
+    with zipfile.ZipFile(archive) as zf:
+        batch: List[Tuple[str, bytes]] = []
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".xml"):
+                continue
+            report.files_total += 1
+            if info.file_size > settings.CFDI_MAX_XML_BYTES:
+                report.add_error(info.filename, "file too large")
+                continue
+            batch.append((info.filename, zf.read(info)))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def _to_row(data: Dict[str, Any], issuer_id: int, receiver_id: int) -> Dict[str, Any]:
+    issue_date = datetime.fromisoformat(data["issue_date"])
+    if issue_date.tzinfo is None:
+        issue_date = issue_date.replace(tzinfo=CFDI_TIMEZONE)
+    paid_in_one = data["payment_method"] == "PUE"
+    try:
+        cfdi_use = CFDIUse(data.get("cfdi_use"))
+    except ValueError:
+        cfdi_use = CFDIUse.GASTOS_GENERALES
+    return {
+        "invoice_number": f"CFDI-{data['cfdi_uuid']}",
+        "folio": (data.get("folio") or None) and data["folio"][:20],
+        "series": (data.get("series") or None) and data["series"][:10],
+        "issuer_id": issuer_id,
+        "receiver_id": receiver_id,
+        "subtotal": data["subtotal"],
+        "tax_amount": data.get("tax_amount", 0.0),
+        "discount_amount": data["discount_amount"],
+        "total": data["total"],
+        "currency": data["currency"][:3],
+        "exchange_rate": data["exchange_rate"],
+        "status": InvoiceStatus.PAID if paid_in_one else InvoiceStatus.SENT,
+        "issue_date": issue_date,
+        "due_date": issue_date if paid_in_one else issue_date + timedelta(days=30),
+        "paid_date": issue_date if paid_in_one else None,
+        "payment_terms": PaymentTerms.IMMEDIATE if paid_in_one else PaymentTerms.NET_30,
+        "payment_method": data["payment_method"][:10],
+        "payment_form": data["payment_form"][:10],
+        "cfdi_uuid": data["cfdi_uuid"],
+        "cfdi_use": cfdi_use,
+        "cfdi_status": "issued",
+        "items": data["items"],
+    }
+
+
+async def _write_batch(
+    db: AsyncSession,
+    parsed: List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]],
+    receiver: User,
+    report: IngestReport,
+):
+    """Dedupe a parsed batch against itself and the database, then upsert it.
+
+    Earlier batches are committed before the next one is checked, so the
+    database lookup also catches duplicates elsewhere in the same archive.
+    """
+    candidates: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    for filename, data, error in parsed:
+        if error is not None:
+            report.add_error(filename, error)
+            continue
+        if receiver.rfc and data.get("receiver_rfc") and data["receiver_rfc"] != receiver.rfc:
+            report.add_error(filename, "receiver RFC does not match account")
+            continue
+        uuid = data["cfdi_uuid"]
+        if uuid in candidates:
+            report.duplicates += 1
+            continue
+        candidates[uuid] = (filename, data)
+    if not candidates:
+        return
+
+    # One round-trip each for the existence check and the issuer lookup
+    existing = await db.execute(
+        select(Invoice.cfdi_uuid).where(Invoice.cfdi_uuid.in_(list(candidates)))
+    )
+    for (uuid,) in existing:
+        candidates.pop(uuid, None)
+        report.duplicates += 1
+
+    rfcs = {data["issuer_rfc"] for _, data in candidates.values()}
+    issuers = dict((await db.execute(select(User.rfc, User.id).where(User.rfc.in_(rfcs)))).all())
+
+    rows = []
+    for uuid, (filename, data) in candidates.items():
+        issuer_id = issuers.get(data["issuer_rfc"])
+        if issuer_id is None:
+            report.add_unknown_issuer(filename, data["issuer_rfc"])
+            continue
+        try:
+            rows.append(_to_row(data, issuer_id, receiver.id))
+        except (ValueError, KeyError) as exc:
+            report.add_error(filename, f"invalid field: {exc}")
+            continue
+    if not rows:
+        return
+
+    stmt = insert(Invoice).values(rows).on_conflict_do_nothing(index_elements=["cfdi_uuid"])
+    result = await db.execute(stmt.returning(Invoice.id))
+    inserted = len(result.all())
+    report.inserted += inserted
+    report.duplicates += len(rows) - inserted
+    await db.commit()
+
+
+async def ingest_cfdi_archive(
+    db: AsyncSession,
+    archive: BinaryIO,
+    receiver: User,
+    batch_size: Optional[int] = None,
+) -> IngestReport:
+    """Register every CFDI XML in a zip archive as an Invoice received by `receiver`.
+
+    Members are read one batch at a time and parsed in the shared process
+    pool while earlier batches are written, with at most IN_FLIGHT_BATCHES
+    outstanding, so memory stays flat regardless of archive size.
+
+    Invoices always reference a registered issuer, so a CFDI whose emisor
+    RFC matches no account is not imported: it is counted as failed and
+    under `unknown_issuer`, with the RFC listed in `unknown_issuer_rfcs`
+    so the supplier can be registered and the archive uploaded again.
+    """
+    batch_size = batch_size or settings.CFDI_INGEST_BATCH_SIZE
+    report = IngestReport()
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+
+    batches = iter_archive_batches(archive, batch_size, report)
+    pending: List[asyncio.Future] = []
+
+    def next_batch():
+        return next(batches, None)
+
+    try:
+        while True:
+            while len(pending) < IN_FLIGHT_BATCHES:
+                batch = await loop.run_in_executor(None, next_batch)
+                if batch is None:
+                    break
+                pending.append(loop.run_in_executor(pool, parse_batch, batch))
+            if not pending:
+                break
+            parsed = await pending.pop(0)
+            await _write_batch(db, parsed, receiver, report)
+    except zipfile.BadZipFile:
+        raise ValueError("Uploaded file is not a valid zip archive")
+    finally:
+        for future in pending:
+            future.cancel()
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
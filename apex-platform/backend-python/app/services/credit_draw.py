@@ -0,0 +1,202 @@
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, asdict
+from typing import Optional, Dict, Any
+import uuid
+
+from app.services.realtime import make_update, publish_updates
+
+
+class DrawRejection:
+    INVALID_AMOUNT = "invalid_amount"
+    NOT_FOUND = "credit_line_not_found"
+    NOT_ACTIVE = "credit_line_not_active"
+    OVERDUE = "credit_line_overdue"
+    INSUFFICIENT_AVAILABLE = "insufficient_available_amount"
+    WALLET_UNAVAILABLE = "wallet_unavailable"
+    DUPLICATE = "duplicate_request"
+
+
+# The whole draw as one statement. `line` only updates when every
+# CreditLine.can_draw condition holds on the latest row version (the row
+# lock serializes concurrent draws, which re-check available_amount);
+# `wallet` and `tx` only act if `line` did. `state` reads the pre-statement
+# snapshot so rejections can be explained without another round-trip.
+DRAW_SQL = """
+WITH state AS (
+    SELECT cl.id, cl.status, cl.available_amount, cl.days_past_due,
+           EXISTS (SELECT 1 FROM wallets w WHERE w.user_id = :user_id AND w.status = 'ACTIVE') AS has_wallet
+    FROM credit_lines cl
+    WHERE cl.id = :credit_line_id AND cl.user_id = :user_id
+),
+line AS (
+    UPDATE credit_lines
+    SET used_amount = used_amount + :amount,
+        available_amount = GREATEST(0, current_limit - (used_amount + :amount)),
+        updated_at = now()
+    WHERE id = :credit_line_id
+      AND user_id = :user_id
+      AND status = 'ACTIVE'
+      AND available_amount >= :amount
+      AND days_past_due = 0
+      AND EXISTS (SELECT 1 FROM wallets w WHERE w.user_id = :user_id AND w.status = 'ACTIVE')
+    RETURNING id, user_id, used_amount, available_amount
+),
+wallet AS (
+    UPDATE wallets
+    SET used_credit = used_credit + :amount,
+        available_credit = GREATEST(0, credit_limit - (used_credit + :amount)),
+        last_transaction_at = now(),
+        updated_at = now()
+    WHERE id = (
+        SELECT id FROM wallets
+        WHERE user_id = :user_id AND status = 'ACTIVE'
+        ORDER BY id
+        LIMIT 1
+    )
+      AND EXISTS (SELECT 1 FROM line)
+    RETURNING id, used_credit, available_credit
+),
+tx AS (
+    INSERT INTO transactions (
+        user_id, wallet_id, transaction_id, type, status,
+        amount, fee, net_amount, currency, exchange_rate,
+        payment_method, credit_line_id, description, processed_at, retry_count
+    )
+    SELECT line.user_id, wallet.id, :transaction_id, 'CREDIT', 'COMPLETED',
+           :amount, 0, :amount, 'MXN', 1,
+           'CREDIT', line.id, :description, now(), 0
+    FROM line, wallet
+    RETURNING id, transaction_id
+)
+SELECT state.status, state.available_amount AS previous_available, state.days_past_due, state.has_wallet,
+       line.used_amount, line.available_amount,
+       wallet.id AS wallet_id, wallet.used_credit AS wallet_used_credit,
+       wallet.available_credit AS wallet_available_credit,
+       tx.id AS transaction_pk, tx.transaction_id
+FROM (SELECT 1) AS one
+LEFT JOIN state ON true
+LEFT JOIN line ON true
+LEFT JOIN wallet ON true
+LEFT JOIN tx ON true
+"""
+
+
+# The transaction a replayed idempotency key produced, with the line and
+# wallet as they are now
+REPLAY_SQL = """
+SELECT t.transaction_id, t.amount, t.credit_line_id,
+       cl.used_amount, cl.available_amount, w.available_credit AS wallet_available_credit
+FROM transactions t
+JOIN credit_lines cl ON cl.id = t.credit_line_id
+LEFT JOIN wallets w ON w.id = t.wallet_id
+WHERE t.transaction_id = :transaction_id
+  AND t.user_id = :user_id
+  AND t.type = 'CREDIT'
+"""
+
+
+@dataclass
+class DrawResult:
+    accepted: bool
+    credit_line_id: int
+    amount: float
+    reason: Optional[str] = None
+    transaction_id: Optional[str] = None
+    used_amount: Optional[float] = None
+    available_amount: Optional[float] = None
+    wallet_available_credit: Optional[float] = None
+    replayed: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _rejection_reason(row) -> str:
+    """Explain a rejected draw from the pre-statement snapshot of the line."""
+    if row is None or row.status is None:
+        return DrawRejection.NOT_FOUND
+    if row.status != "ACTIVE":
+        return DrawRejection.NOT_ACTIVE
+    if row.days_past_due > 0:
+        return DrawRejection.OVERDUE
+    if not row.has_wallet:
+        return DrawRejection.WALLET_UNAVAILABLE
+    # Either short on the snapshot or a concurrent draw got there first
+    return DrawRejection.INSUFFICIENT_AVAILABLE
+
+
+async def _replay(db: AsyncSession, result: DrawResult, user_id: int, transaction_id: str) -> DrawResult:
+    row = (await db.execute(
+        text(REPLAY_SQL), {"transaction_id": transaction_id, "user_id": user_id}
+    )).one_or_none()
+    await db.rollback()
+    if row is None or row.credit_line_id != result.credit_line_id or abs(row.amount - result.amount) >= 0.005:
+        result.reason = DrawRejection.DUPLICATE
+        return result
+    result.accepted = True
+    result.replayed = True
+    result.transaction_id = row.transaction_id
+    result.used_amount = row.used_amount
+    result.available_amount = row.available_amount
+    result.wallet_available_credit = row.wallet_available_credit
+    return result
+
+
+async def draw_credit(
+    db: AsyncSession,
+    user_id: int,
+    credit_line_id: int,
+    amount: float,
+    description: Optional[str] = None,
+    transaction_id: Optional[str] = None,
+) -> DrawResult:
+    """Atomically draw `amount` from a credit line into the user's wallet credit.
+
+    Checks, the credit line and wallet updates and the CREDIT transaction
+    insert happen in a single round-trip; a rejected draw changes nothing.
+    Passing a stable transaction_id makes retries idempotent: a replay of
+    the same draw returns the original transaction (with `replayed` set)
+    instead of drawing again, and reusing the id for a different draw is
+    rejected as a duplicate.
+    """
+    result = DrawResult(accepted=False, credit_line_id=credit_line_id, amount=amount)
+    if amount <= 0:
+        result.reason = DrawRejection.INVALID_AMOUNT
+        return result
+
+    params = {
+        "user_id": user_id,
+        "credit_line_id": credit_line_id,
+        "amount": amount,
+        "description": description or "Disposición de línea de crédito",
+        "transaction_id": transaction_id or f"CRD-{uuid.uuid4().hex[:24].upper()}",
+    }
+    try:
+        row = (await db.execute(text(DRAW_SQL), params)).one_or_none()
+    except IntegrityError:
+        await db.rollback()
+        if transaction_id is not None:
+            return await _replay(db, result, user_id, transaction_id)
+        result.reason = DrawRejection.DUPLICATE
+        return result
+
+    if row is None or row.transaction_id is None:
+        await db.rollback()
+        result.reason = _rejection_reason(row)
+        return result
+
+    await db.commit()
+    result.accepted = True
+    result.transaction_id = row.transaction_id
+    result.used_amount = row.used_amount
+    result.available_amount = row.available_amount
+    result.wallet_available_credit = row.wallet_available_credit
+    await publish_updates([
+        (user_id, make_update("wallet", row.wallet_id, used_credit=row.wallet_used_credit,
+                              available_credit=row.wallet_available_credit)),
+        (user_id, make_update("transaction", row.transaction_pk, status="completed",
+                              transaction_id=row.transaction_id, amount=amount)),
+    ])
+    return result
@@ -0,0 +1,245 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+import asyncio
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.executors import get_process_pool
+from app.services.watermarks import get_watermark, set_watermark
+
+WATERMARK_NAME = "credit_scoring"
+IN_FLIGHT_BATCHES = 4  # Batches being scored while earlier ones are written
+
+SCORE_MIN = 300
+SCORE_MAX = 850
+SCORE_BASE = 650
+
+FEATURE_COLUMNS = (
+    "user_id", "monthly_income", "tx_count", "failed_count", "inflow", "outflow",
+    "credit_payments", "limit_total", "used_total", "max_days_past_due",
+    "late_payments", "defaulted_lines", "scheduled_debt",
+)
+
+# Users with any transaction or credit line change in (since, until]
+CHANGED_USERS_SQL = """
+    SELECT user_id FROM transactions
+    WHERE (created_at > :since AND created_at <= :until)
+       OR (updated_at > :since AND updated_at <= :until)
+    UNION
+    SELECT user_id FROM credit_lines
+    WHERE (created_at > :since AND created_at <= :until)
+       OR (updated_at > :since AND updated_at <= :until)
+"""
+
+ALL_USERS_SQL = "SELECT id FROM users WHERE id > :after ORDER BY id LIMIT :limit"
+
+FEATURES_SQL = """
+WITH u AS (
+    SELECT id, monthly_income FROM users WHERE id = ANY(:ids)
+),
+tx AS (
+    SELECT user_id,
+           count(*) AS tx_count,
+           count(*) FILTER (WHERE status = 'FAILED') AS failed_count,
+           coalesce(sum(amount) FILTER (WHERE status = 'COMPLETED'
+                    AND type IN ('DEPOSIT', 'CASHBACK', 'REFUND', 'FACTORING')), 0) AS inflow,
+           coalesce(sum(amount) FILTER (WHERE status = 'COMPLETED'
+                    AND type IN ('WITHDRAWAL', 'PAYMENT', 'TRANSFER', 'FEE')), 0) AS outflow,
+           count(*) FILTER (WHERE status = 'COMPLETED' AND type = 'CREDIT_PAYMENT') AS credit_payments
+    FROM transactions
+    WHERE user_id = ANY(:ids) AND created_at >= :lookback
+    GROUP BY user_id
+),
+cl AS (
+    SELECT user_id,
+           sum(current_limit) FILTER (WHERE status IN ('ACTIVE', 'SUSPENDED')) AS limit_total,
+           sum(used_amount) FILTER (WHERE status IN ('ACTIVE', 'SUSPENDED')) AS used_total,
+           max(days_past_due) AS max_days_past_due,
+           sum(late_payment_count) AS late_payments,
+           count(*) FILTER (WHERE status = 'DEFAULTED') AS defaulted_lines,
+           sum(next_payment_amount) FILTER (WHERE status IN ('ACTIVE', 'SUSPENDED')) AS scheduled_debt
+    FROM credit_lines
+    WHERE user_id = ANY(:ids)
+    GROUP BY user_id
+)
+SELECT u.id AS user_id, u.monthly_income,
+       coalesce(tx.tx_count, 0), coalesce(tx.failed_count, 0),
+       coalesce(tx.inflow, 0), coalesce(tx.outflow, 0), coalesce(tx.credit_payments, 0),
+       coalesce(cl.limit_total, 0), coalesce(cl.used_total, 0), coalesce(cl.max_days_past_due, 0),
+       coalesce(cl.late_payments, 0), coalesce(cl.defaulted_lines, 0), coalesce(cl.scheduled_debt, 0)
+FROM u
+LEFT JOIN tx ON tx.user_id = u.id
+LEFT JOIN cl ON cl.user_id = u.id
+"""
+
+WRITE_SCORES_SQL = """
+    UPDATE users u
+    SET credit_score = s.score, updated_at = now()
+    FROM unnest(CAST(:ids AS integer[]), CAST(:scores AS integer[])) AS s(id, score)
+    WHERE u.id = s.id AND u.credit_score IS DISTINCT FROM s.score
+"""
+
+
+def score_features(features: Dict[str, np.ndarray]) -> np.ndarray:
+    """Behavioural points model over feature columns; returns integer scores.
+
+    Runs in the process pool on whole batches, so every rule is a NumPy
+    expression over all users in the batch.
+    """
+    f = {name: np.asarray(values, dtype=np.float64) for name, values in features.items()}
+    score = np.full(len(f["user_id"]), float(SCORE_BASE))
+
+    # Payment history dominates
+    score -= 25 * np.minimum(f["late_payments"], 6)
+    score -= np.select(
+        [f["max_days_past_due"] > 90, f["max_days_past_due"] > 30, f["max_days_past_due"] > 0],
+        [200, 100, 30],
+        default=0,
+    )
+    score -= 150 * (f["defaulted_lines"] > 0)
+    score += 4 * np.minimum(f["credit_payments"], 12)
+
+    # Utilization of open credit
+    utilization = np.divide(f["used_total"], f["limit_total"], out=np.zeros_like(f["used_total"]), where=f["limit_total"] > 0)
+    has_credit = f["limit_total"] > 0
+    score += np.where(has_credit, np.select(
+        [utilization < 0.3, utilization < 0.5, utilization < 0.8],
+        [50, 15, -30],
+        default=-70,
+    ), 0)
+
+    # Debt-to-income on scheduled credit payments
+    dti = np.divide(f["scheduled_debt"], f["monthly_income"], out=np.zeros_like(f["scheduled_debt"]), where=f["monthly_income"] > 0)
+    score -= 120 * np.clip((dti - 0.35) / 0.65, 0, 1)
+    score -= 40 * ((f["monthly_income"] <= 0) & has_credit)
+
+    # Account activity and cash flow
+    score += 30 * np.minimum(f["tx_count"], 100) / 100
+    failed_ratio = np.divide(f["failed_count"], f["tx_count"], out=np.zeros_like(f["tx_count"]), where=f["tx_count"] > 0)
+    score -= 80 * failed_ratio
+    score += np.where(f["inflow"] > f["outflow"], 25, 0)
+
+    return np.clip(np.rint(score), SCORE_MIN, SCORE_MAX).astype(np.int32)
+
+
+def _columnar(rows) -> Dict[str, np.ndarray]:
+    if not rows:
+        return {name: np.empty(0) for name in FEATURE_COLUMNS}
+    columns = list(zip(*rows))
+    return {
+        name: np.asarray(values, dtype=np.int64 if name == "user_id" else np.float64)
+        for name, values in zip(FEATURE_COLUMNS, columns)
+    }
+
+
+@dataclass
+class ScoringReport:
+    mode: str
+    users_scored: int = 0
+    scores_changed: int = 0
+    batches: int = 0
+    watermark: Optional[datetime] = None
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "users_scored": self.users_scored,
+            "scores_changed": self.scores_changed,
+            "batches": self.batches,
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "users_per_second": round(self.users_scored / self.elapsed_seconds, 1) if self.elapsed_seconds else 0.0,
+        }
+
+
+async def _user_batches(db: AsyncSession, full: bool, since: Optional[datetime], until: datetime, batch_size: int):
+    """Yield lists of user ids to score: every user, or those changed in the window."""
+    if full:
+        after = 0
+        while True:
+            ids = (await db.execute(text(ALL_USERS_SQL), {"after": after, "limit": batch_size})).scalars().all()
+            if not ids:
+                return
+            yield list(ids)
+            after = ids[-1]
+    else:
+        ids = (await db.execute(text(CHANGED_USERS_SQL), {"since": since, "until": until})).scalars().all()
+        for start in range(0, len(ids), batch_size):
+            yield list(ids[start:start + batch_size])
+
+
+async def _write_scores(db: AsyncSession, user_ids: np.ndarray, scores: np.ndarray) -> int:
+    result = await db.execute(
+        text(WRITE_SCORES_SQL), {"ids": user_ids.tolist(), "scores": scores.tolist()}
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def run_credit_scoring(
+    db: AsyncSession,
+    full: bool = False,
+    batch_size: Optional[int] = None,
+) -> ScoringReport:
+    """Recompute User.credit_score for changed users (or everyone with full=True).
+
+    Feature extraction is set-based per batch of user ids, scoring happens
+    in the shared process pool, and results are written back with one
+    UPDATE ... FROM unnest(...) per batch. The watermark only advances after
+    every batch of the run is written.
+    """
+    batch_size = batch_size or settings.CREDIT_SCORING_BATCH_SIZE
+    report = ScoringReport(mode="full" if full else "incremental")
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+
+    until = datetime.now(timezone.utc)
+    watermark = await get_watermark(db, WATERMARK_NAME)
+    since = None
+    if watermark is not None:
+        since = watermark - timedelta(seconds=settings.CREDIT_SCORING_WATERMARK_OVERLAP_SECONDS)
+    lookback = until - timedelta(days=settings.CREDIT_SCORING_LOOKBACK_DAYS)
+
+    pending: List[tuple] = []
+
+    async def drain_one():
+        user_ids, future = pending.pop(0)
+        scores = await future
+        report.scores_changed += await _write_scores(db, user_ids, scores)
+        report.users_scored += len(user_ids)
+        report.batches += 1
+
+    async for user_ids in _user_batches(db, full or watermark is None, since, until, batch_size):
+        rows = (await db.execute(text(FEATURES_SQL), {"ids": user_ids, "lookback": lookback})).all()
+        features = _columnar(rows)
+        pending.append((features["user_id"], loop.run_in_executor(pool, score_features, features)))
+        if len(pending) >= IN_FLIGHT_BATCHES:
+            await drain_one()
+    while pending:
+        await drain_one()
+
+    await set_watermark(db, WATERMARK_NAME, until)
+    await db.commit()
+    report.watermark = until
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def main(full: bool = False):
+    """Entry point for the scheduled scoring job."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        report = await run_credit_scoring(db, full=full)
+        print(f"Credit scoring: {report.as_dict()}")
+
+
+if __name__ == "__main__":
+    import sys
+    asyncio.run(main(full="--full" in sys.argv))
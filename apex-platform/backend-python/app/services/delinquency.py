@@ -0,0 +1,186 @@
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional, List, Tuple, Dict, Any
+import asyncio
+import time
+
+from app.core.config import settings
+
+# Recomputes one id range of open credit lines in a single statement:
+#   1. a payment on or after the start of the current period rolls
+#      next_payment_date forward by one period,
+#   2. days_past_due is derived from the (possibly rolled) due date, and
+#      is 0 for lines with nothing drawn,
+#   3. late_payment_count grows when a line goes from current to late,
+#   4. lines past the thresholds move to SUSPENDED / DEFAULTED, and
+#      lines this job suspended return to ACTIVE once current again;
+#      suspensions made elsewhere (manual, fraud) are left alone.
+# payment_status is a property over days_past_due, so it follows step 2.
+DELINQUENCY_CHUNK_SQL = """
+WITH base AS (
+    SELECT id, status, suspended_by_delinquency, used_amount, days_past_due, late_payment_count, last_payment_date, next_payment_date,
+           CASE payment_frequency
+               WHEN 'WEEKLY' THEN interval '7 days'
+               WHEN 'BIWEEKLY' THEN interval '14 days'
+               WHEN 'QUARTERLY' THEN interval '3 months'
+               ELSE interval '1 month'
+           END AS step
+    FROM credit_lines
+    WHERE id >= :lo AND id < :hi
+      AND status IN ('ACTIVE', 'SUSPENDED')
+      AND next_payment_date IS NOT NULL
+),
+rolled AS (
+    SELECT b.*,
+           CASE WHEN b.last_payment_date >= b.next_payment_date - b.step
+                     AND b.next_payment_date <= CAST(:today AS date)
+                THEN b.next_payment_date + b.step
+                ELSE b.next_payment_date
+           END AS new_next_payment_date
+    FROM base b
+),
+calc AS (
+    SELECT r.*,
+           CASE WHEN r.used_amount > 0
+                THEN GREATEST(0, CAST(:today AS date) - CAST(r.new_next_payment_date AS date))
+                ELSE 0
+           END AS new_days_past_due
+    FROM rolled r
+),
+target AS (
+    SELECT c.id, c.status AS old_status, c.days_past_due AS old_days_past_due,
+           c.new_next_payment_date, c.new_days_past_due,
+           c.late_payment_count + CASE WHEN c.days_past_due = 0 AND c.new_days_past_due > 0
+                                       THEN 1 ELSE 0 END AS new_late_payment_count,
+           CASE WHEN c.new_days_past_due > :default_days THEN CAST('DEFAULTED' AS creditstatus)
+                WHEN c.new_days_past_due > :suspend_days THEN CAST('SUSPENDED' AS creditstatus)
+                WHEN c.status = 'SUSPENDED' AND c.suspended_by_delinquency AND c.new_days_past_due = 0
+                THEN CAST('ACTIVE' AS creditstatus)
+                ELSE c.status
+           END AS new_status
+    FROM calc c
+)
+UPDATE credit_lines cl
+SET next_payment_date = t.new_next_payment_date,
+    days_past_due = t.new_days_past_due,
+    late_payment_count = t.new_late_payment_count,
+    status = t.new_status,
+    suspended_by_delinquency = CASE WHEN t.new_status <> 'SUSPENDED' THEN false
+                                    WHEN t.old_status <> 'SUSPENDED' THEN true
+                                    ELSE cl.suspended_by_delinquency
+                               END,
+    updated_at = now()
+FROM target t
+WHERE cl.id = t.id
+  AND (cl.next_payment_date IS DISTINCT FROM t.new_next_payment_date
+       OR cl.days_past_due <> t.new_days_past_due
+       OR cl.status <> t.new_status)
+RETURNING cl.id, t.old_status, t.new_status, t.old_days_past_due, t.new_days_past_due
+"""
+
+
+@dataclass
+class DelinquencyReport:
+    as_of: date
+    chunks: int = 0
+    changed: int = 0
+    newly_late: int = 0
+    cured: int = 0
+    suspended: int = 0
+    defaulted: int = 0
+    reactivated: int = 0
+    skipped_ranges: List[Tuple[int, int]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def add(self, rows):
+        for row in rows:
+            self.changed += 1
+            if row.old_days_past_due == 0 and row.new_days_past_due > 0:
+                self.newly_late += 1
+            elif row.old_days_past_due > 0 and row.new_days_past_due == 0:
+                self.cured += 1
+            if row.new_status != row.old_status:
+                if row.new_status == "DEFAULTED":
+                    self.defaulted += 1
+                elif row.new_status == "SUSPENDED":
+                    self.suspended += 1
+                elif row.new_status == "ACTIVE":
+                    self.reactivated += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "as_of": self.as_of.isoformat(),
+            "chunks": self.chunks,
+            "changed": self.changed,
+            "newly_late": self.newly_late,
+            "cured": self.cured,
+            "suspended": self.suspended,
+            "defaulted": self.defaulted,
+            "reactivated": self.reactivated,
+            "skipped_ranges": self.skipped_ranges,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+async def _run_chunk(db: AsyncSession, lo: int, hi: int, params: Dict[str, Any]):
+    # Keep row locks short: each chunk is its own transaction and gives up
+    # quickly instead of queueing behind a long-running writer.
+    await db.execute(text(f"SET LOCAL lock_timeout = {int(settings.DELINQUENCY_LOCK_TIMEOUT_MS)}"))
+    result = await db.execute(text(DELINQUENCY_CHUNK_SQL), {"lo": lo, "hi": hi, **params})
+    rows = result.all()
+    await db.commit()
+    return rows
+
+
+async def run_delinquency_batch(
+    db: AsyncSession,
+    as_of: Optional[date] = None,
+    chunk_size: Optional[int] = None,
+) -> DelinquencyReport:
+    """Recompute delinquency fields for every open credit line, one id range at a time."""
+    as_of = as_of or date.today()
+    chunk_size = chunk_size or settings.DELINQUENCY_CHUNK_SIZE
+    report = DelinquencyReport(as_of=as_of)
+    started = time.perf_counter()
+
+    bounds = (await db.execute(text("SELECT min(id), max(id) FROM credit_lines"))).one()
+    await db.commit()
+    if bounds[0] is None:
+        return report
+
+    params = {
+        "today": as_of,
+        "suspend_days": settings.DELINQUENCY_SUSPEND_DAYS,
+        "default_days": settings.DELINQUENCY_DEFAULT_DAYS,
+    }
+    for lo in range(bounds[0], bounds[1] + 1, chunk_size):
+        hi = lo + chunk_size
+        for attempt in range(2):
+            try:
+                rows = await _run_chunk(db, lo, hi, params)
+            except DBAPIError:
+                await db.rollback()
+                if attempt == 1:
+                    report.skipped_ranges.append((lo, hi))
+                continue
+            report.add(rows)
+            break
+        report.chunks += 1
+
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def main():
+    """Entry point for the nightly job."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        report = await run_delinquency_batch(db)
+        print(f"Delinquency batch: {report.as_dict()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
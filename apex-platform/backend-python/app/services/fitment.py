@@ -0,0 +1,237 @@
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+
+import numpy as np
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.autopart_fitment import AutoPartFitment, FITMENT_ROWS_SQL, ANY_VALUE, ANY_YEAR
+from app.models.autopartes import AutoPart, ProductCategory
+
+CATEGORY_CODES = {category: code for code, category in enumerate(ProductCategory)}
+
+REBUILD_SQL = f"""
+    INSERT INTO autopart_fitments (make, model, year, engine_type, part_id, category, brand)
+    {FITMENT_ROWS_SQL}
+"""
+
+
+@dataclass
+class VehicleFitment:
+    """Every fitment row of one (make, model, year) as parallel arrays.
+
+    Rows are sorted by part id; a part appears once per engine type it is
+    listed for. Filters are boolean masks, so a lookup never touches the
+    database once a vehicle is hot.
+    """
+    part_ids: np.ndarray      # uint32
+    engine_types: np.ndarray  # object, lower-cased or ANY_VALUE
+    categories: np.ndarray    # int8 codes from CATEGORY_CODES
+    brands: np.ndarray        # int32 codes into brand_names
+    brand_names: np.ndarray
+
+    def select(
+        self,
+        engine_type: Optional[str] = None,
+        category: Optional[ProductCategory] = None,
+        brand: Optional[str] = None,
+    ) -> np.ndarray:
+        mask = np.ones(len(self.part_ids), dtype=bool)
+        if engine_type is not None:
+            mask &= (self.engine_types == engine_type) | (self.engine_types == ANY_VALUE)
+        if category is not None:
+            mask &= self.categories == CATEGORY_CODES[category]
+        if brand is not None:
+            position = np.searchsorted(self.brand_names, brand)
+            if position >= len(self.brand_names) or self.brand_names[position] != brand:
+                return np.empty(0, dtype=np.uint32)
+            mask &= self.brands == position
+        return np.unique(self.part_ids[mask])
+
+
+class HotVehicleCache:
+    """In-process arrays for the most looked-up vehicles.
+
+    A vehicle is only loaded after FITMENT_HOT_ADMIT_HITS lookups within the
+    TTL, so one-off searches do not evict popular vehicles.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, admit_hits: int):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.hits = TTLCache(maxsize=maxsize * 16, ttl=ttl)
+        self.admit_hits = admit_hits
+
+    def get(self, vehicle: Tuple[str, str, int]) -> Optional[VehicleFitment]:
+        return self.entries.get(vehicle)
+
+    def should_admit(self, vehicle: Tuple[str, str, int]) -> bool:
+        count = (self.hits.get(vehicle) or 0) + 1
+        self.hits.set(vehicle, count)
+        return count >= self.admit_hits
+
+    def set(self, vehicle: Tuple[str, str, int], fitment: VehicleFitment):
+        self.entries.set(vehicle, fitment)
+        self.hits.delete(vehicle)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits.clear()
+
+
+_hot_vehicles = HotVehicleCache(
+    maxsize=settings.FITMENT_HOT_VEHICLES,
+    ttl=settings.FITMENT_HOT_CACHE_TTL_SECONDS,
+    admit_hits=settings.FITMENT_HOT_ADMIT_HITS,
+)
+
+
+def normalize_vehicle(make: str, model: str, year: int) -> Tuple[str, str, int]:
+    return make.strip().lower(), model.strip().lower(), int(year)
+
+
+def _vehicle_filter(stmt, vehicle: Tuple[str, str, int]):
+    """Exact values or wildcards on the leading (make, model, year) index columns."""
+    make, model, year = vehicle
+    return stmt.where(
+        AutoPartFitment.make.in_((make, ANY_VALUE)),
+        AutoPartFitment.model.in_((model, ANY_VALUE)),
+        AutoPartFitment.year.in_((year, ANY_YEAR)),
+    )
+
+
+async def _load_vehicle(db: AsyncSession, vehicle: Tuple[str, str, int]) -> VehicleFitment:
+    stmt = _vehicle_filter(
+        select(
+            AutoPartFitment.part_id,
+            AutoPartFitment.engine_type,
+            AutoPartFitment.category,
+            AutoPartFitment.brand,
+        ),
+        vehicle,
+    ).order_by(AutoPartFitment.part_id)
+    rows = (await db.execute(stmt)).all()
+
+    if not rows:
+        empty = np.empty(0)
+        return VehicleFitment(
+            empty.astype(np.uint32), empty.astype(object), empty.astype(np.int8),
+            empty.astype(np.int32), empty.astype(object),
+        )
+    part_ids, engine_types, categories, brands = zip(*rows)
+    brand_names, brand_codes = np.unique(np.asarray(brands, dtype=object), return_inverse=True)
+    return VehicleFitment(
+        part_ids=np.asarray(part_ids, dtype=np.uint32),
+        engine_types=np.asarray(engine_types, dtype=object),
+        categories=np.fromiter((CATEGORY_CODES[c] for c in categories), dtype=np.int8, count=len(rows)),
+        brands=brand_codes.astype(np.int32),
+        brand_names=brand_names,
+    )
+
+
+async def find_compatible_part_ids(
+    db: AsyncSession,
+    make: str,
+    model: str,
+    year: int,
+    engine_type: Optional[str] = None,
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = None,
+    limit: int = 50,
+    after_id: Optional[int] = None,
+) -> List[int]:
+    """Ids of listed parts that fit a vehicle, ascending, at most `limit`.
+
+    Same semantics as AutoPart.is_compatible_with_vehicle (an empty list on
+    the part matches anything) but answered from autopart_fitments, or from
+    the in-process arrays for hot vehicles, instead of scanning the catalog.
+    """
+    vehicle = normalize_vehicle(make, model, year)
+    engine_type = engine_type.strip().lower() if engine_type else None
+    brand = brand.strip().lower() if brand else None
+
+    fitment = _hot_vehicles.get(vehicle)
+    if fitment is None and _hot_vehicles.should_admit(vehicle):
+        fitment = await _load_vehicle(db, vehicle)
+        _hot_vehicles.set(vehicle, fitment)
+
+    if fitment is not None:
+        ids = fitment.select(engine_type, category, brand)
+        if after_id is not None:
+            ids = ids[np.searchsorted(ids, after_id, side="right"):]
+        return ids[:limit].tolist()
+
+    stmt = _vehicle_filter(select(AutoPartFitment.part_id).distinct(), vehicle)
+    if engine_type is not None:
+        stmt = stmt.where(AutoPartFitment.engine_type.in_((engine_type, ANY_VALUE)))
+    if category is not None:
+        stmt = stmt.where(AutoPartFitment.category == category)
+    if brand is not None:
+        stmt = stmt.where(AutoPartFitment.brand == brand)
+    if after_id is not None:
+        stmt = stmt.where(AutoPartFitment.part_id > after_id)
+    stmt = stmt.order_by(AutoPartFitment.part_id).limit(limit)
+    return list((await db.execute(stmt)).scalars().all())
+
+
+async def search_parts_by_vehicle(
+    db: AsyncSession,
+    make: str,
+    model: str,
+    year: int,
+    engine_type: Optional[str] = None,
+    category: Optional[ProductCategory] = None,
+    brand: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """A page of parts fitting a vehicle, keyset-paginated by part id."""
+    values = decode_cursor(cursor, 1)
+    after_id = int(values[0]) if values is not None else None
+
+    ids = await find_compatible_part_ids(
+        db, make, model, year, engine_type=engine_type, category=category,
+        brand=brand, limit=limit + 1, after_id=after_id,
+    )
+    page_ids = ids[:limit]
+    parts = []
+    if page_ids:
+        result = await db.execute(select(AutoPart).where(AutoPart.id.in_(page_ids)).order_by(AutoPart.id))
+        parts = list(result.scalars().all())
+
+    next_cursor = encode_cursor([page_ids[-1]]) if len(ids) > limit else None
+    return {"items": parts, "next_cursor": next_cursor}
+
+
+async def rebuild_fitment(db: AsyncSession) -> int:
+    """Rebuild autopart_fitments from the catalog in one set-based pass.
+
+    The triggers on autoparts keep the table current; this is for the
+    initial backfill and for recovering after bulk loads with triggers off.
+    """
+    await db.execute(text("LOCK TABLE autopart_fitments IN EXCLUSIVE MODE"))
+    await db.execute(text("DELETE FROM autopart_fitments"))
+    result = await db.execute(text(REBUILD_SQL))
+    await db.commit()
+    _hot_vehicles.clear()
+    return result.rowcount
+
+
+def clear_fitment_cache():
+    """Drop hot vehicle arrays, e.g. after bulk catalog changes."""
+    _hot_vehicles.clear()
+
+
+async def main():
+    """Entry point for the fitment backfill."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_fitment(db)
+        print(f"Fitment rebuild: {rows} rows")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,307 @@
+from sqlalchemy import select, update, values, column, tuple_, text, cast, Integer
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import Counter, defaultdict
+from typing import Optional, List, Dict, Any, Iterable, Tuple, Hashable
+import asyncio
+import re
+import time
+
+from app.core.cache import invalidate_tags
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.autopartes import AutoPart, ProductStatus
+from app.models.interchange import InterchangeNumber
+from app.services.product_cache import CATALOG_TAG
+
+# Numbers shorter than this after normalization ("0", "N/A", "1") would
+# join unrelated parts into one giant group, so they are not linked
+MIN_NUMBER_LENGTH = 4
+# Serializes group assignment between catalog imports and full rebuilds
+LOCK_KEY = 0x1C7E_0042
+LISTED_STATUSES = (ProductStatus.ACTIVE, ProductStatus.OUT_OF_STOCK)
+NUMBER_COLUMNS = (AutoPart.part_number, AutoPart.oem_number, AutoPart.universal_part_number)
+WRITE_CHUNK_SIZE = 5000
+
+_NON_ALNUM = re.compile(r"[^0-9A-Z]")
+
+
+def normalize_number(value: Optional[str]) -> Optional[str]:
+    """Upper-case and strip separators so "04465-02220" matches "0446502220"."""
+    if not value:
+        return None
+    number = _NON_ALNUM.sub("", value.upper())
+    return number if len(number) >= MIN_NUMBER_LENGTH else None
+
+
+def part_numbers(*raw: Optional[str]) -> List[str]:
+    return sorted({number for number in map(normalize_number, raw) if number})
+
+
+class UnionFind:
+    """Disjoint sets over hashable keys with path halving and union by size."""
+
+    def __init__(self):
+        self.parent: Dict[Hashable, Hashable] = {}
+        self.size: Dict[Hashable, int] = {}
+
+    def add(self, key: Hashable):
+        if key not in self.parent:
+            self.parent[key] = key
+            self.size[key] = 1
+
+    def find(self, key: Hashable) -> Hashable:
+        parent = self.parent
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    def union(self, a: Hashable, b: Hashable):
+        self.add(a)
+        self.add(b)
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size.pop(b)
+
+    def components(self) -> Dict[Hashable, List[Hashable]]:
+        groups = defaultdict(list)
+        for key in self.parent:
+            groups[self.find(key)].append(key)
+        return groups
+
+
+async def _lock(db: AsyncSession):
+    await db.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": LOCK_KEY})
+
+
+async def _next_group_ids(db: AsyncSession, count: int) -> List[int]:
+    if count == 0:
+        return []
+    result = await db.execute(
+        text("SELECT nextval('interchange_group_seq') FROM generate_series(1, :count)"), {"count": count}
+    )
+    return list(result.scalars())
+
+
+async def _set_part_groups(db: AsyncSession, assignments: List[Tuple[int, Optional[int]]]):
+    for start in range(0, len(assignments), WRITE_CHUNK_SIZE):
+        v = values(column("part_id", Integer), column("group_id", Integer), name="v").data(
+            assignments[start:start + WRITE_CHUNK_SIZE]
+        )
+        # A chunk of unlinked parts has an all-NULL, untyped column
+        group_id = cast(v.c.group_id, Integer)
+        await db.execute(
+            update(AutoPart)
+            .where(AutoPart.id == v.c.part_id)
+            .where(AutoPart.interchange_group_id.is_distinct_from(group_id))
+            .values(interchange_group_id=group_id)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def _set_number_groups(db: AsyncSession, assignments: List[Tuple[str, int]]):
+    for start in range(0, len(assignments), WRITE_CHUNK_SIZE):
+        stmt = insert(InterchangeNumber).values([
+            {"number": number, "group_id": group_id}
+            for number, group_id in assignments[start:start + WRITE_CHUNK_SIZE]
+        ])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[InterchangeNumber.number],
+                set_={"group_id": stmt.excluded.group_id},
+                where=InterchangeNumber.group_id != stmt.excluded.group_id,
+            )
+        )
+
+
+async def _merge_groups(db: AsyncSession, merges: List[Tuple[int, int]]):
+    """Relabel every (old, target) group pair on parts and numbers."""
+    for start in range(0, len(merges), WRITE_CHUNK_SIZE):
+        rows = merges[start:start + WRITE_CHUNK_SIZE]
+        for model, key in ((AutoPart, AutoPart.interchange_group_id), (InterchangeNumber, InterchangeNumber.group_id)):
+            v = values(column("old", Integer), column("target", Integer), name="m").data(rows)
+            await db.execute(
+                update(model)
+                .where(key == v.c.old)
+                .values({key.key: v.c.target})
+                .execution_options(synchronize_session=False)
+            )
+
+
+async def link_parts(db: AsyncSession, parts: Iterable[Tuple[int, Optional[str], Optional[str], Optional[str]]]) -> int:
+    """Assign interchange groups to new or changed parts; returns groups merged.
+
+    `parts` are (id, part_number, oem_number, universal_part_number). The
+    batch is unioned with the groups its numbers already belong to: a part
+    joins the existing group, and when it bridges several groups they are
+    merged into the lowest id. Incremental linking never splits a group, so
+    numbers a part stopped carrying keep their old links until
+    rebuild_interchange(). Runs inside the caller's transaction.
+    """
+    numbers_by_part = {part_id: part_numbers(*raw) for part_id, *raw in parts}
+    if not numbers_by_part:
+        return 0
+    await _lock(db)
+
+    all_numbers = sorted({number for numbers in numbers_by_part.values() for number in numbers})
+    existing: Dict[str, int] = {}
+    for start in range(0, len(all_numbers), WRITE_CHUNK_SIZE):
+        result = await db.execute(
+            select(InterchangeNumber.number, InterchangeNumber.group_id)
+            .where(InterchangeNumber.number.in_(all_numbers[start:start + WRITE_CHUNK_SIZE]))
+        )
+        existing.update(result.all())
+
+    sets = UnionFind()
+    for part_id, numbers in numbers_by_part.items():
+        for number in numbers:
+            sets.union(("part", part_id), ("number", number))
+    for number, group_id in existing.items():
+        sets.union(("number", number), ("group", group_id))
+
+    components = list(sets.components().values())
+    fresh = [keys for keys in components if not any(kind == "group" for kind, _ in keys)]
+    new_ids = iter(await _next_group_ids(db, len(fresh)))
+
+    part_groups: List[Tuple[int, Optional[int]]] = []
+    number_groups: List[Tuple[str, int]] = []
+    merges: List[Tuple[int, int]] = []
+    for keys in components:
+        groups = sorted(value for kind, value in keys if kind == "group")
+        target = groups[0] if groups else next(new_ids)
+        merges += [(group_id, target) for group_id in groups[1:]]
+        for kind, value in keys:
+            if kind == "part":
+                part_groups.append((value, target))
+            elif kind == "number" and existing.get(value) != target:
+                number_groups.append((value, target))
+    # Parts left without a usable number drop out of their old group
+    part_groups += [(part_id, None) for part_id, numbers in numbers_by_part.items() if not numbers]
+
+    await _merge_groups(db, merges)
+    await _set_part_groups(db, sorted(part_groups))
+    await _set_number_groups(db, sorted(number_groups))
+    return len(merges)
+
+
+async def rebuild_interchange(db: AsyncSession) -> Dict[str, int]:
+    """Recompute every interchange group from the catalog with union-find.
+
+    Components keep the group id most of their parts already carry, so a
+    rebuild only rewrites parts whose component actually changed (splits
+    after number edits, or stale links left by link_parts()).
+    """
+    started = time.perf_counter()
+    await _lock(db)
+
+    sets = UnionFind()
+    current: Dict[int, Optional[int]] = {}
+    anchors: Dict[int, str] = {}
+    stream = await db.stream(
+        select(AutoPart.id, AutoPart.interchange_group_id, *NUMBER_COLUMNS).execution_options(yield_per=WRITE_CHUNK_SIZE)
+    )
+    async for part_id, group_id, *raw in stream:
+        current[part_id] = group_id
+        numbers = part_numbers(*raw)
+        if not numbers:
+            continue
+        anchors[part_id] = numbers[0]
+        sets.add(numbers[0])
+        for number in numbers[1:]:
+            sets.union(numbers[0], number)
+
+    members: Dict[str, List[int]] = defaultdict(list)
+    for part_id, number in anchors.items():
+        members[sets.find(number)].append(part_id)
+
+    # Largest components pick their label first; a label can only be kept
+    # by one component, the others of a split get fresh ids
+    labels: Dict[str, int] = {}
+    claimed = set()
+    unlabeled = []
+    for root, part_ids in sorted(members.items(), key=lambda item: -len(item[1])):
+        votes = Counter(current[part_id] for part_id in part_ids if current[part_id] is not None)
+        label = next((group_id for group_id, _ in votes.most_common() if group_id not in claimed), None)
+        if label is None:
+            unlabeled.append(root)
+        else:
+            labels[root] = label
+            claimed.add(label)
+    labels.update(zip(unlabeled, await _next_group_ids(db, len(unlabeled))))
+
+    part_groups = sorted(
+        (part_id, labels[sets.find(anchors[part_id])] if part_id in anchors else None)
+        for part_id in current
+    )
+    changed_parts = [
+        (part_id, group_id) for part_id, group_id in part_groups if current[part_id] != group_id
+    ]
+    await _set_part_groups(db, changed_parts)
+
+    await db.execute(text("DELETE FROM interchange_numbers"))
+    number_groups = sorted((number, labels[sets.find(number)]) for number in sets.parent)
+    await _set_number_groups(db, number_groups)
+    await db.commit()
+    if changed_parts:
+        await invalidate_tags(CATALOG_TAG)
+
+    return {
+        "parts": len(current),
+        "groups": len(members),
+        "numbers": len(number_groups),
+        "parts_relabeled": len(changed_parts),
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+async def find_alternatives(
+    db: AsyncSession,
+    number: str,
+    in_stock: bool = True,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Every listed part interchangeable with `number`, cheapest first.
+
+    One query: the number's primary key lookup gives the group, and the
+    (interchange_group_id, final_price, id) partial index returns the
+    group's parts already in price order.
+    """
+    normalized = normalize_number(number)
+    if normalized is None:
+        raise ValueError(f"Part number must have at least {MIN_NUMBER_LENGTH} letters or digits")
+
+    stmt = (
+        select(AutoPart)
+        .join(InterchangeNumber, AutoPart.interchange_group_id == InterchangeNumber.group_id)
+        .where(InterchangeNumber.number == normalized, AutoPart.status.in_(LISTED_STATUSES))
+    )
+    if in_stock:
+        stmt = stmt.where(AutoPart.available_quantity > 0)
+    after = decode_cursor(cursor, 2)
+    if after is not None:
+        stmt = stmt.where(tuple_(AutoPart.final_price, AutoPart.id) > tuple_(float(after[0]), int(after[1])))
+    stmt = stmt.order_by(AutoPart.final_price, AutoPart.id).limit(limit + 1)
+
+    parts: List[AutoPart] = list((await db.execute(stmt)).scalars().all())
+    next_cursor = None
+    if len(parts) > limit:
+        parts = parts[:limit]
+        next_cursor = encode_cursor([parts[-1].final_price, parts[-1].id])
+    return {"items": parts, "next_cursor": next_cursor}
+
+
+async def main():
+    """Entry point for the interchange backfill and periodic rebuild."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        totals = await rebuild_interchange(db)
+        print(f"Interchange rebuild: {totals}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
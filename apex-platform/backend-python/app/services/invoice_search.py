@@ -0,0 +1,138 @@
+from sqlalchemy import select, union, func, or_, tuple_, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List, Dict, Any, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.invoice import Invoice
+from app.models.user import User
+
+
+MIN_QUERY_LENGTH = 3  # Trigram indexes cannot help below three characters
+
+# Invoice columns searched directly; the receiver RFC is matched through users
+SEARCH_COLUMNS = (Invoice.invoice_number, Invoice.folio, Invoice.series, Invoice.notes)
+
+_result_cache = TTLCache(
+    maxsize=settings.INVOICE_SEARCH_CACHE_MAX_ENTRIES,
+    ttl=settings.INVOICE_SEARCH_CACHE_TTL_SECONDS,
+)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards so user input is matched literally."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _match(column, query: str, pattern: str):
+    """Trigram word-similarity or substring match, both served by gin_trgm_ops."""
+    return or_(literal(query).op("<%")(column), column.ilike(pattern, escape="\\"))
+
+
+def _score(column, query: str):
+    return func.coalesce(func.word_similarity(query, column), 0.0)
+
+
+def _matching_ids(query: str):
+    """Union of invoice ids matched on their own columns or on the receiver RFC.
+
+    Each branch is a separate indexable predicate so Postgres can combine
+    the GIN indexes with bitmap scans instead of scanning invoices.
+    """
+    pattern = f"%{_escape_like(query)}%"
+    by_invoice = select(Invoice.id.label("id")).where(
+        or_(*(_match(column, query, pattern) for column in SEARCH_COLUMNS))
+    )
+    by_receiver = (
+        select(Invoice.id.label("id"))
+        .join(User, User.id == Invoice.receiver_id)
+        .where(_match(User.rfc, query, pattern))
+    )
+    return union(by_invoice, by_receiver).subquery("matches")
+
+
+async def search_invoices(
+    db: AsyncSession,
+    query: str,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    user_id: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Ranked fuzzy search over invoice number, folio, series, notes and receiver RFC.
+
+    Results are ordered by (score desc, id desc) and paginated with an opaque
+    keyset cursor. When user_id is given only invoices the user issued or
+    received are returned. Pages are cached briefly per (scope, query, cursor).
+    """
+    query = query.strip()
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(f"Search query must have at least {MIN_QUERY_LENGTH} characters")
+
+    cache_key = (user_id, query.lower(), cursor, limit)
+    cached = _result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    after: Optional[Tuple[float, int]] = None
+    values = decode_cursor(cursor, 2)
+    if values is not None:
+        after = (float(values[0]), int(values[1]))
+
+    # The threshold applies to the <% operator for this transaction only
+    await db.execute(
+        select(func.set_config(
+            "pg_trgm.word_similarity_threshold",
+            str(settings.INVOICE_SEARCH_SIMILARITY_THRESHOLD),
+            True,
+        ))
+    )
+
+    matches = _matching_ids(query)
+    score = func.greatest(
+        *(_score(column, query) for column in SEARCH_COLUMNS),
+        _score(User.rfc, query),
+    ).label("score")
+
+    ranked = (
+        select(
+            Invoice.id,
+            Invoice.invoice_number,
+            Invoice.folio,
+            Invoice.series,
+            Invoice.total,
+            Invoice.currency,
+            Invoice.status,
+            Invoice.issue_date,
+            Invoice.due_date,
+            User.rfc.label("receiver_rfc"),
+            score,
+        )
+        .join(matches, matches.c.id == Invoice.id)
+        .join(User, User.id == Invoice.receiver_id)
+    )
+    if user_id is not None:
+        ranked = ranked.where(or_(Invoice.issuer_id == user_id, Invoice.receiver_id == user_id))
+    ranked = ranked.subquery("ranked")
+
+    stmt = select(ranked)
+    if after is not None:
+        stmt = stmt.where(tuple_(ranked.c.score, ranked.c.id) < tuple_(after[0], after[1]))
+    stmt = stmt.order_by(ranked.c.score.desc(), ranked.c.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).mappings().all()
+    items: List[Dict[str, Any]] = [dict(row) for row in rows[:limit]]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor([float(last["score"]), last["id"]])
+
+    page = {"items": items, "next_cursor": next_cursor}
+    _result_cache.set(cache_key, page)
+    return page
+
+
+def clear_search_cache():
+    """Drop cached search pages, e.g. after bulk invoice changes."""
+    _result_cache.clear()
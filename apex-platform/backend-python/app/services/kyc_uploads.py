@@ -0,0 +1,642 @@
+from sqlalchemy import select, delete, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from pathlib import Path
+from typing import Optional, Dict, Any, AsyncIterable, List, Tuple
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import time
+import uuid
+
+import aiofiles
+import aiofiles.os
+from PIL import Image, UnidentifiedImageError
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.executors import get_process_pool
+from app.models.kyc_document import KYCDocument, KYCDocumentStatus, KYCDocumentType
+
+logger = logging.getLogger(__name__)
+
+# Leading bytes of the accepted formats; anything else is refused before
+# the first write
+SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+)
+SNIFF_BYTES = 8
+HASH_READ_BYTES = 1024 * 1024
+
+CLAIM_SQL = """
+    SELECT id, content_type, sha256
+    FROM kyc_documents
+    WHERE status = 'QUEUED'
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+"""
+
+SCREENED_SQL = """
+    UPDATE kyc_documents d
+    SET status = CAST(u.status AS kycdocumentstatus), review_notes = u.notes
+    FROM unnest(CAST(:ids AS integer[]), CAST(:statuses AS text[]), CAST(:notes AS text[]))
+         AS u(id, status, notes)
+    WHERE d.id = u.id
+    RETURNING d.user_id
+"""
+
+# A user is approved once every required type has an approved document,
+# in review while anything is queued or under review, and rejected when
+# only rejected documents remain. Approval is never taken back here.
+SYNC_USERS_SQL = """
+    UPDATE users u
+    SET kyc_status = CAST(CASE
+        WHEN s.approved_types @> CAST(:required AS text[]) THEN 'APPROVED'
+        WHEN s.pending > 0 THEN 'IN_REVIEW'
+        WHEN s.rejected > 0 THEN 'REJECTED'
+        ELSE 'PENDING'
+    END AS kycstatus)
+    FROM (
+        SELECT d.user_id,
+               array_agg(DISTINCT CAST(d.document_type AS text)) FILTER (WHERE d.status = 'APPROVED') AS approved_types,
+               count(*) FILTER (WHERE d.status IN ('QUEUED', 'IN_REVIEW')) AS pending,
+               count(*) FILTER (WHERE d.status = 'REJECTED') AS rejected
+        FROM kyc_documents d
+        WHERE d.user_id = ANY(CAST(:user_ids AS integer[]))
+        GROUP BY d.user_id
+    ) s
+    WHERE u.id = s.user_id AND u.kyc_status <> 'APPROVED'
+"""
+
+PRUNE_SQL = """
+    DELETE FROM kyc_documents
+    WHERE status = 'UPLOADING' AND created_at < now() - make_interval(hours => :hours)
+    RETURNING id
+"""
+
+BACKLOG_SQL = """
+    SELECT count(*) FILTER (WHERE status = 'UPLOADING') AS uploading,
+           count(*) FILTER (WHERE status = 'QUEUED') AS queued,
+           count(*) FILTER (WHERE status = 'IN_REVIEW') AS in_review
+    FROM kyc_documents
+    WHERE status IN ('UPLOADING', 'QUEUED', 'IN_REVIEW')
+"""
+
+
+class KYCDocumentError(ValueError):
+    """An upload or review that cannot be accepted; `status_code` is the HTTP answer."""
+
+    def __init__(self, message: str, status_code: int = HTTPStatus.BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class UploadMetrics:
+    documents_stored: int = 0
+    duplicates: int = 0
+    resumable_started: int = 0
+    chunks_received: int = 0
+    bytes_received: int = 0
+    rejected: int = 0
+    rehashed: int = 0
+    active_streams: int = 0
+    peak_active_streams: int = 0
+    screened: int = 0
+    screening_rejected: int = 0
+    pruned_uploads: int = 0
+
+
+_metrics = UploadMetrics()
+# Running SHA-256 of resumable uploads whose chunks arrive at this worker,
+# keyed by document id as (bytes hashed, hasher); a miss means a rehash
+# of the part file on completion
+_hashers = TTLCache(maxsize=10000, ttl=settings.KYC_UPLOAD_EXPIRY_HOURS * 3600)
+
+
+def _kyc_root() -> Path:
+    return Path(settings.UPLOAD_DIR) / "kyc"
+
+
+def document_path(digest: str) -> Path:
+    return _kyc_root() / "documents" / digest[:2] / digest
+
+
+def part_path(document_id: int) -> Path:
+    return _kyc_root() / "parts" / f"{document_id}.part"
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    for signature, content_type in SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def check_declared_size(size: Optional[int], limit: Optional[int] = None):
+    """Refuse a body from its declared length, before reading any of it."""
+    limit = settings.MAX_UPLOAD_SIZE if limit is None else limit
+    if size is not None and size > limit:
+        _metrics.rejected += 1
+        raise KYCDocumentError(
+            f"Upload exceeds the {limit} byte limit", HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+        )
+
+
+class _Sink:
+    """Copies a request body to an open file through a bounded buffer.
+
+    The body is hashed as it is written, so the digest never needs a
+    second pass over the file; `written` and `hasher` always describe
+    the bytes actually on disk. The stream is cut off as soon as it
+    passes `limit`, and the first bytes are checked against SIGNATURES
+    before anything is written when `sniff` is set.
+    """
+
+    def __init__(self, out, limit: int, hasher=None, sniff: bool = False):
+        self.out = out
+        self.limit = limit
+        self.hasher = hasher
+        self.sniff = sniff
+        self.content_type: Optional[str] = None
+        self.written = 0
+
+    async def copy(self, chunks: AsyncIterable[bytes]) -> int:
+        buffer = bytearray()
+        async for chunk in chunks:
+            if self.written + len(buffer) + len(chunk) > self.limit:
+                _metrics.rejected += 1
+                raise KYCDocumentError(
+                    f"Upload exceeds the {self.limit} byte limit", HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                )
+            buffer += chunk
+            _metrics.bytes_received += len(chunk)
+            if len(buffer) >= settings.KYC_UPLOAD_CHUNK_BYTES:
+                await self._flush(buffer)
+        if buffer:
+            await self._flush(buffer)
+        return self.written
+
+    async def _flush(self, buffer: bytearray):
+        if self.sniff and not self.written:
+            self.content_type = sniff_content_type(bytes(buffer[:SNIFF_BYTES]))
+            if self.content_type is None:
+                _metrics.rejected += 1
+                raise KYCDocumentError(
+                    "Documents must be PDF, JPEG or PNG files", HTTPStatus.UNSUPPORTED_MEDIA_TYPE
+                )
+        try:
+            await self.out.write(buffer)
+        except BaseException:
+            # Part of the buffer may be on disk; the running hash no longer matches
+            self.hasher = None
+            raise
+        if self.hasher is not None:
+            self.hasher.update(buffer)
+        self.written += len(buffer)
+        buffer.clear()
+
+
+class _Stream:
+    """Counts a request body as an active upload stream while it is copied."""
+
+    def __enter__(self):
+        _metrics.active_streams += 1
+        _metrics.peak_active_streams = max(_metrics.peak_active_streams, _metrics.active_streams)
+
+    def __exit__(self, *exc_info):
+        _metrics.active_streams -= 1
+
+
+async def _hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    async with aiofiles.open(path, "rb") as source:
+        while chunk := await source.read(HASH_READ_BYTES):
+            digest.update(chunk)
+    _metrics.rehashed += 1
+    return digest.hexdigest()
+
+
+async def _store_file(source: Path, digest: str):
+    """Move a complete upload to its content-addressed path; identical bytes are kept once."""
+    target = document_path(digest)
+    if await aiofiles.os.path.exists(target):
+        await aiofiles.os.remove(source)
+        return
+    await aiofiles.os.makedirs(target.parent, exist_ok=True)
+    await aiofiles.os.replace(source, target)
+
+
+async def _remove(path: Path):
+    try:
+        await aiofiles.os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+async def sync_kyc_status(db: AsyncSession, user_ids: List[int]):
+    """Derive User.kyc_status from the users' documents; the caller commits."""
+    if not user_ids:
+        return
+    await db.execute(text(SYNC_USERS_SQL), {
+        "user_ids": sorted(set(user_ids)),
+        "required": [KYCDocumentType(value).name for value in settings.KYC_REQUIRED_DOCUMENTS],
+    })
+
+
+async def _find_duplicate(db: AsyncSession, user_id: int, digest: str) -> Optional[KYCDocument]:
+    return (await db.execute(
+        select(KYCDocument).where(KYCDocument.user_id == user_id, KYCDocument.sha256 == digest)
+    )).scalar_one_or_none()
+
+
+async def _submit(db: AsyncSession, document: KYCDocument, digest: str,
+                  content_type: str) -> Tuple[KYCDocument, bool]:
+    """Queue a complete document for screening, or return the user's copy of the same file.
+
+    Returns the document and whether it is new.
+    """
+    # Read before a rollback can expire them; None for a single-request upload
+    document_id, user_id = document.id, document.user_id
+    existing = await _find_duplicate(db, user_id, digest)
+    if existing is None:
+        document.sha256 = digest
+        document.content_type = content_type
+        document.status = KYCDocumentStatus.QUEUED
+        document.completed_at = datetime.now(timezone.utc)
+        db.add(document)
+        try:
+            await db.flush()
+            await sync_kyc_status(db, [user_id])
+            await db.commit()
+        except IntegrityError:
+            # The same file finished concurrently in another request
+            await db.rollback()
+            existing = await _find_duplicate(db, user_id, digest)
+            if existing is None:
+                raise
+        else:
+            _metrics.documents_stored += 1
+            wake_kyc_screening()
+            return document, True
+
+    if document_id is not None:
+        await db.execute(delete(KYCDocument).where(KYCDocument.id == document_id))
+        await db.commit()
+    _metrics.duplicates += 1
+    return existing, False
+
+
+async def store_document(
+    db: AsyncSession,
+    user_id: int,
+    document_type: KYCDocumentType,
+    chunks: AsyncIterable[bytes],
+    filename: Optional[str] = None,
+    declared_size: Optional[int] = None,
+) -> Tuple[KYCDocument, bool]:
+    """Store a document sent as one request body, streamed to disk as it arrives.
+
+    At most KYC_UPLOAD_CHUNK_BYTES of the body is held in memory. Returns
+    the document and whether it is new; uploading a file the user already
+    submitted returns the existing document.
+    """
+    check_declared_size(declared_size)
+    tmp = _kyc_root() / "parts" / f"{uuid.uuid4().hex}.tmp"
+    await aiofiles.os.makedirs(tmp.parent, exist_ok=True)
+    try:
+        with _Stream():
+            async with aiofiles.open(tmp, "wb") as out:
+                sink = _Sink(out, settings.MAX_UPLOAD_SIZE, hashlib.sha256(), sniff=True)
+                size = await sink.copy(chunks)
+        if size == 0:
+            raise KYCDocumentError("Empty upload")
+        digest = sink.hasher.hexdigest()
+        await _store_file(tmp, digest)
+    except BaseException:
+        await _remove(tmp)
+        raise
+
+    document = KYCDocument(
+        user_id=user_id, document_type=document_type, filename=filename, size_bytes=size,
+    )
+    return await _submit(db, document, digest, sink.content_type)
+
+
+async def start_upload(
+    db: AsyncSession,
+    user_id: int,
+    document_type: KYCDocumentType,
+    size: int,
+    filename: Optional[str] = None,
+) -> KYCDocument:
+    """Open a resumable upload of `size` bytes, sent later with append_chunk()."""
+    if size <= 0:
+        raise KYCDocumentError("Upload size must be positive")
+    check_declared_size(size)
+    document = KYCDocument(
+        user_id=user_id, document_type=document_type, status=KYCDocumentStatus.UPLOADING,
+        filename=filename, size_bytes=size,
+    )
+    db.add(document)
+    await db.commit()
+    path = part_path(document.id)
+    await aiofiles.os.makedirs(path.parent, exist_ok=True)
+    async with aiofiles.open(path, "wb"):
+        pass
+    _metrics.resumable_started += 1
+    return document
+
+
+def upload_expires_at(document: KYCDocument) -> datetime:
+    return document.created_at + timedelta(hours=settings.KYC_UPLOAD_EXPIRY_HOURS)
+
+
+async def upload_offset(document: KYCDocument) -> int:
+    """Bytes of a resumable upload received so far, read from its part file."""
+    if document.status != KYCDocumentStatus.UPLOADING:
+        return document.size_bytes
+    try:
+        return (await aiofiles.os.stat(part_path(document.id))).st_size
+    except FileNotFoundError:
+        return 0
+
+
+async def append_chunk(
+    db: AsyncSession,
+    document: KYCDocument,
+    offset: int,
+    chunks: AsyncIterable[bytes],
+    declared_size: Optional[int] = None,
+) -> Tuple[KYCDocument, int]:
+    """Append a chunk at `offset` to a resumable upload.
+
+    The chunk must start exactly where the part file ends; a client that
+    lost a response asks for the offset and resends from there. Bytes of
+    an interrupted chunk that reached disk count as received. The last
+    chunk completes the upload and submits the document, which may turn
+    out to be a duplicate of one the user already has. Returns the
+    (possibly existing) document and the new offset; once the upload is
+    complete, a retried chunk gets the document and its full size back.
+    """
+    if document.status != KYCDocumentStatus.UPLOADING:
+        return document, document.size_bytes
+    if upload_expires_at(document) < datetime.now(timezone.utc):
+        raise KYCDocumentError("Upload has expired", HTTPStatus.GONE)
+
+    path = part_path(document.id)
+    try:
+        # Never create the part file here: start_upload did, and it is gone
+        # once the upload completed (or was pruned)
+        out = await aiofiles.open(path, "r+b")
+    except FileNotFoundError:
+        await db.refresh(document)
+        if document.status != KYCDocumentStatus.UPLOADING:
+            return document, document.size_bytes
+        raise KYCDocumentError("Upload has expired", HTTPStatus.GONE)
+    async with out:
+        try:
+            # One writer per upload, across workers sharing UPLOAD_DIR
+            fcntl.flock(out.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise KYCDocumentError("Another request is writing this upload", HTTPStatus.CONFLICT)
+        # The request holding the lock before us may have just completed it
+        await db.refresh(document)
+        if document.status != KYCDocumentStatus.UPLOADING:
+            return document, document.size_bytes
+        received = os.fstat(out.fileno()).st_size
+        if offset != received:
+            raise KYCDocumentError(
+                f"Upload-Offset {offset} does not match the {received} bytes received", HTTPStatus.CONFLICT
+            )
+        remaining = document.size_bytes - received
+        check_declared_size(declared_size, remaining)
+        await out.seek(received)
+
+        hashed = _hashers.get(document.id)
+        if received == 0:
+            hasher = hashlib.sha256()
+        elif hashed is not None and hashed[0] == received:
+            hasher = hashed[1]
+        else:
+            hasher = None
+        sink = _Sink(out, remaining, hasher, sniff=received == 0)
+        try:
+            with _Stream():
+                await sink.copy(chunks)
+        finally:
+            await out.flush()
+            if sink.hasher is not None:
+                _hashers.set(document.id, (received + sink.written, sink.hasher))
+            else:
+                _hashers.delete(document.id)
+        _metrics.chunks_received += 1
+
+        offset = received + sink.written
+        if offset < document.size_bytes:
+            return document, offset
+
+        # Complete: stored and submitted while still holding the lock, so a
+        # retried last chunk finds the document submitted and cannot submit
+        # it twice
+        _hashers.delete(document.id)
+        digest = sink.hasher.hexdigest() if sink.hasher is not None else await _hash_file(path)
+        async with aiofiles.open(path, "rb") as head:
+            content_type = sniff_content_type(await head.read(SNIFF_BYTES))
+        await _store_file(path, digest)
+        return (await _submit(db, document, digest, content_type))[0], offset
+
+
+async def review_document(
+    db: AsyncSession,
+    document_id: int,
+    reviewer_id: int,
+    approved: bool,
+    notes: Optional[str] = None,
+) -> Optional[KYCDocument]:
+    """Record an admin decision on a screened document and update the user's KYC status."""
+    document = await db.get(KYCDocument, document_id, with_for_update=True)
+    if document is None:
+        return None
+    if document.status != KYCDocumentStatus.IN_REVIEW:
+        raise KYCDocumentError(
+            f"Document is {document.status.value}, not awaiting review", HTTPStatus.CONFLICT
+        )
+    document.status = KYCDocumentStatus.APPROVED if approved else KYCDocumentStatus.REJECTED
+    document.review_notes = notes
+    document.reviewed_by = reviewer_id
+    document.reviewed_at = datetime.now(timezone.utc)
+    await db.flush()
+    await sync_kyc_status(db, [document.user_id])
+    await db.commit()
+    return document
+
+
+def screen_file(path: str, content_type: str) -> Optional[str]:
+    """Automated checks before a human looks at a document; runs in the process pool.
+
+    Returns the reason to reject it, or None when it can go to review.
+    """
+    try:
+        if content_type == "application/pdf":
+            with open(path, "rb") as pdf:
+                pdf.seek(max(0, os.path.getsize(path) - 1024))
+                if b"%%EOF" not in pdf.read():
+                    return "PDF is truncated or damaged"
+                pdf.seek(0)
+                if b"/Encrypt" in pdf.read():
+                    return "PDF is password protected"
+            return None
+        with Image.open(path) as image:
+            width, height = image.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                return f"Image is too large ({width}x{height})"
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        return f"File cannot be opened: {exc}"
+    return None
+
+
+async def process_screening_batch(db: AsyncSession, batch_size: Optional[int] = None) -> int:
+    """Screen a batch of queued documents into IN_REVIEW or REJECTED; returns documents screened."""
+    batch_size = batch_size or settings.KYC_SCREENING_BATCH_SIZE
+    rows = (await db.execute(text(CLAIM_SQL), {"batch_size": batch_size})).all()
+    if not rows:
+        await db.commit()
+        return 0
+
+    loop = asyncio.get_running_loop()
+    reasons = await asyncio.gather(*(
+        loop.run_in_executor(get_process_pool(), screen_file, str(document_path(row.sha256)), row.content_type)
+        for row in rows
+    ))
+    user_ids = (await db.execute(text(SCREENED_SQL), {
+        "ids": [row.id for row in rows],
+        "statuses": [KYCDocumentStatus.IN_REVIEW.name if reason is None else KYCDocumentStatus.REJECTED.name
+                     for reason in reasons],
+        "notes": list(reasons),
+    })).scalars().all()
+    await sync_kyc_status(db, user_ids)
+    await db.commit()
+
+    _metrics.screened += len(rows)
+    _metrics.screening_rejected += sum(1 for reason in reasons if reason is not None)
+    return len(rows)
+
+
+async def drain_screening(batch_size: Optional[int] = None) -> int:
+    """Screen batches until no queued document is left; returns documents screened."""
+    from app.core.database import AsyncSessionLocal
+    batch_size = batch_size or settings.KYC_SCREENING_BATCH_SIZE
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            screened = await process_screening_batch(db, batch_size)
+        total += screened
+        if screened < batch_size:
+            return total
+
+
+def _sweep_parts(max_age_seconds: float) -> int:
+    """Delete part and temp files nobody has written to within max_age_seconds."""
+    removed = 0
+    cutoff = time.time() - max_age_seconds
+    root = _kyc_root() / "parts"
+    if not root.exists():
+        return 0
+    for entry in os.scandir(root):
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+async def prune_stale_uploads(db: AsyncSession) -> int:
+    """Delete resumable uploads left unfinished past KYC_UPLOAD_EXPIRY_HOURS."""
+    ids = (await db.execute(text(PRUNE_SQL), {"hours": settings.KYC_UPLOAD_EXPIRY_HOURS})).scalars().all()
+    await db.commit()
+    for document_id in ids:
+        _hashers.delete(document_id)
+        await _remove(part_path(document_id))
+    # Bodies cut off mid-request leave temp files behind
+    await asyncio.get_running_loop().run_in_executor(
+        None, _sweep_parts, settings.KYC_UPLOAD_EXPIRY_HOURS * 3600
+    )
+    _metrics.pruned_uploads += len(ids)
+    return len(ids)
+
+
+async def kyc_upload_stats(db: AsyncSession) -> Dict[str, Any]:
+    backlog = (await db.execute(text(BACKLOG_SQL))).one()
+    return {
+        **asdict(_metrics),
+        "uploading": backlog.uploading,
+        "queued": backlog.queued,
+        "in_review": backlog.in_review,
+    }
+
+
+_wake = asyncio.Event()
+_worker: Optional[asyncio.Task] = None
+
+
+def wake_kyc_screening():
+    """Signal this process's screening worker that a document was queued."""
+    _wake.set()
+
+
+async def _worker_loop(interval: float):
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await drain_screening()
+        except Exception:
+            logger.exception("KYC screening batch failed; documents stay queued")
+            await asyncio.sleep(interval)
+
+
+def start_kyc_screening():
+    """Start the screening worker task; called on application startup."""
+    global _worker
+    if _worker is None:
+        _worker = asyncio.create_task(_worker_loop(settings.KYC_SCREENING_POLL_INTERVAL_SECONDS))
+
+
+async def stop_kyc_screening():
+    """Stop the screening worker; queued documents are picked up on the next start."""
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+
+
+async def main():
+    """Entry point for a standalone screening run and the prune of abandoned uploads."""
+    from app.core.database import AsyncSessionLocal
+    screened = await drain_screening()
+    async with AsyncSessionLocal() as db:
+        pruned = await prune_stale_uploads(db)
+        print(f"KYC documents: {screened} screened, {pruned} abandoned uploads pruned, {await kyc_upload_stats(db)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
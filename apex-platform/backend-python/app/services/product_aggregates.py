@@ -0,0 +1,151 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
+from typing import Optional, Dict, Any
+import asyncio
+import math
+import time
+
+from app.core.config import settings
+from app.services.product_cache import invalidate_product_details
+
+MIN_RATING = 1
+MAX_RATING = 5
+
+# Running mean updates evaluated against the row's current values, so
+# concurrent reviews of one part serialize on the row lock instead of
+# overwriting each other
+ADD_RATING_SQL = """
+    UPDATE autoparts
+    SET rating_count = rating_count + 1,
+        rating_average = rating_average + (CAST(:rating AS float8) - rating_average) / (rating_count + 1)
+    WHERE sku = :sku
+    RETURNING rating_average, rating_count
+"""
+
+CHANGE_RATING_SQL = """
+    UPDATE autoparts
+    SET rating_average = rating_average + (CAST(:rating AS float8) - CAST(:previous AS float8)) / rating_count
+    WHERE sku = :sku AND rating_count > 0
+    RETURNING rating_average, rating_count
+"""
+
+REMOVE_RATING_SQL = """
+    UPDATE autoparts
+    SET rating_count = rating_count - 1,
+        rating_average = CASE WHEN rating_count <= 1 THEN 0
+                              ELSE (rating_average * rating_count - CAST(:previous AS float8)) / (rating_count - 1) END
+    WHERE sku = :sku AND rating_count > 0
+    RETURNING rating_average, rating_count
+"""
+
+# Decayed score per part from daily sales, top N listed parts per category,
+# and one UPDATE that only touches rows whose flag changes
+BESTSELLER_SQL = """
+WITH scores AS (
+    SELECT part_id, sum(quantity * exp(-CAST(:decay AS float8) * (CAST(:today AS date) - day))) AS score
+    FROM autopart_daily_sales
+    WHERE day >= :window_start
+    GROUP BY part_id
+),
+ranked AS (
+    SELECT p.id, row_number() OVER (PARTITION BY p.category ORDER BY s.score DESC, p.id) AS rank
+    FROM scores s
+    JOIN autoparts p ON p.id = s.part_id
+    WHERE s.score >= CAST(:min_score AS float8) AND p.status IN ('ACTIVE', 'OUT_OF_STOCK')
+),
+top AS (
+    SELECT id FROM ranked WHERE rank <= :top_n
+),
+changes AS (
+    SELECT id, true AS flag FROM top
+    UNION ALL
+    SELECT id, false FROM autoparts WHERE is_bestseller AND id NOT IN (SELECT id FROM top)
+)
+UPDATE autoparts p
+SET is_bestseller = c.flag
+FROM changes c
+WHERE p.id = c.id AND p.is_bestseller <> c.flag
+RETURNING p.sku, p.is_bestseller
+"""
+
+
+def _check_rating(value: float):
+    if not MIN_RATING <= value <= MAX_RATING:
+        raise ValueError(f"Rating must be between {MIN_RATING} and {MAX_RATING}")
+
+
+async def _apply(db: AsyncSession, sql: str, sku: str, **params) -> Optional[Dict[str, Any]]:
+    row = (await db.execute(text(sql), {"sku": sku, **params})).one_or_none()
+    await db.commit()
+    if row is None:
+        return None
+    await invalidate_product_details([sku])
+    return {"rating_average": row.rating_average, "rating_count": row.rating_count}
+
+
+async def add_rating(db: AsyncSession, sku: str, rating: float) -> Optional[Dict[str, Any]]:
+    """Fold a new review into rating_average/rating_count; None if the part is unknown."""
+    _check_rating(rating)
+    return await _apply(db, ADD_RATING_SQL, sku, rating=rating)
+
+
+async def change_rating(db: AsyncSession, sku: str, previous: float, rating: float) -> Optional[Dict[str, Any]]:
+    """Replace an edited review's rating without changing the count."""
+    _check_rating(previous)
+    _check_rating(rating)
+    return await _apply(db, CHANGE_RATING_SQL, sku, previous=previous, rating=rating)
+
+
+async def remove_rating(db: AsyncSession, sku: str, previous: float) -> Optional[Dict[str, Any]]:
+    """Take a deleted review's rating back out of the aggregates."""
+    _check_rating(previous)
+    return await _apply(db, REMOVE_RATING_SQL, sku, previous=previous)
+
+
+async def refresh_bestsellers(
+    db: AsyncSession,
+    top_n: Optional[int] = None,
+    half_life_days: Optional[float] = None,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Flag the top N parts per category by exponentially decayed sales.
+
+    A unit sold d days ago weighs 0.5 ** (d / half_life_days), so recent
+    demand outranks lifetime totals. Scores come from autopart_daily_sales
+    within BESTSELLER_WINDOW_DAYS and flags change in a single UPDATE;
+    cached details of the parts whose flag changed are invalidated.
+    """
+    top_n = top_n or settings.BESTSELLER_TOP_N
+    half_life_days = half_life_days or settings.BESTSELLER_HALF_LIFE_DAYS
+    today = today or date.today()
+    started = time.perf_counter()
+
+    rows = (await db.execute(text(BESTSELLER_SQL), {
+        "decay": math.log(2) / half_life_days,
+        "today": today,
+        "window_start": today - timedelta(days=settings.BESTSELLER_WINDOW_DAYS),
+        "min_score": settings.BESTSELLER_MIN_SCORE,
+        "top_n": top_n,
+    })).all()
+    await db.commit()
+    await invalidate_product_details(row.sku for row in rows)
+
+    flagged = sum(1 for row in rows if row.is_bestseller)
+    return {
+        "flagged": flagged,
+        "unflagged": len(rows) - flagged,
+        "elapsed_ms": int((time.perf_counter() - started) * 1000),
+    }
+
+
+async def main():
+    """Entry point for the bestseller ranking job."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        totals = await refresh_bestsellers(db)
+        print(f"Bestseller refresh: {totals}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
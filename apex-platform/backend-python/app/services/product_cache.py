@@ -0,0 +1,149 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import datetime, date
+from enum import Enum
+from typing import Optional, Dict, Any, Iterable
+import hashlib
+import json
+
+from app.core.cache import get_cache, invalidate_tags
+from app.core.config import settings
+from app.models.autopartes import AutoPart
+
+DETAIL_KEY = "detail:{sku}"
+STOCK_KEY = "stock:{sku}"
+# Per-SKU tags: invalidating through tag versions, rather than deleting the
+# keys, keeps a load that read the row before the writer committed from
+# storing its stale payload afterwards
+DETAIL_TAG = "autopart:detail:{sku}"
+STOCK_TAG = "autopart:stock:{sku}"
+# Tag of the cached catalog listings (browse, interchange); stock changes
+# alone do not bump it, listings pick those up within their short TTL
+CATALOG_TAG = "catalog"
+
+# Columns that change with every sale or reservation stay out of the detail
+# payload; availability and status are served through the stock key instead
+VOLATILE_COLUMNS = ("stock_quantity", "reserved_quantity", "available_quantity", "status", "updated_at")
+# Internal columns that never leave the backend
+PRIVATE_COLUMNS = ("search_vector", "feed_hash", "cost_price", "profit_margin", "supplier_id")
+
+DETAIL_COLUMNS = tuple(
+    column for column in AutoPart.__table__.columns
+    if column.key not in VOLATILE_COLUMNS + PRIVATE_COLUMNS
+)
+STOCK_SELECT = tuple(AutoPart.__table__.columns[name] for name in ("available_quantity", "status"))
+
+# Detail and stock entries share the generic cache for single-flight, the
+# fleet-wide rebuild lock and early refresh. Each value is the serialized
+# body with its ETag, so a hit is spliced into the response as is.
+_cache = get_cache(
+    "autopart",
+    local_ttl=settings.PRODUCT_CACHE_LOCAL_TTL_SECONDS,
+    local_max_entries=settings.PRODUCT_CACHE_LOCAL_MAX_ENTRIES,
+)
+
+
+class _NotFound(LookupError):
+    """Raised by a loader for an unknown SKU, so the miss is not cached."""
+
+
+@dataclass
+class ProductResponse:
+    etag: str
+    body: bytes
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _serialize(payload: Dict[str, Any]) -> Dict[str, str]:
+    """The JSON body of a payload and its strong ETag."""
+    body = json.dumps(payload, default=_json_default, separators=(",", ":"), ensure_ascii=False)
+    return {"etag": hashlib.blake2b(body.encode(), digest_size=8).hexdigest(), "body": body}
+
+
+async def _load_detail(db: AsyncSession, sku: str) -> Dict[str, str]:
+    row = (await db.execute(select(*DETAIL_COLUMNS).where(AutoPart.sku == sku))).mappings().one_or_none()
+    if row is None:
+        raise _NotFound(sku)
+    return _serialize(dict(row))
+
+
+async def _load_stock(db: AsyncSession, sku: str) -> Dict[str, str]:
+    row = (await db.execute(select(*STOCK_SELECT).where(AutoPart.sku == sku))).mappings().one_or_none()
+    if row is None:
+        raise _NotFound(sku)
+    available = row["available_quantity"]
+    return _serialize({**row, "is_in_stock": available > 0})
+
+
+async def get_product_detail(db: AsyncSession, sku: str) -> Optional[ProductResponse]:
+    """Product detail payload with live inventory, served from the caches.
+
+    The detail (everything except stock) and the small stock entry are
+    cached under separate keys; the response joins the two serialized
+    bodies without re-encoding, and its ETag changes when either does.
+    """
+    try:
+        detail = await _cache.get_or_load(
+            DETAIL_KEY.format(sku=sku), lambda: _load_detail(db, sku), settings.PRODUCT_CACHE_TTL_SECONDS,
+            tags=(DETAIL_TAG.format(sku=sku),),
+        )
+        stock = await _cache.get_or_load(
+            STOCK_KEY.format(sku=sku), lambda: _load_stock(db, sku), settings.PRODUCT_STOCK_TTL_SECONDS,
+            tags=(STOCK_TAG.format(sku=sku),),
+        )
+    except _NotFound:
+        return None
+    body = detail["body"][:-1] + ',"inventory":' + stock["body"] + "}"
+    return ProductResponse(etag=f'"{detail["etag"]}-{stock["etag"]}"', body=body.encode())
+
+
+async def _invalidate(tags: Iterable[str], chunk_size: int) -> bool:
+    batch = []
+    invalidated = False
+    for tag in tags:
+        batch.append(tag)
+        if len(batch) >= chunk_size:
+            await invalidate_tags(*batch)
+            batch = []
+            invalidated = True
+    if batch:
+        await invalidate_tags(*batch)
+        invalidated = True
+    return invalidated
+
+
+async def invalidate_products(skus: Iterable[str], chunk_size: int = 1000):
+    """Expire cached detail and stock for SKUs after price, content or status changes,
+    and the catalog listings that may show them."""
+    tags = (tag.format(sku=sku) for sku in skus for tag in (DETAIL_TAG, STOCK_TAG))
+    if await _invalidate(tags, chunk_size):
+        await invalidate_tags(CATALOG_TAG)
+
+
+async def invalidate_product_details(skus: Iterable[str], chunk_size: int = 1000):
+    """Expire only the cached detail for SKUs after changes the catalog listings
+    do not show (ratings, bestseller flag), leaving CATALOG_TAG alone."""
+    await _invalidate((DETAIL_TAG.format(sku=sku) for sku in skus), chunk_size)
+
+
+async def invalidate_stock(skus: Iterable[str], chunk_size: int = 1000):
+    """Expire only the stock entry for SKUs whose quantities changed."""
+    await _invalidate((STOCK_TAG.format(sku=sku) for sku in skus), chunk_size)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match comparison (weak, so W/ prefixes are ignored)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
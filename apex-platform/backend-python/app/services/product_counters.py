@@ -0,0 +1,237 @@
+from sqlalchemy import select, update, values, column, func, cast, Integer, Float, String, Date, DateTime
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+from app.models.autopart_sales import AutoPartDailySales
+from app.models.autopartes import AutoPart
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingCounters:
+    views: int = 0
+    sold: int = 0
+    revenue: float = 0.0
+    last_sold_at: Optional[datetime] = None
+    events: int = 0
+
+    def merge(self, other: "PendingCounters"):
+        self.views += other.views
+        self.sold += other.sold
+        self.revenue += other.revenue
+        self.events += other.events
+        if other.last_sold_at and (self.last_sold_at is None or other.last_sold_at > self.last_sold_at):
+            self.last_sold_at = other.last_sold_at
+
+
+@dataclass
+class CounterMetrics:
+    flushes: int = 0
+    failed_flushes: int = 0
+    rows_flushed: int = 0
+    events_flushed: int = 0
+    last_flush_at: Optional[datetime] = None
+    last_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+
+
+def _counter_values(rows: List[tuple]):
+    return values(
+        column("sku", String),
+        column("views", Integer),
+        column("sold", Integer),
+        column("revenue", Float),
+        column("last_sold_at", DateTime(timezone=True)),
+        name="v",
+    ).data(rows)
+
+
+def _daily_sales_upsert(v):
+    """Add a chunk's sales to the per-day rows of autopart_daily_sales.
+
+    A flush covers a few seconds, so each part's sales are booked on the
+    day of its latest sale in the flush.
+    """
+    stmt = insert(AutoPartDailySales).from_select(
+        ["part_id", "day", "quantity", "revenue"],
+        select(AutoPart.id, cast(v.c.last_sold_at, Date), v.c.sold, v.c.revenue).where(AutoPart.sku == v.c.sku),
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[AutoPartDailySales.part_id, AutoPartDailySales.day],
+        set_={
+            "quantity": AutoPartDailySales.quantity + stmt.excluded.quantity,
+            "revenue": AutoPartDailySales.revenue + stmt.excluded.revenue,
+            "updated_at": func.now(),
+        },
+    )
+
+
+class CounterBuffer:
+    """In-process write-behind buffer for AutoPart view and sales counters.
+
+    Increments are aggregated per SKU in memory and applied by flush() as
+    one UPDATE ... FROM (VALUES ...) per chunk, so a burst of views on a
+    popular part costs a single row update per flush. Sales are also added
+    to autopart_daily_sales for demand history. At most one flush
+    interval (or COUNTER_MAX_PENDING_PARTS parts) of increments is lost if
+    the process dies; a failed flush puts its increments back.
+    """
+
+    def __init__(self, max_pending_parts: int, chunk_size: int):
+        self.max_pending_parts = max_pending_parts
+        self.chunk_size = chunk_size
+        self.pending: Dict[str, PendingCounters] = {}
+        self.metrics = CounterMetrics()
+        self.flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+
+    def _entry(self, sku: str) -> PendingCounters:
+        entry = self.pending.get(sku)
+        if entry is None:
+            entry = self.pending[sku] = PendingCounters()
+            if len(self.pending) >= self.max_pending_parts:
+                self.flush_requested.set()
+        entry.events += 1
+        return entry
+
+    def record_view(self, sku: str, count: int = 1):
+        self._entry(sku).views += count
+
+    def record_sale(self, sku: str, quantity: int, revenue: float, sold_at: Optional[datetime] = None):
+        entry = self._entry(sku)
+        entry.sold += quantity
+        entry.revenue += revenue
+        sold_at = sold_at or datetime.now(timezone.utc)
+        if entry.last_sold_at is None or sold_at > entry.last_sold_at:
+            entry.last_sold_at = sold_at
+
+    def _restore(self, batch: Dict[str, PendingCounters]):
+        for sku, counters in batch.items():
+            self.pending.setdefault(sku, PendingCounters()).merge(counters)
+
+    async def flush(self, db: AsyncSession) -> int:
+        """Apply every pending increment; returns the number of parts updated."""
+        async with self._flush_lock:
+            self.flush_requested.clear()
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+            started = time.perf_counter()
+
+            rows = [
+                (sku, c.views, c.sold, c.revenue, c.last_sold_at)
+                for sku, c in sorted(batch.items())
+            ]
+            updated = 0
+            try:
+                for start in range(0, len(rows), self.chunk_size):
+                    v = _counter_values(rows[start:start + self.chunk_size])
+                    stmt = (
+                        update(AutoPart)
+                        .where(AutoPart.sku == v.c.sku)
+                        .values(
+                            view_count=AutoPart.view_count + v.c.views,
+                            total_sold=AutoPart.total_sold + v.c.sold,
+                            total_revenue=AutoPart.total_revenue + v.c.revenue,
+                            # A chunk without sales has an all-NULL, untyped column
+                            last_sold_at=func.greatest(
+                                AutoPart.last_sold_at, cast(v.c.last_sold_at, DateTime(timezone=True))
+                            ),
+                        )
+                        .execution_options(synchronize_session=False)
+                    )
+                    updated += (await db.execute(stmt)).rowcount
+                    sales = [row for row in rows[start:start + self.chunk_size] if row[2] > 0]
+                    if sales:
+                        await db.execute(_daily_sales_upsert(_counter_values(sales)))
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                self._restore(batch)
+                self.metrics.failed_flushes += 1
+                logger.exception("Counter flush failed; %d parts kept for the next flush", len(batch))
+                raise
+
+            elapsed = time.perf_counter() - started
+            self.metrics.flushes += 1
+            self.metrics.rows_flushed += updated
+            self.metrics.events_flushed += sum(c.events for c in batch.values())
+            self.metrics.last_flush_at = datetime.now(timezone.utc)
+            self.metrics.last_flush_seconds = elapsed
+            self.metrics.max_flush_seconds = max(self.metrics.max_flush_seconds, elapsed)
+            return updated
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.metrics),
+            "pending_parts": len(self.pending),
+            "pending_events": sum(c.events for c in self.pending.values()),
+        }
+
+
+_buffer = CounterBuffer(
+    max_pending_parts=settings.COUNTER_MAX_PENDING_PARTS,
+    chunk_size=settings.COUNTER_FLUSH_CHUNK_SIZE,
+)
+_flusher: Optional[asyncio.Task] = None
+
+
+def record_view(sku: str, count: int = 1):
+    """Count product views; applied to AutoPart.view_count on the next flush."""
+    _buffer.record_view(sku, count)
+
+
+def record_sale(sku: str, quantity: int, revenue: float, sold_at: Optional[datetime] = None):
+    """Count a sale; applied to total_sold, total_revenue and last_sold_at on the next flush."""
+    _buffer.record_sale(sku, quantity, revenue, sold_at)
+
+
+def counter_stats() -> Dict[str, Any]:
+    return _buffer.stats()
+
+
+async def flush_counters() -> int:
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        return await _buffer.flush(db)
+
+
+async def _flush_loop(interval: float):
+    while True:
+        try:
+            await asyncio.wait_for(_buffer.flush_requested.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await flush_counters()
+        except Exception:
+            # Already logged and restored; try again on the next tick
+            pass
+
+
+def start_counter_flusher():
+    """Start the periodic flush task; called on application startup."""
+    global _flusher
+    if _flusher is None:
+        _flusher = asyncio.create_task(_flush_loop(settings.COUNTER_FLUSH_INTERVAL_SECONDS))
+
+
+async def stop_counter_flusher():
+    """Stop the flush task and write out what is left; called on shutdown."""
+    global _flusher
+    if _flusher is not None:
+        _flusher.cancel()
+        try:
+            await _flusher
+        except asyncio.CancelledError:
+            pass
+        _flusher = None
+    await flush_counters()
@@ -0,0 +1,336 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional, Dict, Any, BinaryIO, Tuple
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.core.config import settings
+from app.core.executors import get_process_pool
+from app.models.autopartes import AutoPart
+from app.services.product_cache import invalidate_products
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels. URLs are served as immutable, so changing a
+# variant's size needs a new variant name rather than an edit in place.
+VARIANTS = {"thumb": 160, "card": 400, "detail": 1200}
+FORMATS = {"webp": "image/webp", "jpeg": "image/jpeg"}
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+READ_CHUNK_BYTES = 1024 * 1024
+TOUCH_INTERVAL_SECONDS = 3600  # Refresh a derivative's mtime (its LRU clock) at most this often
+
+
+@dataclass
+class StoredImage:
+    digest: str
+    format: str
+    width: int
+    height: int
+    size_bytes: int
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            **asdict(self),
+            "urls": {
+                f"{variant}.{fmt}": image_url(self.digest, variant, fmt)
+                for variant in VARIANTS for fmt in FORMATS
+            },
+        }
+
+
+def _image_root() -> Path:
+    return Path(settings.UPLOAD_DIR) / "images"
+
+
+def original_path(digest: str) -> Path:
+    return _image_root() / "originals" / digest[:2] / digest
+
+
+def derivative_path(digest: str, variant: str, fmt: str) -> Path:
+    return _image_root() / "derived" / variant / digest[:2] / f"{digest}.{fmt}"
+
+
+def image_url(digest: str, variant: str, fmt: str = "webp") -> str:
+    return f"{settings.API_V1_STR}/autopartes/images/{digest}/{variant}.{fmt}"
+
+
+def probe_image(path: str) -> Tuple[str, int, int]:
+    """Validate an uploaded file as an image; runs in the process pool."""
+    try:
+        with Image.open(path) as image:
+            fmt, (width, height) = image.format, image.size
+            if width * height > settings.IMAGE_MAX_PIXELS:
+                raise ValueError(f"Image is too large ({width}x{height})")
+            image.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as exc:
+        raise ValueError(f"Uploaded file is not a supported image: {exc}")
+    return fmt, width, height
+
+
+def render_derivative(source: str, target: str, max_side: int, fmt: str, quality: int) -> int:
+    """Downscale `source` into `target`; runs in the process pool.
+
+    JPEG sources are decoded at a reduced scale via draft() before the
+    LANCZOS resize, which does most of the work for large photos. The file
+    is written next to the target and renamed, so readers never see a
+    partial image. Returns the derivative size in bytes.
+    """
+    with Image.open(source) as image:
+        image.draft("RGB", (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        has_alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        if fmt == "webp" and has_alpha:
+            image = image.convert("RGBA")
+        elif has_alpha:
+            # JPEG has no alpha; flatten onto white instead of the hidden pixel colors
+            rgba = image.convert("RGBA")
+            image = Image.new("RGB", rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel("A"))
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+        image.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        if fmt == "webp":
+            image.save(tmp, format="WEBP", quality=quality, method=4)
+        else:
+            image.save(tmp, format="JPEG", quality=quality, optimize=True, progressive=True)
+    os.replace(tmp, target)
+    return os.path.getsize(target)
+
+
+def _write_upload(source: BinaryIO, max_bytes: int) -> Tuple[str, Path, int]:
+    """Stream an upload to a temp file while hashing it; blocking, runs in a thread."""
+    tmp_dir = _image_root() / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / uuid.uuid4().hex
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, "wb") as out:
+            while chunk := source.read(READ_CHUNK_BYTES):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ValueError(f"Image exceeds the {max_bytes // (1024 * 1024)}MB upload limit")
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest(), tmp, size
+
+
+def _commit_upload(tmp: Path, target: Path):
+    if target.exists():
+        # Same bytes were uploaded before; keep the existing original
+        tmp.unlink(missing_ok=True)
+        return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(tmp, target)
+
+
+async def store_image(source: BinaryIO) -> StoredImage:
+    """Store an uploaded image under UPLOAD_DIR, addressed by its SHA-256.
+
+    Only the original is written here; derivatives are rendered on their
+    first request. Re-uploading identical bytes is a no-op.
+    """
+    loop = asyncio.get_running_loop()
+    digest, tmp, size = await loop.run_in_executor(None, _write_upload, source, settings.MAX_UPLOAD_SIZE)
+    try:
+        fmt, width, height = await loop.run_in_executor(get_process_pool(), probe_image, str(tmp))
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    await loop.run_in_executor(None, _commit_upload, tmp, original_path(digest))
+    return StoredImage(digest=digest, format=fmt, width=width, height=height, size_bytes=size)
+
+
+async def attach_image(db: AsyncSession, part: AutoPart, image: StoredImage):
+    """Add an uploaded image to a part; the first one becomes its primary image."""
+    url = image_url(image.digest, "detail")
+    urls = list(part.image_urls or [])
+    if url not in urls:
+        urls.append(url)
+    part.image_urls = urls
+    if not part.primary_image_url:
+        part.primary_image_url = url
+    await db.commit()
+    await invalidate_products([part.sku])
+
+
+async def get_part_by_sku(db: AsyncSession, sku: str) -> Optional[AutoPart]:
+    return (await db.execute(select(AutoPart).where(AutoPart.sku == sku))).scalar_one_or_none()
+
+
+class DerivativeCache:
+    """Lazily rendered, size-bounded on-disk cache of image derivatives.
+
+    Concurrent requests for a missing derivative in this process share one
+    render; across workers a duplicate render is harmless because every
+    writer renames a complete file onto the same content-addressed path.
+    Files are evicted least-recently-used first, using mtime as the access
+    clock, once the cache grows past IMAGE_DERIVATIVE_CACHE_MAX_BYTES.
+    Originals are never evicted.
+    """
+
+    def __init__(self, max_bytes: int, low_watermark: float):
+        self.max_bytes = max_bytes
+        self.low_watermark = low_watermark
+        self._inflight: Dict[Path, asyncio.Future] = {}
+        self._written_since_sweep = 0
+        self._sweeping = False
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.evicted_files = 0
+
+    async def get(self, digest: str, variant: str, fmt: str) -> Optional[Path]:
+        """Path of the derivative, rendering it first if needed; None if the original is unknown."""
+        if not DIGEST_RE.match(digest) or variant not in VARIANTS or fmt not in FORMATS:
+            return None
+        target = derivative_path(digest, variant, fmt)
+        try:
+            _touch(target, target.stat().st_mtime)
+            return target
+        except FileNotFoundError:
+            pass
+
+        source = original_path(digest)
+        if not source.exists():
+            return None
+
+        pending = self._inflight.get(target)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[target] = future
+        try:
+            await self._render(source, target, VARIANTS[variant], fmt)
+            future.set_result(target)
+            return target
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(target, None)
+
+    async def _render(self, source: Path, target: Path, max_side: int, fmt: str):
+        quality = settings.IMAGE_WEBP_QUALITY if fmt == "webp" else settings.IMAGE_JPEG_QUALITY
+        started = time.perf_counter()
+        written = await asyncio.get_running_loop().run_in_executor(
+            get_process_pool(), render_derivative, str(source), str(target), max_side, fmt, quality
+        )
+        self.renders += 1
+        self.render_seconds += time.perf_counter() - started
+
+        # Sweep after writing a few percent of the budget instead of
+        # scanning the directory on every render
+        self._written_since_sweep += written
+        if self._written_since_sweep >= self.max_bytes * (1 - self.low_watermark) / 2 and not self._sweeping:
+            self._written_since_sweep = 0
+            self._sweeping = True
+            asyncio.get_running_loop().run_in_executor(None, self._sweep)
+
+    def _sweep(self):
+        try:
+            self.evicted_files += evict_derivatives(self.max_bytes, self.low_watermark)
+        except Exception:
+            logger.exception("Image derivative eviction failed")
+        finally:
+            self._sweeping = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "renders": self.renders,
+            "render_seconds": round(self.render_seconds, 3),
+            "rendering": len(self._inflight),
+            "evicted_files": self.evicted_files,
+        }
+
+
+def _touch(path: Path, mtime: float):
+    if time.time() - mtime > TOUCH_INTERVAL_SECONDS:
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+
+def evict_derivatives(max_bytes: int, low_watermark: float) -> int:
+    """Delete least recently used derivatives until the cache fits; returns files removed.
+
+    Nothing is deleted while the cache is under max_bytes; past it, files
+    go oldest first down to low_watermark * max_bytes so the next sweep is
+    not due right away.
+    """
+    root = _image_root() / "derived"
+    entries = []
+    total = 0
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith(".tmp"):
+                # Left behind by a worker that died mid-render
+                if time.time() - st.st_mtime > TOUCH_INTERVAL_SECONDS:
+                    os.unlink(path)
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+    if total <= max_bytes:
+        return 0
+    target = max_bytes * low_watermark
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= target:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    logger.info("Evicted %d image derivatives; cache now %.1f MB", removed, total / 1e6)
+    return removed
+
+
+_derivatives = DerivativeCache(
+    max_bytes=settings.IMAGE_DERIVATIVE_CACHE_MAX_BYTES,
+    low_watermark=settings.IMAGE_DERIVATIVE_CACHE_LOW_WATERMARK,
+)
+
+
+async def get_derivative(digest: str, variant: str, fmt: str) -> Optional[Path]:
+    return await _derivatives.get(digest, variant, fmt)
+
+
+def derivative_stats() -> Dict[str, Any]:
+    return _derivatives.stats()
+
+
+def main():
+    """Entry point for a periodic eviction sweep (cron)."""
+    removed = evict_derivatives(
+        settings.IMAGE_DERIVATIVE_CACHE_MAX_BYTES, settings.IMAGE_DERIVATIVE_CACHE_LOW_WATERMARK
+    )
+    print(f"Image derivative eviction: {removed} files removed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Set, Callable, Iterable, List, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.redis import get_redis
+
+logger = logging.getLogger(__name__)
+
+SLOW_CONSUMER_CLOSE_CODE = 1013  # "Try again later": the client reconnects and refetches
+SUBSCRIBE_CHUNK_SIZE = 1000
+
+Deliver = Callable[[Optional[int], Dict[str, Any]], None]
+
+
+@dataclass
+class RealtimeMetrics:
+    connections_opened: int = 0
+    connections_closed: int = 0
+    dropped_slow: int = 0
+    published: int = 0
+    publish_failures: int = 0
+    queued: int = 0
+    coalesced: int = 0
+    frames_sent: int = 0
+
+
+class PushConnection:
+    """Outgoing updates of one WebSocket.
+
+    Updates are keyed by object ("wallet:12"), and a key already waiting is
+    overwritten, so a burst of changes to one object goes out once with its
+    latest state. Frames are sent at most once per coalescing interval. A
+    client that lets more than max_pending objects queue up, or does not
+    accept a frame within the send timeout, is closed as a slow consumer.
+    """
+    __slots__ = ("hub", "send", "pending", "ready", "closed", "slow", "last_sent")
+
+    def __init__(self, hub: "RealtimeHub", send: Callable[[str], Any]):
+        self.hub = hub
+        self.send = send
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.slow = False
+        self.last_sent = 0.0
+
+    def push(self, key: str, update: Dict[str, Any]):
+        if self.closed:
+            return
+        metrics = self.hub.metrics
+        if key in self.pending:
+            metrics.coalesced += 1
+        elif len(self.pending) >= self.hub.max_pending:
+            self.slow = True
+            self.close()
+            return
+        self.pending[key] = update
+        metrics.queued += 1
+        self.ready.set()
+
+    def close(self):
+        self.closed = True
+        self.ready.set()
+
+    async def run(self):
+        """Send queued updates until the connection closes."""
+        hub = self.hub
+        while True:
+            await self.ready.wait()
+            wait = self.last_sent + hub.coalesce_seconds - time.monotonic()
+            if wait > 0 and not self.closed:
+                await asyncio.sleep(wait)
+            self.ready.clear()
+            if self.closed:
+                return
+            batch, self.pending = self.pending, {}
+            try:
+                await asyncio.wait_for(
+                    self.send(json.dumps({"updates": list(batch.values())}, default=str)),
+                    hub.send_timeout,
+                )
+            except asyncio.TimeoutError:
+                self.slow = True
+                return
+            except Exception:
+                # Client went away mid-send
+                return
+            self.last_sent = time.monotonic()
+            hub.metrics.frames_sent += 1
+
+
+class InProcessBroker:
+    """Delivers published updates to this process's hub only.
+
+    Stand-in for RedisBroker in tests and single-worker deployments.
+    """
+
+    def __init__(self):
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver, users: Callable[[], Iterable[int]]):
+        self._deliver = deliver
+
+    def users_changed(self):
+        pass
+
+    async def publish(self, user_id: Optional[int], update: Dict[str, Any]):
+        if self._deliver is not None:
+            self._deliver(user_id, update)
+
+    async def publish_many(self, updates: List[Tuple[Optional[int], Dict[str, Any]]]):
+        for user_id, update in updates:
+            await self.publish(user_id, update)
+
+    async def close(self):
+        self._deliver = None
+
+
+class RedisBroker:
+    """Fans updates out to every worker through Redis pub/sub.
+
+    Each worker keeps one pub/sub connection subscribed to the channels of
+    the users connected to it, so a message only reaches workers with a
+    listener. Subscriptions are reconciled against the connected users in
+    batches: a reconnect storm costs a few SUBSCRIBE commands, not one per
+    socket. Publishing goes through the shared client and its short
+    timeout; an update lost to a Redis hiccup is corrected by the client's
+    resync on reconnect.
+    """
+
+    def __init__(self, url: str, prefix: str):
+        self.url = url
+        self.prefix = prefix
+        self.broadcast_channel = f"{prefix}all"
+        self._client: Optional[Redis] = None
+        self._pubsub = None
+        self._deliver: Optional[Deliver] = None
+        self._users: Callable[[], Iterable[int]] = lambda: ()
+        self._subscribed: Set[str] = set()
+        self._changed = asyncio.Event()
+        self._tasks: list = []
+
+    def channel(self, user_id: Optional[int]) -> str:
+        return self.broadcast_channel if user_id is None else f"{self.prefix}{user_id}"
+
+    async def start(self, deliver: Deliver, users: Callable[[], Iterable[int]]):
+        self._deliver = deliver
+        self._users = users
+        # Blocking reads wait for messages, so no socket timeout here
+        self._client = Redis.from_url(self.url, health_check_interval=30)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self.broadcast_channel)
+        self._tasks = [asyncio.create_task(self._read_loop()), asyncio.create_task(self._sync_loop())]
+        self._changed.set()
+
+    def users_changed(self):
+        self._changed.set()
+
+    async def publish(self, user_id: Optional[int], update: Dict[str, Any]):
+        await get_redis().publish(self.channel(user_id), json.dumps(update, default=str))
+
+    async def publish_many(self, updates: List[Tuple[Optional[int], Dict[str, Any]]]):
+        async with get_redis().pipeline(transaction=False) as pipe:
+            for user_id, update in updates:
+                pipe.publish(self.channel(user_id), json.dumps(update, default=str))
+            await pipe.execute()
+
+    async def _read_loop(self):
+        prefix_length = len(self.prefix)
+        while True:
+            try:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                channel = message["channel"].decode()
+                user_id = None if channel == self.broadcast_channel else int(channel[prefix_length:])
+                self._deliver(user_id, json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Realtime pub/sub read failed; retrying")
+                await asyncio.sleep(1)
+
+    async def _sync_loop(self):
+        while True:
+            await self._changed.wait()
+            self._changed.clear()
+            desired = {self.channel(user_id) for user_id in self._users()}
+            try:
+                subscribe = sorted(desired - self._subscribed)
+                for start in range(0, len(subscribe), SUBSCRIBE_CHUNK_SIZE):
+                    chunk = subscribe[start:start + SUBSCRIBE_CHUNK_SIZE]
+                    await self._pubsub.subscribe(*chunk)
+                    self._subscribed.update(chunk)
+                unsubscribe = sorted(self._subscribed - desired)
+                for start in range(0, len(unsubscribe), SUBSCRIBE_CHUNK_SIZE):
+                    chunk = unsubscribe[start:start + SUBSCRIBE_CHUNK_SIZE]
+                    await self._pubsub.unsubscribe(*chunk)
+                    self._subscribed.difference_update(chunk)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Realtime subscription sync failed; retrying")
+                await asyncio.sleep(1)
+                self._changed.set()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._subscribed = set()
+
+
+class RealtimeHub:
+    """WebSocket connections of this worker, grouped by user."""
+
+    def __init__(self, broker, max_pending: int, coalesce_seconds: float, send_timeout: float):
+        self.broker = broker
+        self.max_pending = max_pending
+        self.coalesce_seconds = coalesce_seconds
+        self.send_timeout = send_timeout
+        self.connections: Dict[int, Set[PushConnection]] = {}
+        self.metrics = RealtimeMetrics()
+
+    async def start(self):
+        await self.broker.start(self.dispatch, self.connections.keys)
+
+    async def stop(self):
+        await self.broker.close()
+        for connections in self.connections.values():
+            for connection in connections:
+                connection.close()
+
+    def dispatch(self, user_id: Optional[int], update: Dict[str, Any]):
+        """Queue an update on the user's connections (every connection if None)."""
+        key = f"{update['type']}:{update['id']}"
+        if user_id is None:
+            targets = [c for connections in self.connections.values() for c in connections]
+        else:
+            targets = self.connections.get(user_id, ())
+        for connection in targets:
+            connection.push(key, update)
+
+    async def publish(self, user_id: Optional[int], update: Dict[str, Any]):
+        self.metrics.published += 1
+        await self.broker.publish(user_id, update)
+
+    async def publish_many(self, updates: List[Tuple[Optional[int], Dict[str, Any]]]):
+        self.metrics.published += len(updates)
+        await self.broker.publish_many(updates)
+
+    async def serve(self, websocket, user_id: int):
+        """Push updates to an accepted WebSocket until either side closes."""
+        connection = PushConnection(self, websocket.send_text)
+        users = self.connections.setdefault(user_id, set())
+        users.add(connection)
+        if len(users) == 1:
+            self.broker.users_changed()
+        self.metrics.connections_opened += 1
+        receiver = asyncio.create_task(self._receive(websocket, connection))
+        try:
+            await connection.run()
+        finally:
+            connection.close()
+            receiver.cancel()
+            users.discard(connection)
+            if not users and self.connections.get(user_id) is users:
+                del self.connections[user_id]
+                self.broker.users_changed()
+            self.metrics.connections_closed += 1
+            if connection.slow:
+                self.metrics.dropped_slow += 1
+                try:
+                    await websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
+                except Exception:
+                    pass
+
+    @staticmethod
+    async def _receive(websocket, connection: PushConnection):
+        # Clients only listen; reading is how a disconnect is noticed
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+        except Exception:
+            pass
+        finally:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **asdict(self.metrics),
+            "connections": sum(len(connections) for connections in self.connections.values()),
+            "users": len(self.connections),
+            "pending_updates": sum(
+                len(c.pending) for connections in self.connections.values() for c in connections
+            ),
+        }
+
+
+_hub: Optional[RealtimeHub] = None
+
+
+def get_hub() -> RealtimeHub:
+    """This worker's hub, backed by the broker named in REALTIME_BROKER."""
+    global _hub
+    if _hub is None:
+        if settings.REALTIME_BROKER == "memory":
+            broker = InProcessBroker()
+        else:
+            broker = RedisBroker(settings.REDIS_URL, settings.REALTIME_CHANNEL_PREFIX)
+        _hub = RealtimeHub(
+            broker,
+            max_pending=settings.REALTIME_MAX_PENDING_UPDATES,
+            coalesce_seconds=settings.REALTIME_COALESCE_MS / 1000,
+            send_timeout=settings.REALTIME_SEND_TIMEOUT_SECONDS,
+        )
+    return _hub
+
+
+async def start_realtime():
+    """Subscribe this worker to the broker; called on application startup."""
+    await get_hub().start()
+
+
+async def stop_realtime():
+    """Close the broker connection and every socket; called on shutdown."""
+    global _hub
+    if _hub is not None:
+        await _hub.stop()
+        _hub = None
+
+
+def make_update(kind: str, object_id: Any, **fields) -> Dict[str, Any]:
+    """Payload of one pushed update: the object's type and id plus its changed fields."""
+    return {"type": kind, "id": object_id, **fields, "at": datetime.now(timezone.utc).isoformat()}
+
+
+async def publish_update(user_id: int, kind: str, object_id: Any, **fields):
+    """Push the new state of an object to the user's sockets on every worker.
+
+    Best effort and only called after the change is committed: the
+    database stays the source of truth and clients refetch on reconnect.
+    """
+    hub = get_hub()
+    try:
+        await hub.publish(user_id, make_update(kind, object_id, **fields))
+    except Exception:
+        hub.metrics.publish_failures += 1
+        logger.warning("Realtime publish of %s %s failed", kind, object_id, exc_info=True)
+
+
+async def publish_updates(updates: List[Tuple[int, Dict[str, Any]]]):
+    """Publish (user_id, make_update(...)) pairs in one round-trip; best effort."""
+    if not updates:
+        return
+    hub = get_hub()
+    try:
+        await hub.publish_many(updates)
+    except Exception:
+        hub.metrics.publish_failures += len(updates)
+        logger.warning("Realtime publish of %d updates failed", len(updates), exc_info=True)
+
+
+def realtime_stats() -> Dict[str, Any]:
+    return get_hub().stats()
@@ -0,0 +1,278 @@
+from sqlalchemy import select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any
+import asyncio
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.purchase_suggestion import PurchaseSuggestion
+from app.services.watermarks import get_watermark, set_watermark
+
+WATERMARK_NAME = "replenishment"
+WATERMARK_OVERLAP_SECONDS = 60  # Counter flushes commit a moment after stamping updated_at
+
+INVENTORY_COLUMNS = (
+    "id", "supplier_id", "available_quantity", "minimum_stock", "maximum_stock",
+    "lead_time_days", "minimum_order_quantity", "cost_price", "units", "units_sq",
+)
+
+# Units sold and sum of squared daily units over the velocity window; days
+# without a row count as zero demand
+INVENTORY_SQL = """
+    SELECT p.id, p.supplier_id, p.available_quantity, p.minimum_stock, p.maximum_stock,
+           p.lead_time_days, p.minimum_order_quantity, p.cost_price,
+           coalesce(s.units, 0) AS units, coalesce(s.units_sq, 0) AS units_sq
+    FROM autoparts p
+    LEFT JOIN (
+        SELECT part_id, sum(quantity) AS units, sum(quantity::float8 * quantity) AS units_sq
+        FROM autopart_daily_sales
+        WHERE day >= :window_start {sales_filter}
+        GROUP BY part_id
+    ) s ON s.part_id = p.id
+    WHERE p.status IN ('ACTIVE', 'OUT_OF_STOCK') AND p.supplier_id IS NOT NULL {part_filter}
+    ORDER BY p.id
+"""
+FULL_INVENTORY_SQL = INVENTORY_SQL.format(sales_filter="", part_filter="")
+PARTS_INVENTORY_SQL = INVENTORY_SQL.format(
+    sales_filter="AND part_id = ANY(:ids)", part_filter="AND p.id = ANY(:ids)"
+)
+
+# Parts whose plan may have changed since the last run: new sales, or an
+# open suggestion that replenished stock may have closed
+CHANGED_PARTS_SQL = """
+    SELECT part_id FROM autopart_daily_sales
+    WHERE day >= CAST(:since AS date) AND updated_at > :since
+    UNION
+    SELECT part_id FROM purchase_suggestions
+"""
+
+WRITE_SUGGESTIONS_SQL = """
+    INSERT INTO purchase_suggestions (
+        part_id, supplier_id, quantity, unit_cost, urgent,
+        inventory_position, reorder_point, order_up_to, daily_demand, computed_at
+    )
+    SELECT s.*, now()
+    FROM unnest(
+        CAST(:part_ids AS integer[]), CAST(:supplier_ids AS integer[]), CAST(:quantities AS integer[]),
+        CAST(:unit_costs AS float8[]), CAST(:urgent AS boolean[]), CAST(:positions AS integer[]),
+        CAST(:reorder_points AS integer[]), CAST(:order_up_to AS integer[]), CAST(:daily_demand AS float8[])
+    ) AS s
+"""
+
+
+def plan_replenishment(
+    inventory: Dict[str, np.ndarray],
+    window_days: int,
+    service_level_z: float,
+    review_period_days: int,
+) -> Dict[str, np.ndarray]:
+    """Reorder points and order quantities for every part in `inventory`.
+
+    Demand per day is the mean over the window, with its standard deviation
+    giving the safety stock z * sigma * sqrt(lead time). The reorder point
+    never drops below minimum_stock, so a part without sales is reordered
+    exactly when AutoPart.is_low_stock says so. Orders bring the inventory
+    position up to reorder point plus one review period of demand, capped
+    by maximum_stock; quantities are raised to the MOQ, and a part whose
+    MOQ does not fit under maximum_stock is not ordered.
+    """
+    position = inventory["available_quantity"].astype(np.int64)
+    minimum = inventory["minimum_stock"].astype(np.int64)
+    maximum = inventory["maximum_stock"].astype(np.int64)
+    moq = np.maximum(inventory["minimum_order_quantity"], 1).astype(np.int64)
+    lead_time = np.maximum(inventory["lead_time_days"], 1).astype(np.float64)
+
+    daily_demand = inventory["units"] / window_days
+    variance = np.maximum(inventory["units_sq"] / window_days - daily_demand ** 2, 0)
+    safety_stock = service_level_z * np.sqrt(variance * lead_time)
+    lead_time_demand = daily_demand * lead_time
+
+    reorder_point = np.maximum(np.ceil(lead_time_demand + safety_stock).astype(np.int64), minimum)
+    order_up_to = reorder_point + np.ceil(daily_demand * review_period_days).astype(np.int64)
+    order_up_to = np.minimum(np.maximum(order_up_to, minimum), maximum)
+
+    quantity = np.maximum(order_up_to - position, moq)
+    room = maximum - position
+    quantity = np.where(quantity > room, np.where(room >= moq, room, 0), quantity)
+    order = (position <= reorder_point) & (quantity > 0)
+
+    return {
+        "order": order,
+        "quantity": np.where(order, quantity, 0),
+        "reorder_point": reorder_point,
+        "order_up_to": order_up_to,
+        "daily_demand": daily_demand,
+        "urgent": order & (position < lead_time_demand),
+    }
+
+
+def _columnar(rows) -> Dict[str, np.ndarray]:
+    if not rows:
+        return {name: np.empty(0) for name in INVENTORY_COLUMNS}
+    return {
+        name: np.asarray(values, dtype=np.float64 if name in ("cost_price", "units", "units_sq") else np.int64)
+        for name, values in zip(INVENTORY_COLUMNS, zip(*rows))
+    }
+
+
+@dataclass
+class ReplenishmentReport:
+    mode: str
+    parts_planned: int = 0
+    suggestions: int = 0
+    urgent: int = 0
+    suppliers: int = 0
+    order_value: float = 0.0
+    watermark: Optional[datetime] = None
+    elapsed_seconds: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "parts_planned": self.parts_planned,
+            "suggestions": self.suggestions,
+            "urgent": self.urgent,
+            "suppliers": self.suppliers,
+            "order_value": round(self.order_value, 2),
+            "watermark": self.watermark.isoformat() if self.watermark else None,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+async def _write_suggestions(db: AsyncSession, inventory: Dict[str, np.ndarray], plan: Dict[str, np.ndarray],
+                             report: ReplenishmentReport, suppliers: set):
+    order = plan["order"]
+    report.parts_planned += len(order)
+    if not order.any():
+        return
+    quantity = plan["quantity"][order]
+    unit_cost = inventory["cost_price"][order]
+    await db.execute(text(WRITE_SUGGESTIONS_SQL), {
+        "part_ids": inventory["id"][order].tolist(),
+        "supplier_ids": inventory["supplier_id"][order].tolist(),
+        "quantities": quantity.tolist(),
+        "unit_costs": unit_cost.tolist(),
+        "urgent": plan["urgent"][order].tolist(),
+        "positions": inventory["available_quantity"][order].tolist(),
+        "reorder_points": plan["reorder_point"][order].tolist(),
+        "order_up_to": plan["order_up_to"][order].tolist(),
+        "daily_demand": plan["daily_demand"][order].tolist(),
+    })
+    report.suggestions += int(order.sum())
+    report.urgent += int(plan["urgent"].sum())
+    report.order_value += float(np.dot(quantity, unit_cost))
+    suppliers.update(np.unique(inventory["supplier_id"][order]).tolist())
+
+
+async def run_replenishment(
+    db: AsyncSession,
+    full: bool = False,
+    chunk_size: Optional[int] = None,
+) -> ReplenishmentReport:
+    """Recompute purchase suggestions for the catalog (or only changed parts).
+
+    Inventory and window demand are streamed as columns in chunks and
+    planned with plan_replenishment(); the full run rewrites
+    purchase_suggestions in one transaction. Incremental runs only revisit
+    parts with sales since the watermark or an open suggestion, which keeps
+    the plan current as the counter flush books sales.
+    """
+    chunk_size = chunk_size or settings.REPLENISHMENT_CHUNK_SIZE
+    window_days = settings.REPLENISHMENT_VELOCITY_WINDOW_DAYS
+    started = time.perf_counter()
+
+    until = datetime.now(timezone.utc)
+    watermark = await get_watermark(db, WATERMARK_NAME)
+    full = full or watermark is None
+    report = ReplenishmentReport(mode="full" if full else "incremental")
+    window_start = date.today() - timedelta(days=window_days)
+    suppliers: set = set()
+
+    def plan(inventory):
+        return plan_replenishment(
+            inventory, window_days, settings.REPLENISHMENT_SERVICE_LEVEL_Z,
+            settings.REPLENISHMENT_REVIEW_PERIOD_DAYS,
+        )
+
+    if full:
+        await db.execute(text("DELETE FROM purchase_suggestions"))
+        stream = await db.stream(
+            text(FULL_INVENTORY_SQL).execution_options(yield_per=chunk_size), {"window_start": window_start}
+        )
+        async for partition in stream.partitions(chunk_size):
+            inventory = _columnar(partition)
+            await _write_suggestions(db, inventory, plan(inventory), report, suppliers)
+    else:
+        since = watermark - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)
+        changed = (await db.execute(text(CHANGED_PARTS_SQL), {"since": since})).scalars().all()
+        for start in range(0, len(changed), chunk_size):
+            ids = list(changed[start:start + chunk_size])
+            await db.execute(text("DELETE FROM purchase_suggestions WHERE part_id = ANY(:ids)"), {"ids": ids})
+            rows = (await db.execute(text(PARTS_INVENTORY_SQL), {"window_start": window_start, "ids": ids})).all()
+            inventory = _columnar(rows)
+            await _write_suggestions(db, inventory, plan(inventory), report, suppliers)
+
+    await set_watermark(db, WATERMARK_NAME, until)
+    await db.commit()
+    report.suppliers = len(suppliers)
+    report.watermark = until
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
+
+
+async def list_suggestions(
+    db: AsyncSession,
+    supplier_id: int,
+    urgent_only: bool = False,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    """A supplier's purchase suggestions by part id, with order totals."""
+    stmt = select(PurchaseSuggestion).where(PurchaseSuggestion.supplier_id == supplier_id)
+    totals = select(
+        func.count(),
+        func.coalesce(func.sum(PurchaseSuggestion.quantity * PurchaseSuggestion.unit_cost), 0),
+    ).where(PurchaseSuggestion.supplier_id == supplier_id)
+    if urgent_only:
+        stmt = stmt.where(PurchaseSuggestion.urgent.is_(True))
+        totals = totals.where(PurchaseSuggestion.urgent.is_(True))
+
+    after = decode_cursor(cursor, 1)
+    if after is not None:
+        stmt = stmt.where(PurchaseSuggestion.part_id > int(after[0]))
+    items: List[PurchaseSuggestion] = list(
+        (await db.execute(stmt.order_by(PurchaseSuggestion.part_id).limit(limit + 1))).scalars().all()
+    )
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor([items[-1].part_id])
+
+    count, value = (await db.execute(totals)).one()
+    return {
+        "items": [
+            {column.key: getattr(item, column.key) for column in PurchaseSuggestion.__table__.columns}
+            for item in items
+        ],
+        "total_lines": count,
+        "total_value": round(float(value), 2),
+        "next_cursor": next_cursor,
+    }
+
+
+async def main(full: bool = False):
+    """Entry point for the replenishment job (incremental every few minutes, full nightly)."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        report = await run_replenishment(db, full=full)
+        print(f"Replenishment: {report.as_dict()}")
+
+
+if __name__ == "__main__":
+    import sys
+    asyncio.run(main(full="--full" in sys.argv))
@@ -0,0 +1,419 @@
+from sqlalchemy import select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, asdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, Tuple
+import asyncio
+import logging
+import os
+import time
+
+from app.core.config import settings
+from app.models.report_export import ReportExport, ReportType, ExportStatus
+from app.services.realtime import publish_update
+from app.services.xlsx_writer import XlsxWriter
+
+logger = logging.getLogger(__name__)
+
+# Timestamps are converted to EXPORT_TIMEZONE in SQL: Excel has no time
+# zones, and the month boundaries are local
+_PERIOD = (
+    "{column} >= (CAST(CAST(:start AS date) AS timestamp) AT TIME ZONE :tz)"
+    " AND {column} < (CAST(CAST(:end AS date) AS timestamp) AT TIME ZONE :tz)"
+)
+
+
+@dataclass(frozen=True)
+class ReportDefinition:
+    title: str
+    columns: Tuple[Tuple[str, float], ...]  # Header and column width
+    sql: str
+
+
+REPORTS = {
+    ReportType.INVOICES: ReportDefinition(
+        title="Invoices",
+        columns=(
+            ("Invoice", 18), ("Series", 8), ("Folio", 10), ("Customer", 32), ("Customer RFC", 16),
+            ("Issued", 18), ("Due", 18), ("Paid", 18), ("Status", 12), ("Currency", 9),
+            ("Exchange rate", 12), ("Subtotal", 14), ("Tax", 12), ("Discount", 12), ("Total", 14),
+            ("CFDI UUID", 38), ("CFDI status", 12),
+        ),
+        sql=f"""
+            SELECT i.invoice_number, i.series, i.folio, u.business_name, u.rfc,
+                   i.issue_date AT TIME ZONE :tz, i.due_date AT TIME ZONE :tz, i.paid_date AT TIME ZONE :tz,
+                   lower(CAST(i.status AS text)), i.currency, i.exchange_rate,
+                   i.subtotal, i.tax_amount, i.discount_amount, i.total, i.cfdi_uuid, i.cfdi_status
+            FROM invoices i
+            JOIN users u ON u.id = i.receiver_id
+            WHERE i.issuer_id = :user_id
+              AND {_PERIOD.format(column="i.issue_date")}
+            ORDER BY i.issue_date, i.id
+        """,
+    ),
+    ReportType.TRANSACTIONS: ReportDefinition(
+        title="Transactions",
+        columns=(
+            ("Transaction", 22), ("Created", 18), ("Processed", 18), ("Type", 16), ("Status", 12),
+            ("Method", 14), ("Amount", 14), ("Fee", 10), ("Net amount", 14), ("Currency", 9),
+            ("Reference", 24), ("Description", 40),
+        ),
+        sql=f"""
+            SELECT t.transaction_id, t.created_at AT TIME ZONE :tz, t.processed_at AT TIME ZONE :tz,
+                   lower(CAST(t.type AS text)), lower(CAST(t.status AS text)),
+                   lower(CAST(t.payment_method AS text)),
+                   t.amount, t.fee, t.net_amount, t.currency, t.reference, t.description
+            FROM transactions t
+            WHERE t.user_id = :user_id
+              AND {_PERIOD.format(column="t.created_at")}
+            ORDER BY t.created_at, t.id
+        """,
+    ),
+    ReportType.PARTS_SALES: ReportDefinition(
+        title="Parts sales",
+        columns=(
+            ("Day", 12), ("SKU", 18), ("Part number", 18), ("Name", 40), ("Brand", 16),
+            ("Units", 8), ("Revenue", 14),
+        ),
+        sql="""
+            SELECT s.day, p.sku, p.part_number, p.name, p.brand, s.quantity, s.revenue
+            FROM autopart_daily_sales s
+            JOIN autoparts p ON p.id = s.part_id
+            WHERE p.supplier_id = :user_id
+              AND s.day >= CAST(:start AS date) AND s.day < CAST(:end AS date)
+            ORDER BY s.day, p.sku
+        """,
+    ),
+}
+
+CLAIM_SQL = """
+    UPDATE report_exports
+    SET status = 'RUNNING', started_at = now(), attempts = attempts + 1
+    WHERE id = (
+        SELECT id FROM report_exports
+        WHERE (status = 'QUEUED'
+               OR (status = 'RUNNING' AND started_at < now() - make_interval(mins => :stale_minutes)))
+          AND attempts < :max_attempts
+        ORDER BY id
+        LIMIT 1
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, user_id, report_type, period_start, period_end, attempts
+"""
+
+# A worker that died during the last attempt leaves its export RUNNING and
+# out of attempts; fail it so the report and month can be requested again
+EXPIRE_SQL = """
+    UPDATE report_exports
+    SET status = 'FAILED', error = 'worker stopped during the last attempt'
+    WHERE status = 'RUNNING'
+      AND started_at < now() - make_interval(mins => :stale_minutes)
+      AND attempts >= :max_attempts
+    RETURNING id, user_id
+"""
+
+# Shutdown interrupted the export; it did not fail, so the attempt is refunded
+REQUEUE_SQL = """
+    UPDATE report_exports
+    SET status = 'QUEUED', attempts = greatest(attempts - 1, 0)
+    WHERE id = :id AND status = 'RUNNING'
+"""
+
+FINISH_SQL = """
+    UPDATE report_exports
+    SET status = 'COMPLETED', row_count = :row_count, size_bytes = :size_bytes,
+        file_path = :file_path, error = NULL, completed_at = now()
+    WHERE id = :id
+"""
+
+FAIL_SQL = """
+    UPDATE report_exports
+    SET status = CAST(:status AS exportstatus), error = :error
+    WHERE id = :id
+"""
+
+PRUNE_SQL = """
+    DELETE FROM report_exports
+    WHERE created_at < now() - make_interval(days => :days)
+      AND status IN ('COMPLETED', 'FAILED')
+    RETURNING file_path
+"""
+
+BACKLOG_SQL = """
+    SELECT count(*) FILTER (WHERE status = 'QUEUED') AS queued,
+           count(*) FILTER (WHERE status = 'RUNNING') AS running,
+           EXTRACT(EPOCH FROM now() - min(created_at) FILTER (WHERE status = 'QUEUED')) AS oldest_seconds
+    FROM report_exports
+    WHERE status IN ('QUEUED', 'RUNNING')
+"""
+
+
+@dataclass
+class ExportMetrics:
+    exports: int = 0
+    failed: int = 0
+    rows: int = 0
+    bytes_written: int = 0
+    export_seconds: float = 0.0
+    max_export_seconds: float = 0.0
+    max_rows_per_second: float = 0.0
+
+
+_metrics = ExportMetrics()
+
+
+def month_period(month: str) -> Tuple[date, date]:
+    """[first day, first day of the next month) of a "YYYY-MM" month."""
+    try:
+        start = datetime.strptime(month, "%Y-%m").date()
+    except ValueError:
+        raise ValueError("Month must be formatted as YYYY-MM")
+    end = date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    return start, end
+
+
+def export_filename(report_type: ReportType, period_start: date) -> str:
+    return f"{report_type.value}-{period_start:%Y-%m}.xlsx"
+
+
+def export_file(relative_path: str) -> Path:
+    return Path(settings.UPLOAD_DIR) / relative_path
+
+
+def download_url(export_id: int) -> str:
+    return f"{settings.API_V1_STR}/exports/{export_id}/download"
+
+
+async def request_export(db: AsyncSession, user_id: int, report_type: ReportType,
+                         month: str) -> Tuple[ReportExport, bool]:
+    """Queue an export of one month; returns the export and whether it is new.
+
+    While the same report and month is already queued or running for the
+    user, that export is returned instead of starting another.
+    """
+    period_start, period_end = month_period(month)
+    active = (
+        select(ReportExport)
+        .where(
+            ReportExport.user_id == user_id,
+            ReportExport.report_type == report_type,
+            ReportExport.period_start == period_start,
+            ReportExport.status.in_((ExportStatus.QUEUED, ExportStatus.RUNNING)),
+        )
+    )
+    existing = (await db.execute(active)).scalar_one_or_none()
+    if existing is not None:
+        return existing, False
+
+    export = ReportExport(
+        user_id=user_id, report_type=report_type,
+        period_start=period_start, period_end=period_end, status=ExportStatus.QUEUED,
+    )
+    db.add(export)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return (await db.execute(active)).scalar_one(), False
+    wake_export_worker()
+    return export, True
+
+
+async def write_report(db: AsyncSession, report_type: ReportType, user_id: int,
+                       period_start: date, period_end: date, path: Path) -> Tuple[int, int]:
+    """Stream a report query into an .xlsx file at `path`; returns (rows, bytes).
+
+    Rows come through a server-side cursor EXPORT_BATCH_ROWS at a time and
+    each batch is written in a thread while the next one is fetched, so at
+    most two batches are in memory whatever the row count.
+    """
+    report = REPORTS[report_type]
+    loop = asyncio.get_running_loop()
+    writer = XlsxWriter(path, report.title, report.columns)
+    try:
+        result = await db.stream(
+            text(report.sql).execution_options(yield_per=settings.EXPORT_BATCH_ROWS),
+            {"user_id": user_id, "start": period_start, "end": period_end, "tz": settings.EXPORT_TIMEZONE},
+        )
+        writing = None
+        async for batch in result.partitions():
+            if writing is not None:
+                await writing
+            writing = loop.run_in_executor(None, writer.append_rows, batch)
+        if writing is not None:
+            await writing
+        size = await loop.run_in_executor(None, writer.close)
+    except BaseException:
+        await loop.run_in_executor(None, writer.abort)
+        raise
+    finally:
+        # End the read-only transaction that held the cursor
+        await db.rollback()
+    return writer.rows, size
+
+
+async def run_next_export(db: AsyncSession) -> Optional[int]:
+    """Claim and build one export, notifying its user; returns its id or None if idle."""
+    claimed = (await db.execute(text(CLAIM_SQL), {
+        "stale_minutes": settings.EXPORT_STALE_MINUTES,
+        "max_attempts": settings.EXPORT_MAX_ATTEMPTS,
+    })).one_or_none()
+    await db.commit()
+    if claimed is None:
+        return None
+
+    report_type = ReportType[claimed.report_type]
+    relative = os.path.join(
+        "exports", str(claimed.user_id), f"{claimed.id}-{export_filename(report_type, claimed.period_start)}"
+    )
+    started = time.perf_counter()
+    try:
+        rows, size = await write_report(
+            db, report_type, claimed.user_id, claimed.period_start, claimed.period_end, export_file(relative)
+        )
+    except asyncio.CancelledError:
+        try:
+            await db.execute(text(REQUEUE_SQL), {"id": claimed.id})
+            await db.commit()
+        except Exception:
+            logger.exception("Could not requeue interrupted report export %d", claimed.id)
+        raise
+    except Exception as exc:
+        final = claimed.attempts >= settings.EXPORT_MAX_ATTEMPTS
+        await db.execute(text(FAIL_SQL), {
+            "id": claimed.id,
+            "status": ExportStatus.FAILED.name if final else ExportStatus.QUEUED.name,
+            "error": repr(exc)[:1000],
+        })
+        await db.commit()
+        _metrics.failed += 1
+        logger.exception("Report export %d failed (attempt %d)", claimed.id, claimed.attempts)
+        if final:
+            await publish_update(claimed.user_id, "export", claimed.id, status=ExportStatus.FAILED.value)
+        return claimed.id
+
+    await db.execute(text(FINISH_SQL), {
+        "id": claimed.id, "row_count": rows, "size_bytes": size, "file_path": relative,
+    })
+    await db.commit()
+    elapsed = time.perf_counter() - started
+    _metrics.exports += 1
+    _metrics.rows += rows
+    _metrics.bytes_written += size
+    _metrics.export_seconds += elapsed
+    _metrics.max_export_seconds = max(_metrics.max_export_seconds, elapsed)
+    _metrics.max_rows_per_second = max(_metrics.max_rows_per_second, rows / elapsed if elapsed else 0.0)
+    await publish_update(
+        claimed.user_id, "export", claimed.id,
+        status=ExportStatus.COMPLETED.value, row_count=rows, download_url=download_url(claimed.id),
+    )
+    return claimed.id
+
+
+async def expire_exports(db: AsyncSession) -> int:
+    """Fail stale RUNNING exports that have no attempts left, notifying their users."""
+    expired = (await db.execute(text(EXPIRE_SQL), {
+        "stale_minutes": settings.EXPORT_STALE_MINUTES,
+        "max_attempts": settings.EXPORT_MAX_ATTEMPTS,
+    })).all()
+    await db.commit()
+    for row in expired:
+        _metrics.failed += 1
+        logger.warning("Report export %d abandoned after its last attempt", row.id)
+        await publish_update(row.user_id, "export", row.id, status=ExportStatus.FAILED.value)
+    return len(expired)
+
+
+async def drain_exports() -> int:
+    """Build exports until none is claimable; returns exports attempted."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        await expire_exports(db)
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            if await run_next_export(db) is None:
+                return total
+        total += 1
+
+
+async def prune_exports(db: AsyncSession, retention_days: Optional[int] = None) -> int:
+    """Delete finished exports and their files after the retention window."""
+    retention_days = retention_days or settings.EXPORT_RETENTION_DAYS
+    paths = (await db.execute(text(PRUNE_SQL), {"days": retention_days})).scalars().all()
+    await db.commit()
+    for relative in paths:
+        if relative:
+            try:
+                os.unlink(export_file(relative))
+            except FileNotFoundError:
+                pass
+    return len(paths)
+
+
+async def export_stats(db: AsyncSession) -> Dict[str, Any]:
+    backlog = (await db.execute(text(BACKLOG_SQL))).one()
+    return {
+        **asdict(_metrics),
+        "export_seconds": round(_metrics.export_seconds, 3),
+        "queued": backlog.queued,
+        "running": backlog.running,
+        "oldest_queued_seconds": round(float(backlog.oldest_seconds or 0), 3),
+    }
+
+
+_wake = asyncio.Event()
+_worker: Optional[asyncio.Task] = None
+
+
+def wake_export_worker():
+    """Signal this process's export worker that an export was requested."""
+    _wake.set()
+
+
+async def _worker_loop(interval: float):
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await drain_exports()
+        except Exception:
+            logger.exception("Report export worker iteration failed")
+            await asyncio.sleep(interval)
+
+
+def start_export_worker():
+    """Start the export worker task; called on application startup."""
+    global _worker
+    if _worker is None:
+        _worker = asyncio.create_task(_worker_loop(settings.EXPORT_POLL_INTERVAL_SECONDS))
+
+
+async def stop_export_worker():
+    """Stop the export worker; an interrupted export is put back in the queue."""
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+
+
+async def main():
+    """Entry point for a standalone export worker run and the retention prune."""
+    from app.core.database import AsyncSessionLocal
+    built = await drain_exports()
+    async with AsyncSessionLocal() as db:
+        pruned = await prune_exports(db)
+        print(f"Report exports: {built} built, {pruned} pruned, {await export_stats(db)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
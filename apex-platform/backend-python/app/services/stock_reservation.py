@@ -0,0 +1,281 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+import asyncio
+
+from app.core.config import settings
+from app.services.product_cache import invalidate_stock
+from app.services.product_counters import record_sale
+
+
+class ReservationRejection:
+    EMPTY_CART = "empty_cart"
+    INVALID_QUANTITY = "invalid_quantity"
+    UNKNOWN_SKU = "unknown_sku"
+    NOT_ACTIVE = "part_not_active"
+    INSUFFICIENT_STOCK = "insufficient_stock"
+
+
+# Every statement that touches several parts first locks them in a `locked`
+# CTE ordered by SKU. The UPDATE reads `locked` from a scalar subquery, which
+# Postgres runs once before the first row is updated, so all row locks are
+# taken in SKU order and concurrent carts cannot deadlock each other.
+
+# Replacing a cart's holds releases some parts and reserves others in two
+# statements. Each is ordered only within itself, so the union of both sets
+# is locked first, in one SKU-ordered pass; the two statements then only
+# re-lock rows the transaction already holds.
+LOCK_CART_PARTS_SQL = """
+SELECT p.id FROM autoparts p
+WHERE p.sku = ANY(CAST(:skus AS text[]))
+   OR p.id IN (SELECT part_id FROM stock_reservations WHERE cart_id = :cart_id AND status = 'ACTIVE')
+ORDER BY p.sku
+FOR UPDATE OF p
+"""
+
+# Reserve every line of a cart or none: the UPDATE only runs when each
+# line's SKU exists, is ACTIVE and has enough available units on the
+# latest row version.
+RESERVE_SQL = """
+WITH lines AS (
+    SELECT sku, quantity
+    FROM unnest(CAST(:skus AS text[]), CAST(:quantities AS integer[])) AS l(sku, quantity)
+),
+locked AS (
+    SELECT p.id, p.sku, p.status, p.available_quantity, l.quantity
+    FROM autoparts p
+    JOIN lines l ON l.sku = p.sku
+    ORDER BY p.sku
+    FOR UPDATE OF p
+),
+reserved AS (
+    UPDATE autoparts p
+    SET reserved_quantity = p.reserved_quantity + k.quantity,
+        available_quantity = p.available_quantity - k.quantity,
+        updated_at = now()
+    FROM locked k
+    WHERE p.id = k.id
+      AND (SELECT count(*) FROM locked
+           WHERE status = 'ACTIVE' AND available_quantity >= quantity) = :line_count
+    RETURNING p.id, p.sku, k.quantity
+),
+holds AS (
+    INSERT INTO stock_reservations (cart_id, user_id, part_id, quantity, status, expires_at, created_at)
+    SELECT :cart_id, CAST(:user_id AS integer), r.id, r.quantity, 'ACTIVE', CAST(:expires_at AS timestamptz), now()
+    FROM reserved r
+    RETURNING part_id
+)
+SELECT l.sku, l.quantity, k.status, k.available_quantity, r.id IS NOT NULL AS reserved,
+       (SELECT count(*) FROM holds) AS holds
+FROM lines l
+LEFT JOIN locked k ON k.sku = l.sku
+LEFT JOIN reserved r ON r.sku = l.sku
+"""
+
+# Returns the units of claimed holds to available stock. `{claim}` selects
+# the reservation rows and marks them with their final status.
+_RELEASE_SQL = """
+WITH claimed AS (
+    {claim}
+    RETURNING part_id, quantity
+),
+per_part AS (
+    SELECT part_id, sum(quantity) AS quantity FROM claimed GROUP BY part_id
+),
+locked AS (
+    SELECT p.id FROM autoparts p
+    JOIN per_part e ON e.part_id = p.id
+    ORDER BY p.sku
+    FOR UPDATE OF p
+),
+released AS (
+    UPDATE autoparts p
+    SET reserved_quantity = GREATEST(0, p.reserved_quantity - e.quantity),
+        available_quantity = p.available_quantity + LEAST(e.quantity, p.reserved_quantity),
+        updated_at = now()
+    FROM per_part e
+    WHERE p.id = e.part_id AND (SELECT count(*) FROM locked) > 0
+    RETURNING p.sku
+)
+SELECT (SELECT count(*) FROM claimed) AS holds, ARRAY(SELECT sku FROM released) AS skus
+"""
+
+RELEASE_CART_SQL = _RELEASE_SQL.format(claim="""
+    UPDATE stock_reservations
+    SET status = 'RELEASED', updated_at = now()
+    WHERE cart_id = :cart_id AND status = 'ACTIVE'
+""")
+
+# Oldest expired holds first; SKIP LOCKED lets several sweepers run at once
+# and never waits on a checkout that is committing the same hold.
+SWEEP_EXPIRED_SQL = _RELEASE_SQL.format(claim="""
+    UPDATE stock_reservations
+    SET status = 'EXPIRED', updated_at = now()
+    WHERE id IN (
+        SELECT id FROM stock_reservations
+        WHERE status = 'ACTIVE' AND expires_at <= now()
+        ORDER BY expires_at
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    )
+""")
+
+# Turns a cart's unexpired holds into a sale, as AutoPart.update_stock does
+# for a single part. available_quantity was already taken at reservation.
+# Sales counters are not touched here: commit_cart hands the sold lines to
+# the counter buffer, which applies them in bulk with the daily history.
+COMMIT_CART_SQL = """
+WITH holds AS (
+    UPDATE stock_reservations
+    SET status = 'COMMITTED', updated_at = now()
+    WHERE cart_id = :cart_id AND status = 'ACTIVE' AND expires_at > now()
+    RETURNING part_id, quantity
+),
+locked AS (
+    SELECT p.id FROM autoparts p
+    JOIN holds h ON h.part_id = p.id
+    ORDER BY p.sku
+    FOR UPDATE OF p
+),
+sold AS (
+    UPDATE autoparts p
+    SET stock_quantity = GREATEST(0, p.stock_quantity - h.quantity),
+        reserved_quantity = GREATEST(0, p.reserved_quantity - h.quantity),
+        status = CASE WHEN p.stock_quantity - h.quantity <= 0 THEN 'OUT_OF_STOCK' ELSE p.status END,
+        updated_at = now()
+    FROM holds h
+    WHERE p.id = h.part_id AND (SELECT count(*) FROM locked) > 0
+    RETURNING p.sku, h.quantity, p.final_price
+)
+SELECT sku, quantity, final_price FROM sold ORDER BY sku
+"""
+
+
+@dataclass
+class ReservationResult:
+    accepted: bool
+    cart_id: str
+    expires_at: Optional[datetime] = None
+    reason: Optional[str] = None
+    rejected: Dict[str, str] = field(default_factory=dict)  # sku -> reason
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _merge_lines(lines: Iterable[Tuple[str, int]]) -> Dict[str, int]:
+    merged: Dict[str, int] = {}
+    for sku, quantity in lines:
+        merged[sku] = merged.get(sku, 0) + int(quantity)
+    return merged
+
+
+def _line_rejection(row) -> Optional[str]:
+    if row.status is None:
+        return ReservationRejection.UNKNOWN_SKU
+    if row.status != "ACTIVE":
+        return ReservationRejection.NOT_ACTIVE
+    if row.available_quantity < row.quantity:
+        return ReservationRejection.INSUFFICIENT_STOCK
+    return None
+
+
+async def reserve_cart(
+    db: AsyncSession,
+    cart_id: str,
+    lines: Iterable[Tuple[str, int]],
+    user_id: Optional[int] = None,
+    ttl_seconds: Optional[int] = None,
+) -> ReservationResult:
+    """Hold stock for every (sku, quantity) line of a cart, all or nothing.
+
+    Any existing holds of the cart are replaced in the same transaction, so
+    calling this again after the cart changes is safe. On rejection nothing
+    changes and `rejected` explains each failing SKU.
+    """
+    result = ReservationResult(accepted=False, cart_id=cart_id)
+    merged = _merge_lines(lines)
+    if not merged:
+        result.reason = ReservationRejection.EMPTY_CART
+        return result
+    if any(quantity <= 0 for quantity in merged.values()):
+        result.reason = ReservationRejection.INVALID_QUANTITY
+        return result
+
+    skus = sorted(merged)
+    ttl_seconds = ttl_seconds or settings.CART_RESERVATION_TTL_SECONDS
+    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl_seconds)
+
+    await db.execute(text(LOCK_CART_PARTS_SQL), {"skus": skus, "cart_id": cart_id})
+    released = (await db.execute(text(RELEASE_CART_SQL), {"cart_id": cart_id})).one()
+    rows = (await db.execute(text(RESERVE_SQL), {
+        "skus": skus,
+        "quantities": [merged[sku] for sku in skus],
+        "line_count": len(skus),
+        "cart_id": cart_id,
+        "user_id": user_id,
+        "expires_at": expires_at,
+    })).all()
+
+    if not rows or not all(row.reserved for row in rows):
+        await db.rollback()
+        result.rejected = {row.sku: reason for row in rows if (reason := _line_rejection(row))}
+        result.reason = next(iter(result.rejected.values()), ReservationRejection.INSUFFICIENT_STOCK)
+        return result
+
+    await db.commit()
+    await invalidate_stock(set(skus).union(released.skus))
+    result.accepted = True
+    result.expires_at = expires_at
+    return result
+
+
+async def release_cart(db: AsyncSession, cart_id: str) -> int:
+    """Release every active hold of a cart; returns the number of holds."""
+    row = (await db.execute(text(RELEASE_CART_SQL), {"cart_id": cart_id})).one()
+    await db.commit()
+    await invalidate_stock(row.skus)
+    return row.holds
+
+
+async def commit_cart(db: AsyncSession, cart_id: str) -> List[Dict[str, Any]]:
+    """Convert a cart's unexpired holds into sold stock at checkout.
+
+    Returns the (sku, quantity, final_price) lines sold; expired holds are
+    not sold and must be reserved again.
+    """
+    rows = (await db.execute(text(COMMIT_CART_SQL), {"cart_id": cart_id})).mappings().all()
+    await db.commit()
+    for row in rows:
+        record_sale(row["sku"], row["quantity"], row["quantity"] * row["final_price"])
+    await invalidate_stock(row["sku"] for row in rows)
+    return [dict(row) for row in rows]
+
+
+async def release_expired_reservations(db: AsyncSession, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Expire abandoned holds in batches until none are left."""
+    batch_size = batch_size or settings.RESERVATION_SWEEP_BATCH_SIZE
+    totals = {"holds": 0, "parts": 0, "batches": 0}
+    while True:
+        row = (await db.execute(text(SWEEP_EXPIRED_SQL), {"batch_size": batch_size})).one()
+        await db.commit()
+        await invalidate_stock(row.skus)
+        totals["holds"] += row.holds
+        totals["parts"] += len(row.skus)
+        totals["batches"] += 1
+        if row.holds < batch_size:
+            return totals
+
+
+async def main():
+    """Entry point for the reservation sweeper (cron or worker beat)."""
+    from app.core.database import AsyncSessionLocal
+    async with AsyncSessionLocal() as db:
+        totals = await release_expired_reservations(db)
+        print(f"Reservation sweep: {totals}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,323 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Iterator, Tuple, BinaryIO
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
+import time
+
+from openpyxl import load_workbook
+
+from app.core.config import settings
+from app.models.autopartes import ProductCategory
+from app.services.interchange import link_parts
+from app.services.product_cache import invalidate_products
+
+MAX_REPORTED_ERRORS = 500
+LIST_SEPARATOR = "|"  # Separator inside list cells, e.g. "Toyota|Nissan"
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm")
+
+REQUIRED_COLUMNS = ("sku", "part_number", "name", "category", "brand", "cost_price", "selling_price")
+
+# Staged columns in COPY order; JSON lists travel as text and are cast on upsert
+STAGING_COLUMNS = (
+    "sku", "supplier_sku", "part_number", "oem_number", "name", "description",
+    "category", "brand", "manufacturer", "cost_price", "selling_price", "msrp",
+    "stock_quantity", "compatible_makes", "compatible_models", "compatible_years",
+    "engine_types", "weight_kg", "lead_time_days", "feed_hash",
+)
+
+CREATE_STAGING_SQL = """
+CREATE TEMP TABLE IF NOT EXISTS supplier_feed_staging (
+    sku text PRIMARY KEY, supplier_sku text, part_number text, oem_number text, name text,
+    description text, category text, brand text, manufacturer text,
+    cost_price float8, selling_price float8, msrp float8, stock_quantity integer,
+    compatible_makes text, compatible_models text, compatible_years text, engine_types text,
+    weight_kg float8, lead_time_days integer, feed_hash text
+) ON COMMIT DROP
+"""
+
+# Only staged (changed) rows reach this statement. Rows whose SKU belongs to
+# another supplier are left alone and counted as conflicts.
+UPSERT_SQL = """
+    INSERT INTO autoparts (
+        sku, supplier_sku, part_number, oem_number, name, description, category, brand, manufacturer,
+        cost_price, selling_price, msrp, discount_percentage,
+        stock_quantity, reserved_quantity, available_quantity, minimum_stock, maximum_stock,
+        compatible_makes, compatible_models, compatible_years, engine_types,
+        weight_kg, lead_time_days, minimum_order_quantity, supplier_id, feed_hash,
+        condition, warranty_months, status, is_featured, is_bestseller, hazmat,
+        total_sold, total_revenue, view_count, rating_average, rating_count, created_at
+    )
+    SELECT s.sku, s.supplier_sku, s.part_number, s.oem_number, s.name, s.description,
+           CAST(s.category AS productcategory), s.brand, s.manufacturer,
+           s.cost_price, s.selling_price, s.msrp, 0,
+           s.stock_quantity, 0, s.stock_quantity, 1, 100,
+           CAST(s.compatible_makes AS json), CAST(s.compatible_models AS json),
+           CAST(s.compatible_years AS json), CAST(s.engine_types AS json),
+           s.weight_kg, s.lead_time_days, 1, :supplier_id, s.feed_hash,
+           'NEW', 12, CASE WHEN s.stock_quantity > 0 THEN 'ACTIVE' ELSE 'OUT_OF_STOCK' END::productstatus,
+           false, false, false, 0, 0, 0, 0, 0, now()
+    FROM supplier_feed_staging s
+    ON CONFLICT (sku) DO UPDATE SET
+        supplier_sku = EXCLUDED.supplier_sku,
+        part_number = EXCLUDED.part_number,
+        oem_number = EXCLUDED.oem_number,
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        category = EXCLUDED.category,
+        brand = EXCLUDED.brand,
+        manufacturer = EXCLUDED.manufacturer,
+        cost_price = EXCLUDED.cost_price,
+        selling_price = EXCLUDED.selling_price,
+        msrp = EXCLUDED.msrp,
+        stock_quantity = EXCLUDED.stock_quantity,
+        available_quantity = GREATEST(0, EXCLUDED.stock_quantity - autoparts.reserved_quantity),
+        compatible_makes = EXCLUDED.compatible_makes,
+        compatible_models = EXCLUDED.compatible_models,
+        compatible_years = EXCLUDED.compatible_years,
+        engine_types = EXCLUDED.engine_types,
+        weight_kg = EXCLUDED.weight_kg,
+        lead_time_days = EXCLUDED.lead_time_days,
+        feed_hash = EXCLUDED.feed_hash,
+        status = CASE
+            WHEN autoparts.status = 'INACTIVE' THEN autoparts.status
+            WHEN EXCLUDED.stock_quantity - autoparts.reserved_quantity > 0 THEN 'ACTIVE'
+            ELSE 'OUT_OF_STOCK'
+        END::productstatus,
+        updated_at = now()
+    WHERE autoparts.supplier_id = EXCLUDED.supplier_id
+    RETURNING id, part_number, oem_number, universal_part_number, (xmax = 0) AS inserted
+"""
+
+KNOWN_HASHES_SQL = "SELECT sku, feed_hash FROM autoparts WHERE supplier_id = :supplier_id"
+
+# feed_hash is cleared so a SKU that comes back is re-applied and reactivated
+DISCONTINUE_SQL = """
+    UPDATE autoparts
+    SET status = 'DISCONTINUED', feed_hash = NULL, updated_at = now()
+    WHERE supplier_id = :supplier_id AND sku = ANY(:skus) AND status <> 'DISCONTINUED'
+"""
+
+
+@dataclass
+class FeedImportReport:
+    rows_read: int = 0
+    unchanged: int = 0
+    inserted: int = 0
+    updated: int = 0
+    conflicts: int = 0
+    groups_merged: int = 0
+    discontinued: int = 0
+    discontinue_skipped: bool = False
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    elapsed_seconds: float = 0.0
+
+    def add_error(self, line: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "rows_read": self.rows_read,
+            "unchanged": self.unchanged,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "conflicts": self.conflicts,
+            "groups_merged": self.groups_merged,
+            "discontinued": self.discontinued,
+            "discontinue_skipped": self.discontinue_skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+        }
+
+
+def _header(values) -> List[str]:
+    return [str(value or "").strip().lower().replace(" ", "_") for value in values]
+
+
+def iter_feed_rows(file: BinaryIO, filename: str, delimiter: str = ",") -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, raw row dict) from a CSV or Excel feed without loading it whole."""
+    if filename.lower().endswith(EXCEL_EXTENSIONS):
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            columns = _header(next(rows, ()))
+            for line, values in enumerate(rows, start=2):
+                if any(value not in (None, "") for value in values):
+                    yield line, dict(zip(columns, values))
+        finally:
+            workbook.close()
+    else:
+        reader = csv.reader(codecs.getreader("utf-8-sig")(file), delimiter=delimiter)
+        columns = _header(next(reader, ()))
+        for line, values in enumerate(reader, start=2):
+            if any(values):
+                yield line, dict(zip(columns, values))
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _number(value: Any, cast=float) -> Optional[float]:
+    value = _text(value)
+    return cast(float(value.replace(",", ""))) if value is not None else None
+
+
+def _list(value: Any, years: bool = False) -> Optional[str]:
+    value = _text(value)
+    if value is None:
+        return None
+    items = [item.strip() for item in value.split(LIST_SEPARATOR) if item.strip()]
+    return json.dumps([int(item) for item in items] if years else items, ensure_ascii=False)
+
+
+def normalize_row(raw: Dict[str, Any]) -> Tuple:
+    """Validate one feed row and return it in STAGING_COLUMNS order with its hash."""
+    missing = [column for column in REQUIRED_COLUMNS if _text(raw.get(column)) is None]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    try:
+        category = ProductCategory(_text(raw["category"]).lower()).name
+    except ValueError:
+        raise ValueError(f"Unknown category {raw['category']!r}")
+
+    row = (
+        _text(raw["sku"]),
+        _text(raw.get("supplier_sku")),
+        _text(raw["part_number"]),
+        _text(raw.get("oem_number")),
+        _text(raw["name"]),
+        _text(raw.get("description")),
+        category,
+        _text(raw["brand"]),
+        _text(raw.get("manufacturer")),
+        _number(raw["cost_price"]),
+        _number(raw["selling_price"]),
+        _number(raw.get("msrp")),
+        _number(raw.get("stock_quantity"), int) or 0,
+        _list(raw.get("compatible_makes")),
+        _list(raw.get("compatible_models")),
+        _list(raw.get("compatible_years"), years=True),
+        _list(raw.get("engine_types")),
+        _number(raw.get("weight_kg")),
+        _number(raw.get("lead_time_days"), int) or 7,
+    )
+    digest = hashlib.blake2b("\x1f".join("" if value is None else str(value) for value in row).encode(), digest_size=16)
+    return row + (digest.hexdigest(),)
+
+
+def _next_chunk(rows: Iterator, size: int) -> List:
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            break
+    return chunk
+
+
+async def _copy_and_upsert(db: AsyncSession, supplier_id: int, changed: List[Tuple], report: FeedImportReport):
+    """COPY changed rows into the staging table and upsert them in one statement.
+
+    Upserted parts are linked into their interchange groups in the same
+    transaction, so OEM lookups see new numbers as soon as the import commits.
+    """
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        "supplier_feed_staging", records=changed, columns=list(STAGING_COLUMNS)
+    )
+    upserted = (await db.execute(text(UPSERT_SQL), {"supplier_id": supplier_id})).all()
+    await db.execute(text("TRUNCATE supplier_feed_staging"))
+    inserted = sum(1 for row in upserted if row.inserted)
+    report.inserted += inserted
+    report.updated += len(upserted) - inserted
+    report.conflicts += len(changed) - len(upserted)
+    report.groups_merged += await link_parts(db, [tuple(row)[:4] for row in upserted])
+
+
+async def import_supplier_feed(
+    db: AsyncSession,
+    supplier_id: int,
+    file: BinaryIO,
+    filename: str,
+    batch_size: Optional[int] = None,
+) -> FeedImportReport:
+    """Apply a supplier's full catalog feed (CSV or Excel) to autoparts.
+
+    Rows are streamed and hashed; only rows whose hash differs from the
+    feed_hash stored on the part are staged with COPY and upserted by SKU,
+    so database work scales with the number of changes. Known SKUs absent
+    from the feed are marked DISCONTINUED, unless the feed covers too few
+    of them to be trusted. The whole import is one transaction.
+    """
+    batch_size = batch_size or settings.SUPPLIER_FEED_BATCH_SIZE
+    report = FeedImportReport()
+    started = time.perf_counter()
+
+    known: Dict[str, Optional[str]] = {}
+    stream = await db.stream(text(KNOWN_HASHES_SQL), {"supplier_id": supplier_id})
+    async for sku, feed_hash in stream:
+        known[sku] = feed_hash
+
+    await db.execute(text(CREATE_STAGING_SQL))
+    seen = set()
+    changed: List[Tuple] = []
+    touched: List[str] = []
+    rows = iter_feed_rows(file, filename)
+
+    while True:
+        # Reading and parsing the file is blocking work, keep it off the event loop
+        chunk = await asyncio.to_thread(_next_chunk, rows, batch_size)
+        if not chunk:
+            break
+        for line, raw in chunk:
+            report.rows_read += 1
+            try:
+                row = normalize_row(raw)
+            except (ValueError, TypeError) as exc:
+                report.add_error(line, str(exc))
+                continue
+            sku = row[0]
+            if sku in seen:
+                report.add_error(line, f"Duplicate SKU {sku}")
+                continue
+            seen.add(sku)
+            if known.get(sku) == row[-1]:
+                report.unchanged += 1
+            else:
+                changed.append(row)
+        if len(changed) >= batch_size:
+            await _copy_and_upsert(db, supplier_id, changed, report)
+            touched += [row[0] for row in changed]
+            changed = []
+    if changed:
+        await _copy_and_upsert(db, supplier_id, changed, report)
+        touched += [row[0] for row in changed]
+
+    missing = [sku for sku in known if sku not in seen]
+    if missing and len(seen) < settings.SUPPLIER_FEED_MIN_COVERAGE * len(known):
+        report.discontinue_skipped = True
+    else:
+        for start in range(0, len(missing), batch_size):
+            result = await db.execute(
+                text(DISCONTINUE_SQL),
+                {"supplier_id": supplier_id, "skus": missing[start:start + batch_size]},
+            )
+            report.discontinued += result.rowcount
+        touched += missing
+
+    await db.commit()
+    await invalidate_products(touched)
+    report.elapsed_seconds = time.perf_counter() - started
+    return report
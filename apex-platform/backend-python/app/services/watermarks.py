@@ -0,0 +1,23 @@
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+
+from app.models.job_watermark import JobWatermark
+
+
+async def get_watermark(db: AsyncSession, name: str) -> Optional[datetime]:
+    """Last processed timestamp for a job, or None if it never ran."""
+    result = await db.execute(select(JobWatermark.value).where(JobWatermark.name == name))
+    return result.scalar_one_or_none()
+
+
+async def set_watermark(db: AsyncSession, name: str, value: datetime):
+    """Advance a job's watermark; the caller commits together with its writes."""
+    stmt = insert(JobWatermark).values(name=name, value=value)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": stmt.excluded.value, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
@@ -0,0 +1,435 @@
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional, List, Dict, Any, Tuple
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import time
+
+from app.core.config import settings
+from app.models.transaction import TransactionStatus
+from app.services.realtime import make_update, publish_updates
+
+logger = logging.getLogger(__name__)
+
+STRIPE = "stripe"
+
+# Provider event -> transaction status. A charge only counts as refunded
+# once the whole amount is back.
+STRIPE_EVENT_STATUS = {
+    "payment_intent.processing": TransactionStatus.PROCESSING,
+    "payment_intent.succeeded": TransactionStatus.COMPLETED,
+    "payment_intent.payment_failed": TransactionStatus.FAILED,
+    "payment_intent.canceled": TransactionStatus.CANCELLED,
+    "charge.refunded": TransactionStatus.REFUNDED,
+}
+
+# Providers retry and may deliver out of order, so an event can only move a
+# transaction forward: a late "processing" never reopens a completed payment.
+# A failed payment intent can still succeed with another payment method.
+ALLOWED_TRANSITIONS = {
+    TransactionStatus.PENDING: {
+        TransactionStatus.PROCESSING, TransactionStatus.COMPLETED,
+        TransactionStatus.FAILED, TransactionStatus.CANCELLED,
+    },
+    TransactionStatus.PROCESSING: {
+        TransactionStatus.COMPLETED, TransactionStatus.FAILED, TransactionStatus.CANCELLED,
+    },
+    TransactionStatus.FAILED: {
+        TransactionStatus.PROCESSING, TransactionStatus.COMPLETED, TransactionStatus.CANCELLED,
+    },
+    TransactionStatus.COMPLETED: {TransactionStatus.REFUNDED},
+    TransactionStatus.CANCELLED: set(),
+    TransactionStatus.REFUNDED: set(),
+}
+FINAL_STATUSES = {
+    TransactionStatus.COMPLETED, TransactionStatus.FAILED,
+    TransactionStatus.CANCELLED, TransactionStatus.REFUNDED,
+}
+
+INSERT_EVENT_SQL = """
+    INSERT INTO webhook_events (provider, event_id, event_type, external_id, payload, attempts, received_at)
+    VALUES (:provider, :event_id, :event_type, :external_id, :payload, 0, now())
+    ON CONFLICT (provider, event_id) DO NOTHING
+    RETURNING id
+"""
+
+# Oldest pending events not held by another worker or waiting for a retry
+CLAIM_SQL = """
+    SELECT id, provider, event_id, event_type, external_id, payload
+    FROM webhook_events
+    WHERE processed_at IS NULL AND attempts < :max_attempts
+      AND (not_before IS NULL OR not_before <= now())
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+"""
+
+# Objects with a pending event outside this claim that arrived before the
+# claim's last event for them (held by another worker, or waiting for a
+# retry). Their events stay queued so each object sees its events in order.
+BLOCKED_SQL = """
+    SELECT DISTINCT c.external_id
+    FROM unnest(CAST(:external_ids AS text[]), CAST(:last_ids AS bigint[])) AS c(external_id, last_id)
+    JOIN webhook_events e ON e.external_id = c.external_id
+    WHERE e.processed_at IS NULL AND e.attempts < :max_attempts
+      AND e.id < c.last_id AND NOT e.id = ANY(CAST(:claimed AS bigint[]))
+"""
+
+# Locked in id order so concurrent workers cannot deadlock on shared objects
+TRANSACTIONS_SQL = """
+    SELECT id, user_id, external_id, status
+    FROM transactions
+    WHERE external_id = ANY(CAST(:external_ids AS text[]))
+    ORDER BY id
+    FOR UPDATE
+"""
+
+APPLY_SQL = """
+    UPDATE transactions t
+    SET status = CAST(u.status AS transactionstatus),
+        processed_at = coalesce(u.processed_at, t.processed_at),
+        failure_reason = coalesce(u.failure_reason, t.failure_reason),
+        updated_at = now()
+    FROM unnest(
+        CAST(:ids AS integer[]), CAST(:statuses AS text[]),
+        CAST(:processed_at AS timestamptz[]), CAST(:failure_reasons AS text[])
+    ) AS u(id, status, processed_at, failure_reason)
+    WHERE t.id = u.id
+"""
+
+MARK_PROCESSED_SQL = """
+    UPDATE webhook_events
+    SET processed_at = now(), attempts = attempts + 1, last_error = NULL
+    WHERE id = ANY(CAST(:ids AS bigint[]))
+"""
+
+# Events whose transaction is not committed yet (a callback can beat the
+# request that creates it) stay pending and are retried with exponential
+# backoff; after WEBHOOK_MAX_ATTEMPTS they are left for inspection
+DEFER_UNMATCHED_SQL = """
+    UPDATE webhook_events
+    SET attempts = attempts + 1, last_error = 'no matching transaction',
+        not_before = now() + make_interval(secs => least(:max_delay, :base_delay * power(2, attempts)))
+    WHERE id = ANY(CAST(:ids AS bigint[]))
+"""
+
+MARK_FAILED_SQL = """
+    UPDATE webhook_events
+    SET attempts = attempts + 1, last_error = :error
+    WHERE id = ANY(CAST(:ids AS bigint[]))
+"""
+
+BACKLOG_SQL = """
+    SELECT count(*) FILTER (WHERE attempts < :max_attempts) AS pending,
+           count(*) FILTER (WHERE attempts >= :max_attempts) AS dead,
+           extract(epoch FROM now() - min(received_at) FILTER (WHERE attempts < :max_attempts)) AS oldest_seconds
+    FROM webhook_events
+    WHERE processed_at IS NULL
+"""
+
+
+class InvalidSignature(ValueError):
+    """The webhook body does not carry a valid, fresh provider signature."""
+
+
+def verify_stripe_signature(payload: bytes, header: Optional[str], secret: str,
+                            tolerance: int, now: Optional[float] = None):
+    """Check a Stripe-Signature header ("t=<unix>,v1=<hex>[,v1=...]").
+
+    The signed message is "<t>.<raw body>" under HMAC-SHA256; any v1
+    signature may match (several are sent while a secret is rolled), and
+    timestamps outside `tolerance` seconds are rejected as replays.
+    """
+    if not header:
+        raise InvalidSignature("Missing signature header")
+    timestamp, signatures = None, []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if timestamp is None or not timestamp.isdigit() or not signatures:
+        raise InvalidSignature("Malformed signature header")
+    if abs((now if now is not None else time.time()) - int(timestamp)) > tolerance:
+        raise InvalidSignature("Signature timestamp outside the tolerance window")
+
+    expected = hmac.new(secret.encode(), timestamp.encode() + b"." + payload, hashlib.sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise InvalidSignature("Signature does not match")
+
+
+def stripe_external_id(event: Dict[str, Any]) -> Optional[str]:
+    """Provider id recorded in Transaction.external_id (the payment intent)."""
+    obj = (event.get("data") or {}).get("object") or {}
+    return obj.get("payment_intent") or obj.get("id")
+
+
+async def ingest_stripe_event(db: AsyncSession, payload: bytes, signature: Optional[str]) -> bool:
+    """Verify and append a Stripe callback to the inbox; False for a redelivery.
+
+    This is all the request does: one insert and commit, so the provider
+    gets its 2xx in milliseconds and never times out waiting for
+    processing. wake_webhook_worker() lets this process's worker pick the
+    event up right away.
+    """
+    verify_stripe_signature(payload, signature, settings.STRIPE_WEBHOOK_SECRET,
+                            settings.STRIPE_WEBHOOK_TOLERANCE_SECONDS)
+    try:
+        event = json.loads(payload)
+        event_id, event_type = event["id"], event["type"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Webhook body is not a provider event")
+
+    row = (await db.execute(text(INSERT_EVENT_SQL), {
+        "provider": STRIPE,
+        "event_id": event_id,
+        "event_type": event_type,
+        "external_id": stripe_external_id(event),
+        "payload": payload.decode(),
+    })).one_or_none()
+    await db.commit()
+    return row is not None
+
+
+def event_status(provider: str, event_type: str, event: Dict[str, Any]) -> Tuple[Optional[TransactionStatus], Optional[str]]:
+    """Target status and failure reason carried by an event, if any."""
+    if provider != STRIPE:
+        return None, None
+    status = STRIPE_EVENT_STATUS.get(event_type)
+    obj = (event.get("data") or {}).get("object") or {}
+    if status is TransactionStatus.REFUNDED and not obj.get("refunded"):
+        return None, None
+    reason = None
+    if status is TransactionStatus.FAILED:
+        reason = (obj.get("last_payment_error") or {}).get("message") or "Payment failed"
+    elif status is TransactionStatus.CANCELLED:
+        reason = obj.get("cancellation_reason")
+    return status, reason
+
+
+def fold_events(current: TransactionStatus, events: List[Tuple[Optional[TransactionStatus], Optional[str], datetime]]):
+    """Apply an object's events in arrival order; returns the final
+    (status, processed_at, failure_reason), or None if nothing changes."""
+    status, processed_at, reason = current, None, None
+    for target, target_reason, at in events:
+        if target is None or target not in ALLOWED_TRANSITIONS[status]:
+            continue
+        status = target
+        if target in FINAL_STATUSES:
+            processed_at = processed_at or at
+        reason = target_reason
+    if status == current:
+        return None
+    return status, processed_at, reason
+
+
+@dataclass
+class WebhookMetrics:
+    batches: int = 0
+    failed_batches: int = 0
+    events_processed: int = 0
+    events_deferred: int = 0
+    events_unmatched: int = 0
+    transactions_updated: int = 0
+    last_batch_at: Optional[datetime] = None
+    last_batch_seconds: float = 0.0
+    max_batch_seconds: float = 0.0
+
+
+_metrics = WebhookMetrics()
+
+
+async def process_webhook_batch(db: AsyncSession, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Claim and apply one batch of inbox events.
+
+    Events are claimed with FOR UPDATE SKIP LOCKED, so any number of
+    workers share the inbox. Every object's claimed events are folded in
+    arrival order into one status change, written for all transactions of
+    the batch in a single UPDATE. Events for a transaction that does not
+    exist yet are not acknowledged but retried later, and so are the
+    events of a batch that fails, until WEBHOOK_MAX_ATTEMPTS.
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    max_attempts = settings.WEBHOOK_MAX_ATTEMPTS
+    started = time.perf_counter()
+
+    rows = (await db.execute(text(CLAIM_SQL), {"max_attempts": max_attempts, "batch_size": batch_size})).all()
+    if not rows:
+        await db.commit()
+        return {"claimed": 0, "processed": 0, "deferred": 0}
+    claimed = [row.id for row in rows]
+
+    try:
+        last_ids: Dict[str, int] = {}
+        for row in rows:
+            if row.external_id:
+                last_ids[row.external_id] = row.id
+        blocked = set()
+        if last_ids:
+            blocked = set((await db.execute(text(BLOCKED_SQL), {
+                "external_ids": list(last_ids),
+                "last_ids": list(last_ids.values()),
+                "claimed": claimed,
+                "max_attempts": max_attempts,
+            })).scalars())
+        ready = [row for row in rows if row.external_id not in blocked]
+
+        now = datetime.now(timezone.utc)
+        events_by_object = defaultdict(list)
+        for row in ready:
+            if row.external_id:
+                event = json.loads(row.payload)
+                status, reason = event_status(row.provider, row.event_type, event)
+                created = event.get("created")
+                at = datetime.fromtimestamp(created, timezone.utc) if isinstance(created, int) else now
+                events_by_object[row.external_id].append((status, reason, at))
+        relevant = {external_id for external_id, events in events_by_object.items() if any(s for s, _, _ in events)}
+
+        updates = []
+        pushes = []
+        matched = set()
+        if relevant:
+            transactions = (await db.execute(text(TRANSACTIONS_SQL), {"external_ids": list(relevant)})).all()
+            for transaction in transactions:
+                matched.add(transaction.external_id)
+                change = fold_events(TransactionStatus[transaction.status], events_by_object[transaction.external_id])
+                if change is not None:
+                    status, processed_at, reason = change
+                    updates.append((transaction.id, status.name, processed_at, reason))
+                    pushes.append((transaction.user_id, make_update(
+                        "transaction", transaction.id, status=status.value, processed_at=processed_at,
+                    )))
+        if updates:
+            ids, statuses, processed, reasons = (list(column) for column in zip(*updates))
+            await db.execute(text(APPLY_SQL), {
+                "ids": ids, "statuses": statuses, "processed_at": processed, "failure_reasons": reasons,
+            })
+
+        unmatched = [row.id for row in ready if row.external_id in relevant and row.external_id not in matched]
+        if unmatched:
+            await db.execute(text(DEFER_UNMATCHED_SQL), {
+                "ids": unmatched,
+                "base_delay": settings.WEBHOOK_UNMATCHED_RETRY_SECONDS,
+                "max_delay": settings.WEBHOOK_UNMATCHED_RETRY_MAX_SECONDS,
+            })
+        unmatched = set(unmatched)
+        processed = [row.id for row in ready if row.id not in unmatched]
+        await db.execute(text(MARK_PROCESSED_SQL), {"ids": processed})
+        await db.commit()
+    except Exception as exc:
+        await db.rollback()
+        await db.execute(text(MARK_FAILED_SQL), {"ids": claimed, "error": repr(exc)[:1000]})
+        await db.commit()
+        _metrics.failed_batches += 1
+        logger.exception("Webhook batch of %d events failed; they will be retried", len(claimed))
+        raise
+
+    await publish_updates(pushes)
+
+    elapsed = time.perf_counter() - started
+    _metrics.batches += 1
+    _metrics.events_processed += len(processed)
+    _metrics.events_deferred += len(rows) - len(ready)
+    _metrics.events_unmatched += len(unmatched)
+    _metrics.transactions_updated += len(updates)
+    _metrics.last_batch_at = datetime.now(timezone.utc)
+    _metrics.last_batch_seconds = elapsed
+    _metrics.max_batch_seconds = max(_metrics.max_batch_seconds, elapsed)
+    return {"claimed": len(rows), "processed": len(processed), "deferred": len(rows) - len(processed)}
+
+
+async def drain_webhooks(batch_size: Optional[int] = None) -> int:
+    """Process batches until the inbox has no claimable events left; returns events processed."""
+    from app.core.database import AsyncSessionLocal
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    total = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            batch = await process_webhook_batch(db, batch_size)
+        total += batch["processed"]
+        # A full batch held back entirely waits for the other worker
+        if batch["claimed"] < batch_size or batch["processed"] == 0:
+            return total
+
+
+async def prune_webhook_events(db: AsyncSession, retention_days: Optional[int] = None) -> int:
+    """Delete processed events older than the retention window."""
+    retention_days = retention_days or settings.WEBHOOK_RETENTION_DAYS
+    result = await db.execute(
+        text("DELETE FROM webhook_events WHERE processed_at < now() - make_interval(days => :days)"),
+        {"days": retention_days},
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def webhook_stats(db: AsyncSession) -> Dict[str, Any]:
+    backlog = (await db.execute(text(BACKLOG_SQL), {"max_attempts": settings.WEBHOOK_MAX_ATTEMPTS})).one()
+    return {
+        **asdict(_metrics),
+        "pending_events": backlog.pending,
+        "dead_events": backlog.dead,
+        "oldest_pending_seconds": round(float(backlog.oldest_seconds or 0), 3),
+    }
+
+
+_wake = asyncio.Event()
+_worker: Optional[asyncio.Task] = None
+
+
+def wake_webhook_worker():
+    """Signal this process's worker that a new event is in the inbox."""
+    _wake.set()
+
+
+async def _worker_loop(interval: float):
+    while True:
+        try:
+            await asyncio.wait_for(_wake.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+        _wake.clear()
+        try:
+            await drain_webhooks()
+        except Exception:
+            # Already logged and counted as an attempt; retried on the next tick
+            await asyncio.sleep(interval)
+
+
+def start_webhook_worker():
+    """Start the inbox worker task; called on application startup."""
+    global _worker
+    if _worker is None:
+        _worker = asyncio.create_task(_worker_loop(settings.WEBHOOK_POLL_INTERVAL_SECONDS))
+
+
+async def stop_webhook_worker():
+    """Stop the inbox worker; unprocessed events stay in the inbox."""
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
+
+
+async def main():
+    """Entry point for a standalone inbox worker run and the retention prune."""
+    from app.core.database import AsyncSessionLocal
+    processed = await drain_webhooks()
+    async with AsyncSessionLocal() as db:
+        pruned = await prune_webhook_events(db)
+        print(f"Webhook inbox: {processed} events processed, {pruned} pruned, {await webhook_stats(db)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import Iterable, Sequence, Tuple
+import os
+import uuid
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+
+# Rows per sheet including the header; Excel cannot open longer sheets
+MAX_SHEET_ROWS = 1_048_576
+MAX_TITLE_LENGTH = 31
+
+
+class XlsxWriter:
+    """Streaming .xlsx writer on openpyxl's write-only mode.
+
+    Each appended row is serialized to the sheet's temp file right away,
+    strings inline rather than in a shared-string table, so memory stays
+    flat however many rows are written. Sheets roll over to "Title 2",
+    "Title 3"... at Excel's row limit. The workbook is saved next to
+    `path` and renamed, so a reader never sees a partial file. Blocking:
+    call from a thread.
+    """
+
+    def __init__(self, path: Path, title: str, columns: Sequence[Tuple[str, float]],
+                 max_sheet_rows: int = MAX_SHEET_ROWS):
+        self.path = Path(path)
+        self.title = title
+        self.columns = columns
+        self.max_sheet_rows = max_sheet_rows
+        self.rows = 0
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+        self._sheets = 0
+
+    def _next_sheet(self):
+        self._sheets += 1
+        suffix = f" {self._sheets}" if self._sheets > 1 else ""
+        sheet = self._workbook.create_sheet(self.title[:MAX_TITLE_LENGTH - len(suffix)] + suffix)
+        # Column layout has to be set before the first row in write-only mode
+        for index, (_, width) in enumerate(self.columns, start=1):
+            sheet.column_dimensions[get_column_letter(index)].width = width
+        sheet.freeze_panes = "A2"
+        header = []
+        for name, _ in self.columns:
+            cell = WriteOnlyCell(sheet, value=name)
+            cell.font = Font(bold=True)
+            header.append(cell)
+        sheet.append(header)
+        self._sheet = sheet
+        self._sheet_rows = 1
+
+    def append_rows(self, rows: Iterable[Sequence]) -> int:
+        """Write rows of plain values (no timezone-aware datetimes); returns rows written."""
+        written = 0
+        for row in rows:
+            if self._sheet is None or self._sheet_rows >= self.max_sheet_rows:
+                self._next_sheet()
+            self._sheet.append(tuple(row))
+            self._sheet_rows += 1
+            written += 1
+        self.rows += written
+        return written
+
+    def close(self) -> int:
+        """Save the workbook to `path`; returns its size in bytes."""
+        if self._sheet is None:
+            self._next_sheet()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            self._workbook.save(tmp)
+            os.replace(tmp, self.path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return self.path.stat().st_size
+
+    def abort(self):
+        """Drop the sheets' temp files without writing a workbook."""
+        for sheet in self._workbook.worksheets:
+            if sheet._writer is not None:
+                if not sheet.closed:
+                    sheet.close()
+                sheet._writer.cleanup()
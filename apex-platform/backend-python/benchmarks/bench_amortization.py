@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Amortization schedule throughput benchmark.
+
+Generates a synthetic portfolio with every PaymentFrequency and typical
+terms, then measures schedules per second of
+app.services.amortization.amortization_schedules on a single core.
+The target is at least 100k schedules per second.
+
+    python -m benchmarks.bench_amortization --loans 100000 --repeat 5
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.amortization import amortization_schedules, PERIODS_PER_YEAR
+from benchmarks.common import summarize, print_summary
+
+
+def synthetic_portfolio(loans: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    per_year = np.array(list(PERIODS_PER_YEAR.values()))
+    frequency = rng.choice(per_year, size=loans, p=[0.1, 0.15, 0.65, 0.1])
+    term_months = rng.choice([6, 12, 18, 24, 36], size=loans)
+    return (
+        rng.uniform(5_000, 2_000_000, size=loans),
+        rng.uniform(8, 65, size=loans),
+        np.maximum(1, np.round(term_months * frequency / 12)).astype(np.int64),
+        frequency,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--loans", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    principal, rate, periods, per_year = synthetic_portfolio(args.loans)
+    amortization_schedules(principal[:1000], rate[:1000], periods[:1000], per_year[:1000])  # warm-up
+
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        batch = amortization_schedules(principal, rate, periods, per_year)
+        samples.append(time.perf_counter() - start)
+
+    print_summary(f"{args.loans} schedules", summarize(samples))
+    best = min(samples)
+    print(f"rows generated: {int(batch.lengths.sum())}")
+    print(f"throughput: {args.loans / best:,.0f} schedules/s (best of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
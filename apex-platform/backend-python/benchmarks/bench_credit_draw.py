@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Parallel credit draw benchmark.
+
+Creates a user with an active wallet and credit line, then fires many
+concurrent draws whose sum exceeds the limit. Verifies that the accepted
+draws never exceed the limit and that credit line, wallet and CREDIT
+transactions agree, and reports draw latency and throughput.
+
+    python -m benchmarks.bench_credit_draw --draws 2000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.config import settings
+from app.services.credit_draw import draw_credit
+from benchmarks.common import summarize, print_summary
+
+SETUP_SQL = [
+    """
+    INSERT INTO users (email, hashed_password, first_name, last_name, role,
+                       is_active, is_verified, kyc_status, credit_score, monthly_income)
+    VALUES (:email, 'x', 'Draw', 'Bench', 'CUSTOMER', true, true, 'APPROVED', 700, 50000)
+    RETURNING id
+    """,
+    """
+    INSERT INTO wallets (user_id, balance, available_balance, frozen_balance, credit_limit, used_credit,
+                         available_credit, cashback_balance, total_cashback_earned, currency, status,
+                         daily_limit, monthly_limit, withdrawal_limit, wallet_number)
+    VALUES (:user_id, 0, 0, 0, :limit, 0, :limit, 0, 0, 'MXN', 'ACTIVE', 50000, 500000, 20000, :wallet_number)
+    """,
+    """
+    INSERT INTO credit_lines (user_id, credit_line_number, credit_type, approved_limit, current_limit,
+                              used_amount, available_amount, interest_rate, payment_frequency, term_months,
+                              status, provider, minimum_payment, next_payment_amount, total_payments_made,
+                              total_amount_paid, total_interest_paid, days_past_due, late_payment_count,
+                              collateral_required, guarantee_required)
+    VALUES (:user_id, :number, 'WORKING_CAPITAL', :limit, :limit, 0, :limit, 24, 'MONTHLY', 12,
+            'ACTIVE', 'Apex', 0, 0, 0, 0, 0, 0, 0, false, false)
+    RETURNING id
+    """,
+]
+
+
+async def setup(sessionmaker, limit: float):
+    suffix = uuid.uuid4().hex[:10]
+    async with sessionmaker() as db:
+        user_id = (await db.execute(text(SETUP_SQL[0]), {"email": f"draw-{suffix}@example.com"})).scalar_one()
+        await db.execute(text(SETUP_SQL[1]), {"user_id": user_id, "limit": limit, "wallet_number": f"W{suffix}"})
+        line_id = (await db.execute(
+            text(SETUP_SQL[2]), {"user_id": user_id, "limit": limit, "number": f"CL-{suffix}"}
+        )).scalar_one()
+        await db.commit()
+    return user_id, line_id
+
+
+async def run(args):
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0)
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    user_id, line_id = await setup(sessionmaker, args.limit)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    outcomes = Counter()
+
+    async def one_draw():
+        async with semaphore, sessionmaker() as db:
+            start = time.perf_counter()
+            result = await draw_credit(db, user_id, line_id, args.amount)
+            latencies.append(time.perf_counter() - start)
+            outcomes[result.reason or "accepted"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_draw() for _ in range(args.draws)))
+    elapsed = time.perf_counter() - started
+
+    async with sessionmaker() as db:
+        line = (await db.execute(
+            text("SELECT used_amount, available_amount FROM credit_lines WHERE id = :id"), {"id": line_id}
+        )).one()
+        wallet_used = (await db.execute(
+            text("SELECT used_credit FROM wallets WHERE user_id = :id"), {"id": user_id}
+        )).scalar_one()
+        tx = (await db.execute(
+            text("SELECT count(*), coalesce(sum(amount), 0) FROM transactions WHERE credit_line_id = :id AND type = 'CREDIT'"),
+            {"id": line_id},
+        )).one()
+    await engine.dispose()
+
+    accepted = outcomes["accepted"]
+    print(f"outcomes: {dict(outcomes)}")
+    print_summary("draw latency", summarize(latencies))
+    print(f"throughput: {args.draws / elapsed:,.0f} draws/s")
+    print(f"credit line used={line.used_amount:.2f} available={line.available_amount:.2f}; "
+          f"wallet used_credit={wallet_used:.2f}; transactions={tx[0]} totalling {tx[1]:.2f}")
+
+    expected = accepted * args.amount
+    checks = {
+        "no over-draw": line.used_amount <= args.limit + 1e-6,
+        "line matches accepted draws": abs(line.used_amount - expected) < 1e-6,
+        "wallet mirrors line": abs(wallet_used - expected) < 1e-6,
+        "one transaction per accepted draw": tx[0] == accepted,
+    }
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--draws", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--limit", type=float, default=100_000.0)
+    parser.add_argument("--amount", type=float, default=75.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
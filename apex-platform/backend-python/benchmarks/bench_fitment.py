@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Vehicle fitment lookup benchmark.
+
+Seeds an autoparts catalog (5M parts by default) with generate_series,
+builds autopart_fitments in one pass, then measures lookups through
+app.services.fitment with and without category/brand filters, both from
+the table and from the hot-vehicle arrays.
+
+    python -m benchmarks.bench_fitment --parts 5000000 --seed
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import text
+
+from app.core.database import async_engine, AsyncSessionLocal, init_db
+from app.models.autopartes import ProductCategory
+from app.services.fitment import find_compatible_part_ids, rebuild_fitment, clear_fitment_cache, _hot_vehicles
+from benchmarks.common import summarize, print_summary, stopwatch
+
+MAKES = {
+    "Toyota": ["Corolla", "Camry", "Hilux", "RAV4", "Yaris"],
+    "Nissan": ["Versa", "Sentra", "March", "NP300", "Kicks"],
+    "Chevrolet": ["Aveo", "Spark", "Beat", "Onix", "Silverado"],
+    "Volkswagen": ["Jetta", "Vento", "Golf", "Tiguan", "Polo"],
+    "Honda": ["Civic", "CR-V", "City", "Accord", "HR-V"],
+}
+BRANDS = ["Bosch", "ACDelco", "Brembo", "Denso", "Gonher", "LTH", "Monroe", "NGK", "Wix", "Moog"]
+CATEGORIES = [category.name for category in ProductCategory]
+
+# Each part fits one make, up to two of its models, a 4-year window and one
+# engine; every 50th part is universal (empty lists).
+SEED_PARTS_SQL = """
+INSERT INTO autoparts (sku, part_number, name, category, brand, condition, warranty_months,
+                       cost_price, selling_price, discount_percentage,
+                       stock_quantity, reserved_quantity, available_quantity, minimum_stock, maximum_stock,
+                       status, is_featured, is_bestseller, total_sold, total_revenue, view_count,
+                       rating_average, rating_count, lead_time_days, minimum_order_quantity, hazmat,
+                       compatible_makes, compatible_models, compatible_years, engine_types)
+SELECT 'BENCH-' || g, 'PN-' || g, 'Refacción ' || g,
+       CAST((CAST(:categories AS text[]))[1 + g % :n_categories] AS productcategory),
+       (CAST(:brands AS text[]))[1 + (g / 7) % :n_brands],
+       'NEW', 12, 100, 150, 0, 10, 0, 10, 1, 100,
+       'ACTIVE', false, false, 0, 0, 0, 0, 0, 7, 1, false,
+       CASE WHEN g % 50 = 0 THEN NULL ELSE json_build_array(split_part(v.first, '|', 1)) END,
+       CASE WHEN g % 50 = 0 THEN NULL ELSE
+           json_build_array(split_part(v.first, '|', 2), split_part(v.second, '|', 2)) END,
+       CASE WHEN g % 50 = 0 THEN NULL ELSE
+           (SELECT json_agg(y) FROM generate_series(2008 + g % 14, 2011 + g % 14) AS y) END,
+       CASE WHEN g % 50 = 0 THEN NULL ELSE json_build_array(CASE WHEN g % 2 = 0 THEN '1.8L' ELSE '2.0L' END) END
+FROM generate_series(:start, :stop) AS g
+CROSS JOIN LATERAL (
+    -- :vehicles is 'make|model' grouped by make, five models each
+    SELECT (CAST(:vehicles AS text[]))[1 + g % 25] AS first,
+           (CAST(:vehicles AS text[]))[1 + (g % 25) / 5 * 5 + (g / 25) % 5] AS second
+) v
+"""
+
+
+async def seed(parts: int, batch: int):
+    params = {
+        "categories": CATEGORIES, "n_categories": len(CATEGORIES),
+        "brands": BRANDS, "n_brands": len(BRANDS),
+        "vehicles": [f"{make}|{model}" for make, models in MAKES.items() for model in models],
+    }
+    async with async_engine.begin() as conn:
+        existing = (await conn.execute(text("SELECT count(*) FROM autoparts WHERE sku LIKE 'BENCH-%'"))).scalar_one()
+        # Row triggers are replaced by one rebuild at the end
+        await conn.execute(text("ALTER TABLE autoparts DISABLE TRIGGER autoparts_fitment_insert"))
+    try:
+        start = existing + 1
+        while start <= parts:
+            stop = min(parts, start + batch - 1)
+            async with async_engine.begin() as conn:
+                await conn.execute(text(SEED_PARTS_SQL), {**params, "start": start, "stop": stop})
+            print(f"  seeded parts {start}..{stop}")
+            start = stop + 1
+    finally:
+        async with async_engine.begin() as conn:
+            await conn.execute(text("ALTER TABLE autoparts ENABLE TRIGGER autoparts_fitment_insert"))
+
+    async with AsyncSessionLocal() as db:
+        rows = await rebuild_fitment(db)
+    print(f"  fitment rows: {rows}")
+    async with async_engine.begin() as conn:
+        await conn.execute(text("ANALYZE autoparts"))
+        await conn.execute(text("ANALYZE autopart_fitments"))
+
+
+def sample_lookups(count: int):
+    rng = random.Random(42)
+    lookups = []
+    for _ in range(count):
+        make = rng.choice(list(MAKES))
+        lookup = {"make": make, "model": rng.choice(MAKES[make]), "year": rng.randint(2008, 2024)}
+        if rng.random() < 0.5:
+            lookup["category"] = rng.choice(list(ProductCategory))
+        if rng.random() < 0.3:
+            lookup["brand"] = rng.choice(BRANDS)
+        if rng.random() < 0.3:
+            lookup["engine_type"] = rng.choice(("1.8L", "2.0L"))
+        lookups.append(lookup)
+    return lookups
+
+
+async def run(args):
+    if args.seed:
+        await init_db()
+        with stopwatch(f"seed {args.parts} parts"):
+            await seed(args.parts, args.batch)
+
+    lookups = sample_lookups(args.lookups)
+    for label, hot in (("table", False), ("hot arrays", True)):
+        clear_fitment_cache()
+        admit_hits = _hot_vehicles.admit_hits
+        _hot_vehicles.admit_hits = 1 if hot else 10 ** 9
+        samples = []
+        try:
+            async with AsyncSessionLocal() as db:
+                if hot:
+                    for lookup in lookups:
+                        await find_compatible_part_ids(db, limit=args.limit, **lookup)
+                for lookup in lookups:
+                    start = time.perf_counter()
+                    await find_compatible_part_ids(db, limit=args.limit, **lookup)
+                    samples.append(time.perf_counter() - start)
+        finally:
+            _hot_vehicles.admit_hits = admit_hits
+        print_summary(f"fitment lookup ({label})", summarize(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parts", type=int, default=5_000_000)
+    parser.add_argument("--batch", type=int, default=250_000)
+    parser.add_argument("--lookups", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", action="store_true", help="Create and populate the benchmark data first")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
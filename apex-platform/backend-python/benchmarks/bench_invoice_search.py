@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Invoice search benchmark.
+
+Seeds a large invoices table (10M rows by default) with generate_series,
+then measures latency of the trigram search in app.services.invoice_search
+for a mix of invoice-number, RFC and notes queries.
+
+    python -m benchmarks.bench_invoice_search --rows 10000000 --seed
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+
+from sqlalchemy import text
+
+from app.core.database import async_engine, AsyncSessionLocal, init_db
+from app.services.invoice_search import search_invoices, clear_search_cache
+from benchmarks.common import summarize, print_summary, stopwatch
+
+SEED_USERS_SQL = """
+INSERT INTO users (email, hashed_password, first_name, last_name, rfc, role,
+                   is_active, is_verified, kyc_status, credit_score, monthly_income)
+SELECT 'bench' || g || '@example.com', 'x', 'Bench', 'User',
+       'BEN' || lpad(g::text, 6, '0') || 'AB1', 'PROVIDER',
+       true, true, 'APPROVED', 700, 50000
+FROM generate_series(1, :users) AS g
+ON CONFLICT (email) DO NOTHING
+"""
+
+SEED_INVOICES_SQL = """
+INSERT INTO invoices (invoice_number, folio, series, issuer_id, receiver_id,
+                      subtotal, tax_amount, discount_amount, total, currency, exchange_rate,
+                      status, issue_date, due_date, payment_terms, payment_method, payment_form,
+                      cfdi_use, cfdi_status, items, notes, factoring_available, created_at)
+SELECT 'INV-' || lpad(g::text, 10, '0'),
+       (g % 100000)::text,
+       chr(65 + (g % 26)),
+       u.ids[1 + (g % array_length(u.ids, 1))],
+       u.ids[1 + ((g * 7) % array_length(u.ids, 1))],
+       1000, 160, 0, 1160, 'MXN', 1,
+       'SENT', now() - (g % 365) * interval '1 day', now() + interval '30 days',
+       'NET_30', 'PUE', '99', 'GASTOS_GENERALES', 'issued', '[]',
+       'Pedido ' || md5(g::text) || ' refacciones',
+       true, now()
+FROM generate_series(:start, :stop) AS g,
+     (SELECT array_agg(id) AS ids FROM users WHERE email LIKE :pattern) AS u
+"""
+
+
+async def seed(rows: int, users: int, batch: int):
+    async with async_engine.begin() as conn:
+        await conn.execute(text(SEED_USERS_SQL), {"users": users})
+        existing = (await conn.execute(text("SELECT count(*) FROM invoices"))).scalar_one()
+    start = existing + 1
+    while start <= rows:
+        stop = min(rows, start + batch - 1)
+        async with async_engine.begin() as conn:
+            await conn.execute(text(SEED_INVOICES_SQL), {"start": start, "stop": stop, "pattern": "bench%"})
+        print(f"  seeded invoices {start}..{stop}")
+        start = stop + 1
+    async with async_engine.begin() as conn:
+        await conn.execute(text("ANALYZE invoices"))
+        await conn.execute(text("ANALYZE users"))
+
+
+def sample_queries(rows: int, count: int):
+    rng = random.Random(42)
+    queries = []
+    for _ in range(count):
+        g = rng.randint(1, rows)
+        kind = rng.choice(("number", "rfc", "notes"))
+        if kind == "number":
+            queries.append(f"INV-{g:010d}"[:-1])
+        elif kind == "rfc":
+            queries.append(f"BEN{rng.randint(1, 1000):06d}")
+        else:
+            queries.append(hashlib.md5(str(g).encode()).hexdigest()[:8])
+    return queries
+
+
+async def run(args):
+    if args.seed:
+        await init_db()
+        with stopwatch(f"seed {args.rows} invoices"):
+            await seed(args.rows, args.users, args.batch)
+
+    queries = sample_queries(args.rows, args.queries)
+    for label, use_cache in (("cold", False), ("cached", True)):
+        clear_search_cache()
+        if use_cache:
+            async with AsyncSessionLocal() as db:
+                for query in queries:
+                    await search_invoices(db, query, limit=args.limit)
+        samples = []
+        async with AsyncSessionLocal() as db:
+            for query in queries:
+                if not use_cache:
+                    clear_search_cache()
+                start = time.perf_counter()
+                page = await search_invoices(db, query, limit=args.limit)
+                samples.append(time.perf_counter() - start)
+                if page["next_cursor"] and not use_cache:
+                    await search_invoices(db, query, limit=args.limit, cursor=page["next_cursor"])
+        print_summary(f"search ({label})", summarize(samples))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--batch", type=int, default=500_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--seed", action="store_true", help="Create and populate the benchmark data first")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Credit portfolio analytics benchmark.
+
+Feeds a synthetic 1M-line portfolio through PortfolioAccumulator in
+chunks, first without and then with a previous snapshot (roll rates),
+and reports compute time and snapshot size. With --db the real
+build_portfolio_snapshot job runs against the configured database instead.
+
+    python -m benchmarks.bench_portfolio_analytics --lines 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.portfolio_analytics import (
+    PortfolioAccumulator,
+    PORTFOLIO_COLUMNS,
+    unpack_status_vector,
+)
+from benchmarks.common import stopwatch
+
+
+def synthetic_chunks(lines: int, chunk_size: int, seed: int):
+    rng = np.random.default_rng(seed)
+    for start in range(0, lines, chunk_size):
+        n = min(chunk_size, lines - start)
+        limit = rng.uniform(10_000, 2_000_000, n)
+        used = limit * rng.beta(2, 3, n)
+        yield pd.DataFrame({
+            "id": np.arange(start + 1, start + n + 1),
+            "credit_type": rng.choice(["WORKING_CAPITAL", "INVENTORY", "EQUIPMENT", "EXPANSION", "EMERGENCY"], n),
+            "provider": rng.choice(["Kueski", "Konfío", "Apex"], n),
+            "risk_category": rng.choice(["low", "medium", "high", None], n, p=[0.4, 0.35, 0.2, 0.05]),
+            "status": "ACTIVE",
+            "current_limit": limit,
+            "used_amount": used,
+            "available_amount": limit - used,
+            "days_past_due": rng.choice([0, 3, 20, 45, 75, 120], n, p=[0.8, 0.06, 0.05, 0.04, 0.03, 0.02]),
+            "collateral_required": rng.random(n) < 0.25,
+        }, columns=PORTFOLIO_COLUMNS)
+
+
+def run_in_memory(lines: int, chunk_size: int):
+    first = PortfolioAccumulator()
+    start = time.perf_counter()
+    for frame in synthetic_chunks(lines, chunk_size, seed=1):
+        first.add_chunk(frame)
+    first.metrics()
+    print(f"snapshot without roll rates: {time.perf_counter() - start:.2f}s (incl. data generation)")
+
+    vector = first.status_vector()
+    print(f"status vector: {len(vector) / 1e6:.2f} MB")
+
+    second = PortfolioAccumulator(unpack_status_vector(vector))
+    start = time.perf_counter()
+    for frame in synthetic_chunks(lines, chunk_size, seed=2):
+        second.add_chunk(frame)
+    metrics = second.metrics()
+    print(f"snapshot with roll rates: {time.perf_counter() - start:.2f}s (incl. data generation)")
+    print(f"expected loss: {metrics['expected_loss']:,.2f} ({metrics['expected_loss_rate']:.2f}% of used)")
+
+
+async def run_against_db(chunk_size: int):
+    from app.core.database import AsyncSessionLocal
+    from app.services.portfolio_analytics import build_portfolio_snapshot
+    async with AsyncSessionLocal() as db:
+        with stopwatch("build_portfolio_snapshot"):
+            metrics = await build_portfolio_snapshot(db, chunk_size=chunk_size)
+    print(f"lines: {metrics['line_count']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--db", action="store_true", help="Run the real job against DATABASE_URL")
+    args = parser.parse_args()
+
+    if args.db:
+        asyncio.run(run_against_db(args.chunk_size))
+    else:
+        run_in_memory(args.lines, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Provider client harness against a local mock provider.
+
+Starts a small HTTP/1.1 keep-alive server on localhost whose routes are
+fast, slow, flaky, throttling, down or cacheable, then drives a
+ProviderClient at it and checks connection pooling, the concurrency cap,
+retries with backoff, Retry-After, the circuit breaker, single-flight
+response caching and that non-idempotent POSTs are not repeated. Reports
+client-side latency and the provider metrics.
+
+    python -m benchmarks.bench_provider_clients --requests 2000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlsplit, parse_qs
+
+from app.core.http_clients import ProviderClient, ProviderConfig, ProviderError, ProviderUnavailable
+from benchmarks.common import summarize, print_summary
+
+
+class MockProvider:
+    """Minimal HTTP/1.1 server with scripted failure modes per route."""
+
+    def __init__(self):
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.hits = Counter()
+        self.attempts_by_key = Counter()
+        self.down = True
+        self.server = None
+        self.handlers = set()
+        self.writers = set()
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        """Stop listening, close open connections and wait for their handlers."""
+        self.server.close()
+        for writer in self.writers:
+            writer.close()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        self.handlers.add(asyncio.current_task())
+        self.writers.add(writer)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = request_line.split(" ", 2)
+                headers = {
+                    name.strip().lower(): value.strip()
+                    for name, _, value in (line.partition(":") for line in header_lines if line)
+                }
+                length = int(headers.get("content-length", 0))
+                if length:
+                    await reader.readexactly(length)
+                status, extra, body = await self._route(method, target)
+                payload = json.dumps(body).encode()
+                response_headers = {"Content-Type": "application/json", "Content-Length": str(len(payload)), **extra}
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\n".encode()
+                    + "".join(f"{name}: {value}\r\n" for name, value in response_headers.items()).encode()
+                    + b"\r\n" + payload
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+            self.writers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+
+    async def _route(self, method: str, target: str):
+        url = urlsplit(target)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        route = url.path.strip("/")
+        self.hits[route] += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(int(query.get("delay_ms", 0)) / 1000)
+            key = (route, query.get("key"))
+            self.attempts_by_key[key] += 1
+            attempt = self.attempts_by_key[key]
+            if route == "flaky" and attempt <= int(query.get("fails", 1)):
+                return 503, {}, {"error": "unavailable"}
+            if route == "throttle" and attempt == 1:
+                return 429, {"Retry-After": "0.05"}, {"error": "slow down"}
+            if route == "down" and self.down:
+                return 503, {}, {"error": "down"}
+            if route == "catalog":
+                return 200, {"Cache-Control": "max-age=60"}, {"items": list(range(10))}
+            return 200, {}, {"ok": True}
+        finally:
+            self.in_flight -= 1
+
+
+async def run(args):
+    mock = MockProvider()
+    base_url = await mock.start()
+    # Keep-alive connections outlive the run, so every new connection
+    # the mock sees is one the pool failed to reuse
+    config = ProviderConfig(
+        name="mock", base_url=base_url, http2=False, timeout=5,
+        max_connections=args.pool, keepalive_expiry=3600, max_concurrency=args.pool, max_retries=3,
+        retry_base_delay=0.01, retry_max_delay=0.1,
+        breaker_failure_ratio=0.5, breaker_min_calls=20, breaker_window_seconds=args.breaker_window,
+        breaker_reset_seconds=args.breaker_reset,
+    )
+    client = ProviderClient(config)
+    try:
+        checks = await _exercise(client, config, mock, args)
+        print(f"provider metrics: {json.dumps(client.stats())}")
+    finally:
+        await client.aclose()
+        await mock.stop()
+
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+async def _exercise(client: ProviderClient, config: ProviderConfig, mock: MockProvider, args):
+    checks = {}
+
+    # Pooled throughput: many more callers than connections
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get("/ok", params={"delay_ms": args.delay_ms, "key": i})
+            latencies.append(time.perf_counter() - start)
+            return response.status_code
+
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(one(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    print_summary("pooled GET latency", summarize(latencies))
+    print(f"throughput: {args.requests / elapsed:,.0f} req/s over {mock.connections} connections")
+    checks["all pooled calls succeed"] = all(code == 200 for code in statuses)
+    checks["connections reused (<= pool size)"] = mock.connections <= args.pool
+    checks["concurrency capped at pool size"] = mock.max_in_flight <= args.pool
+
+    # Retries: every tenth call fails twice before succeeding. The whole
+    # phase fits in the breaker window, so its 40 failures always sit next
+    # to at least 180 successes and the circuit stays closed
+    retries_before = client.metrics.retries
+    statuses = await asyncio.gather(*(
+        client.get("/flaky", params={"key": i, "fails": 2 if i % 10 == 0 else 0}) for i in range(200)
+    ))
+    checks["flaky calls recover via retries"] = all(r.status_code == 200 for r in statuses)
+    checks["two retries per flaky call"] = client.metrics.retries - retries_before == 40
+
+    response = await client.get("/throttle", params={"key": "t"})
+    checks["429 retried after Retry-After"] = response.status_code == 200
+
+    # Non-idempotent POST is attempted once and returns the 5xx
+    hits_before = mock.hits["down"]
+    response = await client.post("/down", json={"amount": 1})
+    checks["POST without idempotency key not retried"] = (
+        response.status_code == 503 and mock.hits["down"] - hits_before == 1
+    )
+
+    # Breaker: once the earlier outcomes have slid out of the window, a
+    # dead provider gets exactly min_calls attempts (five calls of four
+    # attempts) before the circuit opens and rejects the rest
+    await asyncio.sleep(config.breaker_window_seconds)
+    hits_before = mock.hits["down"]
+    outcomes = Counter()
+    for _ in range(50):
+        try:
+            await client.get("/down")
+        except ProviderUnavailable:
+            outcomes["rejected"] += 1
+        except ProviderError:
+            outcomes["failed"] += 1
+    print(f"dead provider: {dict(outcomes)}, attempts reaching it: {mock.hits['down'] - hits_before}")
+    checks["circuit opens and rejects"] = client.breaker.state == "open" and outcomes["rejected"] == 50 - (
+        config.breaker_min_calls // (config.max_retries + 1))
+    checks["dead provider shielded"] = mock.hits["down"] - hits_before == config.breaker_min_calls
+
+    mock.down = False
+    await asyncio.sleep(args.breaker_reset)
+    response = await client.get("/down")
+    checks["half-open probe closes circuit"] = response.status_code == 200 and client.breaker.state == "closed"
+
+    # Cacheable GET: a burst of identical reads costs one upstream call
+    responses = await asyncio.gather(*(client.get("/catalog", cache_ttl=30) for _ in range(500)))
+    checks["cached burst hits upstream once"] = mock.hits["catalog"] == 1 and all(r.status_code == 200 for r in responses)
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--pool", type=int, default=20, help="Connections and concurrency limit")
+    parser.add_argument("--delay-ms", type=int, default=5, help="Mock provider latency")
+    parser.add_argument("--breaker-window", type=float, default=3.0,
+                        help="Breaker window; must outlast the flaky-retry phase")
+    parser.add_argument("--breaker-reset", type=float, default=0.5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Realtime push load test: idle WebSocket connections on one node.
+
+Runs a uvicorn worker in a subprocess whose /ws route serves a
+RealtimeHub on the in-process broker (the JWT lookup is replaced by a
+?user= parameter), opens many idle client connections against it, and
+measures server memory per connection, stats latency while the sockets
+sit idle, fan-out latency to a sample of users, coalescing of a burst
+of updates to one object and that a client which stops reading is
+dropped without affecting the others.
+
+    python -m benchmarks.bench_realtime --connections 50000
+
+Each socket needs a file descriptor on both ends; the run is capped at
+the RLIMIT_NOFILE hard limit of this host.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import resource
+import socket
+import time
+
+import httpx
+from websockets.asyncio.client import connect
+
+from benchmarks.common import summarize, print_summary
+
+
+def _raise_fd_limit() -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def _rss_mb() -> float:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _serve(port: int, max_pending: int, coalesce_ms: int):
+    import uvicorn
+    from fastapi import FastAPI, Request, WebSocket
+    from app.services.realtime import RealtimeHub, InProcessBroker
+
+    _raise_fd_limit()
+    hub = RealtimeHub(InProcessBroker(), max_pending=max_pending,
+                      coalesce_seconds=coalesce_ms / 1000, send_timeout=5.0)
+    app = FastAPI()
+
+    @app.on_event("startup")
+    async def startup():
+        await hub.start()
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket, user: int):
+        await websocket.accept()
+        await hub.serve(websocket, user)
+
+    @app.post("/publish")
+    async def publish(request: Request):
+        body = await request.json()
+        await hub.publish_many([(user_id, update) for user_id, update in body["updates"]])
+        return {"published": len(body["updates"])}
+
+    @app.get("/stats")
+    async def stats():
+        return {**hub.stats(), "rss_mb": _rss_mb()}
+
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning", backlog=4096,
+                ws_ping_interval=None, ws_per_message_deflate=False)
+
+
+class Client:
+    """One idle browser tab: connects, then only reads."""
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.frames = 0
+        self.updates = []
+        self.latencies = []
+        self.close_code = None
+        self.connection = None
+
+    async def open(self, base: str, **kwargs):
+        self.connection = await connect(f"{base}/ws?user={self.user_id}", open_timeout=60,
+                                        ping_interval=None, compression=None, **kwargs)
+
+    async def read(self):
+        try:
+            async for frame in self.connection:
+                received = time.time()
+                self.frames += 1
+                for update in json.loads(frame)["updates"]:
+                    self.updates.append(update)
+                    if "sent" in update:
+                        self.latencies.append(received - update["sent"])
+        except Exception:
+            pass
+        self.close_code = self.connection.close_code
+
+
+async def run(args):
+    limit = _raise_fd_limit()
+    connections = min(args.connections, limit - 500)
+    if connections < args.connections:
+        print(f"RLIMIT_NOFILE is {limit}; testing {connections} connections instead of {args.connections}")
+
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = multiprocessing.get_context("spawn").Process(
+        target=_serve, args=(port, args.max_pending, args.coalesce_ms), daemon=True
+    )
+    server.start()
+    base_http, base_ws = f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}"
+    http = httpx.AsyncClient(base_url=base_http, timeout=60)
+    for _ in range(100):
+        try:
+            await http.get("/stats")
+            break
+        except httpx.TransportError:
+            await asyncio.sleep(0.1)
+    checks = {}
+
+    async def stats():
+        return (await http.get("/stats")).json()
+
+    async def publish(updates):
+        await http.post("/publish", json={"updates": updates})
+
+    baseline = await stats()
+
+    # Connect the idle clients
+    clients = [Client(user_id) for user_id in range(1, connections + 1)]
+    semaphore = asyncio.Semaphore(args.connect_concurrency)
+    connect_times = []
+
+    async def open_one(client):
+        async with semaphore:
+            start = time.perf_counter()
+            await client.open(base_ws)
+            connect_times.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(open_one(client) for client in clients), return_exceptions=True)
+    elapsed = time.perf_counter() - started
+    failures = sum(1 for result in results if isinstance(result, Exception))
+    clients = [client for client in clients if client.connection is not None]
+    readers = [asyncio.create_task(client.read()) for client in clients]
+    print(f"connected {len(clients)} sockets in {elapsed:.1f}s ({len(clients) / elapsed:,.0f}/s), {failures} failed")
+    print_summary("connect latency", summarize(connect_times))
+    checks["all clients connected"] = failures == 0
+
+    # Idle: memory and responsiveness of the node
+    await asyncio.sleep(args.idle_seconds)
+    idle_latencies = []
+    for _ in range(20):
+        start = time.perf_counter()
+        loaded = await stats()
+        idle_latencies.append(time.perf_counter() - start)
+    per_connection_kb = (loaded["rss_mb"] - baseline["rss_mb"]) * 1024 / max(1, loaded["connections"])
+    print(f"server RSS {baseline['rss_mb']:.0f} MB -> {loaded['rss_mb']:.0f} MB "
+          f"({per_connection_kb:.1f} KB per idle connection, "
+          f"~{per_connection_kb * 50000 / 1024 / 1024:.1f} GB for 50k)")
+    print_summary("stats request latency while idle", summarize(idle_latencies))
+    checks["server registered every socket"] = loaded["connections"] == len(clients)
+
+    # Fan-out: one update to each sampled user in a single publish
+    sample = clients[::max(1, len(clients) // args.sample)]
+    sent = time.time()
+    await publish([
+        (client.user_id, {"type": "transaction", "id": client.user_id, "status": "completed", "sent": sent})
+        for client in sample
+    ])
+    await asyncio.sleep(1 + args.coalesce_ms / 1000)
+    latencies = [latency for client in sample for latency in client.latencies]
+    print_summary(f"fan-out to {len(sample)} users", summarize(latencies))
+    checks["every sampled user got its update"] = len(latencies) == len(sample)
+
+    # Coalescing: a burst on one wallet arrives as its latest state
+    target = clients[0]
+    frames_before, updates_before = target.frames, len(target.updates)
+    for burst in range(args.bursts):
+        await publish([
+            (target.user_id, {"type": "wallet", "id": 1, "balance": burst * 100 + i}) for i in range(100)
+        ])
+    await asyncio.sleep(1 + args.coalesce_ms / 1000)
+    received = target.updates[updates_before:]
+    print(f"coalescing: {args.bursts * 100} wallet updates -> {target.frames - frames_before} frames, "
+          f"{len(received)} updates delivered")
+    checks["burst coalesced to few frames"] = target.frames - frames_before <= args.bursts
+    checks["latest balance delivered"] = bool(received) and received[-1]["balance"] == args.bursts * 100 - 1
+
+    # Backpressure: a client that stops reading is dropped, others are not
+    stalled = Client(connections + 1)
+    await stalled.open(base_ws, max_queue=1, max_size=None)
+    padding = os.urandom(4096).hex()
+    dropped_before = (await stats())["dropped_slow"]
+    for round_ in range(5000):
+        await publish([
+            (stalled.user_id, {"type": "transaction", "id": round_ * 20 + i, "padding": padding})
+            for i in range(20)
+        ])
+        if (await stats())["dropped_slow"] > dropped_before:
+            break
+    after = await stats()
+    print(f"stalled client dropped after {round_ + 1} rounds; server RSS {after['rss_mb']:.0f} MB")
+    checks["stalled client dropped as slow consumer"] = after["dropped_slow"] == dropped_before + 1
+    checks["healthy clients untouched"] = after["connections"] == len(clients)
+
+    # Teardown: every socket is unregistered
+    await asyncio.gather(*(client.connection.close() for client in clients), return_exceptions=True)
+    await asyncio.gather(*readers)
+    for _ in range(100):
+        final = await stats()
+        if final["connections"] == 0:
+            break
+        await asyncio.sleep(0.1)
+    print(f"hub metrics: {json.dumps(final)}")
+    checks["all sockets unregistered"] = final["connections"] == 0 and final["users"] == 0
+
+    await http.aclose()
+    server.terminate()
+    server.join()
+
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=50000)
+    parser.add_argument("--connect-concurrency", type=int, default=200)
+    parser.add_argument("--idle-seconds", type=float, default=5.0)
+    parser.add_argument("--sample", type=int, default=2000, help="Users receiving the fan-out update")
+    parser.add_argument("--bursts", type=int, default=3, help="Bursts of 100 updates to one wallet")
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--coalesce-ms", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Report export benchmark: memory and throughput of the streaming writer.
+
+Writes synthetic invoice-report rows, in EXPORT_BATCH_ROWS batches as
+the export worker receives them from the server-side cursor, through
+XlsxWriter at increasing row counts, and the smaller counts through a
+regular in-memory openpyxl Workbook for comparison. Every run happens
+in a fresh process so its peak RSS is its own. Checks that streaming
+peak memory stays flat as the row count grows, that it is below the
+in-memory workbook's, and that the written file reads back complete.
+
+    python -m benchmarks.bench_report_exports --rows 10000 100000 1000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import queue
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import summarize, print_summary
+
+COLUMNS = (
+    ("Invoice", 18), ("Series", 8), ("Folio", 10), ("Customer", 32), ("Customer RFC", 16),
+    ("Issued", 18), ("Due", 18), ("Paid", 18), ("Status", 12), ("Currency", 9),
+    ("Exchange rate", 12), ("Subtotal", 14), ("Tax", 12), ("Discount", 12), ("Total", 14),
+    ("CFDI UUID", 38), ("CFDI status", 12),
+)
+STATUSES = ("sent", "paid", "overdue", "cancelled")
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _batches(rows: int, batch_size: int):
+    """Invoice-like rows with unique strings, built one batch at a time."""
+    issued = datetime(2026, 1, 1, 9, 0)
+    for first in range(0, rows, batch_size):
+        batch = []
+        for i in range(first, min(rows, first + batch_size)):
+            subtotal = 100 + (i * 37) % 50000 / 7
+            batch.append((
+                f"INV-{i:09d}", "A", str(i), f"Refaccionaria Cliente {i % 20000}", f"XAX{i % 1000000:06d}XX1",
+                issued + timedelta(minutes=i % 40000), issued + timedelta(days=30, minutes=i % 40000),
+                None if i % 3 else issued + timedelta(days=20), STATUSES[i % 4], "MXN", 1.0,
+                round(subtotal, 2), round(subtotal * 0.16, 2), 0.0, round(subtotal * 1.16, 2),
+                f"{i:08x}-7c1e-4b2a-9f00-{i * 2654435761 % 16 ** 12:012x}", "issued",
+            ))
+        yield batch
+
+
+def _run(mode: str, rows: int, batch_size: int, directory: str, results):
+    from openpyxl import Workbook
+    from app.services.xlsx_writer import XlsxWriter
+
+    path = os.path.join(directory, f"{mode}-{rows}.xlsx")
+    baseline = _peak_rss_mb()
+    batch_seconds = []
+    started = time.perf_counter()
+    if mode == "streaming":
+        writer = XlsxWriter(path, "Invoices", COLUMNS)
+        for batch in _batches(rows, batch_size):
+            start = time.perf_counter()
+            writer.append_rows(batch)
+            batch_seconds.append(time.perf_counter() - start)
+        size = writer.close()
+    else:
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append([name for name, _ in COLUMNS])
+        for batch in _batches(rows, batch_size):
+            start = time.perf_counter()
+            for row in batch:
+                sheet.append(row)
+            batch_seconds.append(time.perf_counter() - start)
+        workbook.save(path)
+        size = os.path.getsize(path)
+    elapsed = time.perf_counter() - started
+
+    readable = None
+    if mode == "streaming" and rows <= 100000:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True)
+        # Write-only sheets carry no dimension record, so count the rows
+        readable = sum(sum(1 for _ in sheet.iter_rows(values_only=True)) - 1 for sheet in workbook.worksheets)
+        workbook.close()
+    os.unlink(path)
+    results.put({
+        "elapsed": elapsed, "peak_mb": _peak_rss_mb(), "baseline_mb": baseline,
+        "size": size, "batch_seconds": batch_seconds, "readable_rows": readable,
+    })
+
+
+def measure(mode: str, rows: int, batch_size: int, directory: str):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=_run, args=(mode, rows, batch_size, directory, results))
+    process.start()
+    while True:
+        try:
+            result = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise SystemExit(f"{mode} run of {rows} rows failed")
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--in-memory-max-rows", type=int, default=100000,
+                        help="Largest row count also run through an in-memory workbook")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Rows per cursor batch (EXPORT_BATCH_ROWS)")
+    args = parser.parse_args()
+
+    checks = {}
+    streaming = {}
+    in_memory = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in sorted(args.rows):
+            result = streaming[rows] = measure("streaming", rows, args.batch_size, directory)
+            print(f"streaming {rows:>9,} rows: {rows / result['elapsed']:>9,.0f} rows/s, "
+                  f"peak RSS {result['peak_mb']:.0f} MB ({result['peak_mb'] - result['baseline_mb']:+.0f} MB), "
+                  f"file {result['size'] / 1e6:.1f} MB")
+            print_summary(f"  write latency per {args.batch_size}-row batch", summarize(result["batch_seconds"]))
+            if result["readable_rows"] is not None:
+                checks[f"{rows:,} rows read back"] = result["readable_rows"] == rows
+            if rows <= args.in_memory_max_rows:
+                result = in_memory[rows] = measure("in-memory", rows, args.batch_size, directory)
+                print(f"in-memory {rows:>9,} rows: {rows / result['elapsed']:>9,.0f} rows/s, "
+                      f"peak RSS {result['peak_mb']:.0f} MB ({result['peak_mb'] - result['baseline_mb']:+.0f} MB)")
+
+    smallest, largest = min(streaming), max(streaming)
+    growth = streaming[largest]["peak_mb"] - streaming[smallest]["peak_mb"]
+    print(f"streaming peak RSS grows {growth:+.1f} MB from {smallest:,} to {largest:,} rows")
+    checks["streaming memory flat across row counts (< 25 MB growth)"] = growth < 25
+    compared = max(in_memory, default=None)
+    if compared is not None and compared > smallest:
+        checks[f"streaming uses less memory than in-memory at {compared:,} rows"] = (
+            streaming[compared]["peak_mb"] < in_memory[compared]["peak_mb"]
+        )
+
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
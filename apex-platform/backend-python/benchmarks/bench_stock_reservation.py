@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Flash-sale stock reservation benchmark.
+
+Creates one hot SKU with limited stock (plus a few companion SKUs), then
+has thousands of concurrent carts reserve it, some together with companion
+SKUs in random order. Verifies that the SKU is never oversold, that
+reserved_quantity matches the active holds, and that the sweeper returns
+expired holds to stock; reports reservation latency and throughput.
+
+    python -m benchmarks.bench_stock_reservation --carts 5000 --stock 500 --concurrency 128
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from collections import Counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.core.config import settings
+from app.services.stock_reservation import reserve_cart, release_expired_reservations
+from benchmarks.common import summarize, print_summary
+
+COMPANIONS = 4
+
+SETUP_SQL = """
+INSERT INTO autoparts (sku, part_number, name, category, brand, condition, warranty_months,
+                       cost_price, selling_price, discount_percentage,
+                       stock_quantity, reserved_quantity, available_quantity, minimum_stock, maximum_stock,
+                       status, is_featured, is_bestseller, total_sold, total_revenue, view_count,
+                       rating_average, rating_count, lead_time_days, minimum_order_quantity, hazmat)
+VALUES (:sku, :sku, 'Flash sale part', 'BRAKES', 'Bench', 'NEW', 12,
+        100, 150, 0, :stock, 0, :stock, 1, 100000,
+        'ACTIVE', false, false, 0, 0, 0, 0, 0, 7, 1, false)
+"""
+
+STATE_SQL = """
+SELECT p.stock_quantity, p.reserved_quantity, p.available_quantity,
+       coalesce((SELECT sum(quantity) FROM stock_reservations r
+                 WHERE r.part_id = p.id AND r.status = 'ACTIVE'), 0) AS held
+FROM autoparts p WHERE p.sku = :sku
+"""
+
+
+async def setup(sessionmaker, stock: int):
+    prefix = f"FLASH-{uuid.uuid4().hex[:8].upper()}"
+    hot = f"{prefix}-HOT"
+    companions = [f"{prefix}-C{i}" for i in range(COMPANIONS)]
+    async with sessionmaker() as db:
+        await db.execute(text(SETUP_SQL), {"sku": hot, "stock": stock})
+        for sku in companions:
+            await db.execute(text(SETUP_SQL), {"sku": sku, "stock": stock * 10})
+        await db.commit()
+    return hot, companions
+
+
+async def run(args):
+    engine = create_async_engine(settings.DATABASE_URL, pool_size=args.concurrency, max_overflow=0)
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    hot, companions = await setup(sessionmaker, args.stock)
+
+    rng = random.Random(42)
+    carts = []
+    for i in range(args.carts):
+        lines = [(hot, 1)]
+        # Multi-line carts listed in random order exercise the SKU lock ordering
+        lines += [(sku, rng.randint(1, 3)) for sku in rng.sample(companions, rng.randint(0, COMPANIONS))]
+        rng.shuffle(lines)
+        carts.append((f"bench-cart-{uuid.uuid4().hex}", lines))
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+    outcomes = Counter()
+
+    async def one_cart(cart_id, lines):
+        async with semaphore, sessionmaker() as db:
+            start = time.perf_counter()
+            result = await reserve_cart(db, cart_id, lines, ttl_seconds=args.ttl)
+            latencies.append(time.perf_counter() - start)
+            outcomes[result.reason or "accepted"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_cart(cart_id, lines) for cart_id, lines in carts))
+    elapsed = time.perf_counter() - started
+
+    async with sessionmaker() as db:
+        after_reserve = (await db.execute(text(STATE_SQL), {"sku": hot})).one()
+
+    await asyncio.sleep(args.ttl + 1)
+    async with sessionmaker() as db:
+        swept = await release_expired_reservations(db)
+        after_sweep = (await db.execute(text(STATE_SQL), {"sku": hot})).one()
+    await engine.dispose()
+
+    accepted = outcomes["accepted"]
+    print(f"outcomes: {dict(outcomes)}")
+    print_summary("reserve latency", summarize(latencies))
+    print(f"throughput: {args.carts / elapsed:,.0f} carts/s")
+    print(f"after reserve: stock={after_reserve.stock_quantity} reserved={after_reserve.reserved_quantity} "
+          f"available={after_reserve.available_quantity} held={after_reserve.held}")
+    print(f"sweeper: {swept}; after sweep: reserved={after_sweep.reserved_quantity} "
+          f"available={after_sweep.available_quantity}")
+
+    checks = {
+        "no oversell": after_reserve.reserved_quantity <= args.stock and after_reserve.available_quantity >= 0,
+        "sold out when demand exceeds stock": accepted == min(args.carts, args.stock),
+        "reserved matches active holds": after_reserve.reserved_quantity == after_reserve.held == accepted,
+        "sweeper returns expired stock": after_sweep.reserved_quantity == 0 and after_sweep.available_quantity == args.stock,
+    }
+    for name, ok in checks.items():
+        print(f"  [{'ok' if ok else 'FAIL'}] {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--carts", type=int, default=5000)
+    parser.add_argument("--stock", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=128)
+    parser.add_argument("--ttl", type=int, default=5, help="Reservation TTL in seconds")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Shared helpers for the backend benchmark scripts."""
+
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for samples measured in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": max(samples) * 1000 if samples else 0.0,
+    }
+
+
+def print_summary(title: str, stats: Dict[str, float]):
+    """Print a one-line summary produced by summarize()."""
+    parts = ", ".join(
+        f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+        for key, value in stats.items()
+    )
+    print(f"{title}: {parts}")
+
+
+@contextmanager
+def stopwatch(label: str):
+    """Print the wall time spent inside the block."""
+    start = time.perf_counter()
+    yield
+    print(f"{label}: {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,94 @@
+import pytest
+
+from app.core import http_clients
+from app.core.http_clients import CircuitBreaker
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(http_clients.time, "monotonic", clock)
+    return clock
+
+
+def _breaker(**overrides) -> CircuitBreaker:
+    options = {"failure_ratio": 0.5, "min_calls": 10, "window_seconds": 10.0, "reset_seconds": 30.0}
+    options.update(overrides)
+    return CircuitBreaker(**options)
+
+
+def test_opens_once_min_calls_reach_the_failure_ratio(clock):
+    breaker = _breaker()
+    for _ in range(9):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_stays_closed_below_the_failure_ratio(clock):
+    breaker = _breaker()
+    for _ in range(6):
+        breaker.record_success()
+    for _ in range(5):
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    assert (breaker.attempts, breaker.failures) == (11, 5)
+
+
+def test_outcomes_age_out_a_bucket_at_a_time(clock):
+    breaker = _breaker()
+    for _ in range(5):
+        breaker.record_failure()
+
+    # Still inside the window: the old failures count
+    clock.now += 9.0
+    for _ in range(4):
+        breaker.record_success()
+    assert (breaker.attempts, breaker.failures) == (9, 5)
+
+    # The first bucket has slid out, the later one has not
+    clock.now += 1.5
+    breaker.record_success()
+    assert (breaker.attempts, breaker.failures) == (5, 0)
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = _breaker(min_calls=2)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30.0
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.times_opened == 2
+
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_cancelled_probe_is_released(clock):
+    breaker = _breaker(min_calls=1)
+    breaker.record_failure()
+    clock.now += 30.0
+    assert breaker.allow()
+    breaker.release_probe()
+    assert breaker.allow()
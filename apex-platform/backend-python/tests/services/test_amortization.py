@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from app.services.amortization import amortization_schedules
+
+
+def _cents(values) -> np.ndarray:
+    return np.round(np.asarray(values) * 100).astype(np.int64)
+
+
+@pytest.mark.parametrize("principal, annual_rate, periods", [
+    (36000.0, 24.0, 12),
+    (150000.0, 18.5, 36),
+    (999.99, 0.0, 7),
+    (500.0, 60.0, 1),
+])
+def test_schedule_settles_in_cents(principal, annual_rate, periods):
+    rows = amortization_schedules([principal], [annual_rate], [periods], [12]).rows(0)
+
+    for name in ("payment", "interest", "principal", "balance"):
+        np.testing.assert_array_equal(rows[name], np.round(rows[name], 2))
+    assert _cents(rows["payment"]).sum() == _cents(principal) + _cents(rows["interest"]).sum()
+    assert _cents(rows["principal"]).sum() == _cents(principal)
+    np.testing.assert_array_equal(_cents(rows["payment"]), _cents(rows["interest"]) + _cents(rows["principal"]))
+    assert rows["balance"][-1] == 0.0
+
+
+def test_level_payment_until_the_last_period():
+    rows = amortization_schedules([10000.0], [12.0], [12], [12]).rows(0)
+
+    assert rows["payment"][0] == 888.49
+    assert np.all(rows["payment"][:-1] == rows["payment"][0])
+    assert abs(rows["payment"][-1] - rows["payment"][0]) <= 0.05
+    assert np.all(np.diff(rows["balance"]) < 0)
+
+
+def test_zero_rate_splits_principal_evenly():
+    rows = amortization_schedules([1200.0], [0.0], [12], [12]).rows(0)
+
+    assert np.all(rows["interest"] == 0.0)
+    assert np.all(rows["payment"] == 100.0)
+
+
+def test_batch_keeps_each_loan_in_its_own_slice():
+    batch = amortization_schedules([1000.0, 2000.0, 3000.0], [10.0, 20.0, 30.0], [6, 12, 6], [12, 12, 12])
+
+    assert len(batch) == 3
+    assert batch.lengths.tolist() == [6, 12, 6]
+    for index, principal in enumerate((1000.0, 2000.0, 3000.0)):
+        rows = batch.rows(index)
+        assert _cents(rows["principal"]).sum() == _cents(principal)
+        assert rows["balance"][-1] == 0.0
@@ -0,0 +1,63 @@
+from app.services.interchange import MIN_NUMBER_LENGTH, UnionFind, normalize_number, part_numbers
+
+
+def test_normalize_number_strips_separators_and_case():
+    assert normalize_number("04465-02220") == "0446502220"
+    assert normalize_number(" bp 1234.a ") == "BP1234A"
+
+
+def test_normalize_number_drops_short_and_empty_numbers():
+    assert normalize_number(None) is None
+    assert normalize_number("") is None
+    assert normalize_number("N/A") is None
+    assert normalize_number("X" * MIN_NUMBER_LENGTH) == "X" * MIN_NUMBER_LENGTH
+
+
+def test_part_numbers_are_unique_and_sorted():
+    assert part_numbers("04465-02220", "0446502220", None, "ab-12 34") == ["0446502220", "AB1234"]
+
+
+def test_union_find_merges_transitively():
+    sets = UnionFind()
+    sets.union("a", "b")
+    sets.union("c", "d")
+    sets.add("e")
+    assert sets.find("a") == sets.find("b")
+    assert sets.find("a") != sets.find("c")
+
+    sets.union("b", "d")
+    groups = sorted(sorted(keys) for keys in sets.components().values())
+    assert groups == [["a", "b", "c", "d"], ["e"]]
+    assert sets.size[sets.find("a")] == 4
+
+
+def test_union_find_is_idempotent():
+    sets = UnionFind()
+    sets.union("a", "b")
+    sets.union("b", "a")
+    sets.union("a", "a")
+    assert len(sets.components()) == 1
+    assert sets.size[sets.find("a")] == 2
+
+
+def test_parts_sharing_any_number_form_one_group():
+    # Same grouping as rebuild_interchange: each part's numbers are unioned
+    # under its first number, so parts that share any number end up together
+    catalog = {
+        1: part_numbers("04465-02220", "OEM-1111"),
+        2: part_numbers("0446502220"),
+        3: part_numbers("OEM 1111", "UNIV-9999"),
+        4: part_numbers("OTHER-0001"),
+        5: part_numbers("N/A"),
+    }
+    sets = UnionFind()
+    for numbers in catalog.values():
+        if numbers:
+            sets.add(numbers[0])
+            for number in numbers[1:]:
+                sets.union(numbers[0], number)
+
+    root = {part_id: sets.find(numbers[0]) for part_id, numbers in catalog.items() if numbers}
+    assert root[1] == root[2] == root[3]
+    assert root[4] != root[1]
+    assert 5 not in root
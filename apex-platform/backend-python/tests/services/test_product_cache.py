@@ -0,0 +1,21 @@
+import pytest
+
+from app.services.product_cache import etag_matches
+
+ETAG = '"0123abcd-4567ef89"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ("", False),
+    (ETAG, True),
+    (f"W/{ETAG}", True),
+    ('"other"', False),
+    (f'"other", {ETAG}', True),
+    (f' "other" ,W/{ETAG} ', True),
+    ("*", True),
+    (" * ", True),
+    ("0123abcd-4567ef89", False),
+])
+def test_etag_matches(header, expected):
+    assert etag_matches(header, ETAG) is expected
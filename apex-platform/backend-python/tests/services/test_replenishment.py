@@ -0,0 +1,75 @@
+import numpy as np
+
+from app.services.replenishment import plan_replenishment
+
+
+def _inventory(**columns):
+    base = {
+        "available_quantity": [10],
+        "minimum_stock": [5],
+        "maximum_stock": [100],
+        "lead_time_days": [7],
+        "minimum_order_quantity": [1],
+        "units": [0.0],
+        "units_sq": [0.0],
+    }
+    base.update(columns)
+    return {name: np.asarray(values) for name, values in base.items()}
+
+
+def _plan(inventory, window_days=30, service_level_z=1.65, review_period_days=7):
+    return plan_replenishment(inventory, window_days, service_level_z, review_period_days)
+
+
+def test_part_without_sales_reorders_at_minimum_stock():
+    plan = _plan(_inventory(
+        available_quantity=[5, 6],
+        minimum_stock=[5, 5],
+        maximum_stock=[100, 100],
+        lead_time_days=[7, 7],
+        minimum_order_quantity=[1, 1],
+        units=[0.0, 0.0],
+        units_sq=[0.0, 0.0],
+    ))
+
+    assert plan["reorder_point"].tolist() == [5, 5]
+    assert plan["order"].tolist() == [True, False]
+    assert plan["quantity"].tolist() == [1, 0]
+    assert not plan["urgent"].any()
+
+
+def test_steady_demand_orders_up_to_target():
+    # 2 units a day every day: no variance, so no safety stock
+    plan = _plan(_inventory(available_quantity=[10], units=[60.0], units_sq=[120.0]))
+
+    assert plan["daily_demand"].tolist() == [2.0]
+    assert plan["reorder_point"].tolist() == [14]
+    assert plan["order_up_to"].tolist() == [28]
+    assert plan["order"].tolist() == [True]
+    assert plan["quantity"].tolist() == [18]
+    # 10 on hand covers the 14 units of lead-time demand only partly
+    assert plan["urgent"].tolist() == [True]
+
+
+def test_variable_demand_adds_safety_stock():
+    steady = _plan(_inventory(units=[60.0], units_sq=[120.0]))
+    bursty = _plan(_inventory(units=[60.0], units_sq=[600.0]))
+
+    assert bursty["reorder_point"][0] > steady["reorder_point"][0]
+
+
+def test_quantity_is_raised_to_moq_and_capped_by_maximum():
+    plan = _plan(_inventory(
+        available_quantity=[10, 10, 95],
+        maximum_stock=[100, 30, 100],
+        minimum_order_quantity=[50, 50, 10],
+        units=[60.0, 60.0, 60.0],
+        units_sq=[120.0, 120.0, 120.0],
+    ))
+
+    # MOQ above the gap to order_up_to
+    assert plan["quantity"][0] == 50
+    # MOQ does not fit under maximum_stock: not ordered at all
+    assert not plan["order"][1] and plan["quantity"][1] == 0
+    # Above the reorder point: nothing to order
+    assert not plan["order"][2]
@@ -0,0 +1,21 @@
+from datetime import date
+
+import pytest
+
+from app.models.report_export import ReportType
+from app.services.report_exports import export_filename, month_period
+
+
+def test_month_period_is_half_open():
+    assert month_period("2024-02") == (date(2024, 2, 1), date(2024, 3, 1))
+    assert month_period("2024-12") == (date(2024, 12, 1), date(2025, 1, 1))
+
+
+@pytest.mark.parametrize("month", ["2024-13", "2024/01", "", "January"])
+def test_month_period_rejects_malformed_months(month):
+    with pytest.raises(ValueError):
+        month_period(month)
+
+
+def test_export_filename():
+    assert export_filename(ReportType.PARTS_SALES, date(2024, 3, 1)) == "parts_sales-2024-03.xlsx"
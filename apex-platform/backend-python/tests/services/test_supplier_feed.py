@@ -0,0 +1,78 @@
+import io
+import json
+
+import pytest
+
+from app.services.supplier_feed import STAGING_COLUMNS, iter_feed_rows, normalize_row
+
+
+def _raw(**overrides):
+    raw = {
+        "sku": " BRK-001 ",
+        "part_number": "04465-02220",
+        "name": "Balatas delanteras",
+        "category": "Brakes",
+        "brand": "Akebono",
+        "cost_price": "1,250.50",
+        "selling_price": "1800",
+        "stock_quantity": "12",
+        "compatible_makes": "Toyota| Nissan |",
+        "compatible_years": "2018|2019",
+    }
+    raw.update(overrides)
+    return raw
+
+
+def _as_dict(row):
+    return dict(zip(STAGING_COLUMNS, row))
+
+
+def test_normalize_row_converts_to_staging_columns():
+    row = _as_dict(normalize_row(_raw()))
+
+    assert row["sku"] == "BRK-001"
+    assert row["category"] == "BRAKES"
+    assert row["cost_price"] == 1250.5
+    assert row["selling_price"] == 1800.0
+    assert row["stock_quantity"] == 12
+    assert json.loads(row["compatible_makes"]) == ["Toyota", "Nissan"]
+    assert json.loads(row["compatible_years"]) == [2018, 2019]
+    assert row["compatible_models"] is None
+    assert row["lead_time_days"] == 7
+    assert len(row["feed_hash"]) == 32
+
+
+def test_normalize_row_defaults_blank_stock_to_zero():
+    assert _as_dict(normalize_row(_raw(stock_quantity="")))["stock_quantity"] == 0
+
+
+def test_hash_changes_only_with_the_content():
+    first = normalize_row(_raw())
+    assert normalize_row(_raw(sku="BRK-001", brand=" Akebono ")) == first
+    assert normalize_row(_raw(selling_price="1801"))[-1] != first[-1]
+
+
+def test_normalize_row_reports_missing_columns():
+    with pytest.raises(ValueError, match="Missing name, brand"):
+        normalize_row(_raw(name=" ", brand=None))
+
+
+@pytest.mark.parametrize("overrides, message", [
+    ({"category": "spaceships"}, "Unknown category"),
+    ({"cost_price": "cheap"}, None),
+    ({"compatible_years": "2018|late"}, None),
+])
+def test_normalize_row_rejects_invalid_values(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        normalize_row(_raw(**overrides))
+
+
+def test_iter_feed_rows_reads_csv_with_normalized_headers():
+    feed = io.BytesIO("\ufeffSKU,Part Number,Name\nA-1,123-45,Filtro\n,,\nA-2,678-90,Bujía\n".encode())
+
+    rows = list(iter_feed_rows(feed, "feed.csv"))
+
+    assert rows == [
+        (2, {"sku": "A-1", "part_number": "123-45", "name": "Filtro"}),
+        (4, {"sku": "A-2", "part_number": "678-90", "name": "Bujía"}),
+    ]
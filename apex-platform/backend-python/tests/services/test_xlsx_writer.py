@@ -0,0 +1,59 @@
+from datetime import date
+
+from openpyxl import load_workbook
+
+from app.services.xlsx_writer import MAX_TITLE_LENGTH, XlsxWriter
+
+COLUMNS = (("Day", 12), ("SKU", 18), ("Units", 8))
+
+
+def _rows(count: int):
+    return [(date(2024, 1, 1 + index % 28), f"SKU-{index}", index) for index in range(count)]
+
+
+def test_rows_roll_over_to_numbered_sheets(tmp_path):
+    path = tmp_path / "out.xlsx"
+    writer = XlsxWriter(path, "Parts sales", COLUMNS, max_sheet_rows=4)
+    assert writer.append_rows(_rows(5)) == 5
+    assert writer.append_rows(_rows(3)) == 3
+    size = writer.close()
+
+    assert writer.rows == 8
+    assert size == path.stat().st_size
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ["Parts sales", "Parts sales 2", "Parts sales 3"]
+    sheets = [list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets]
+    # Every sheet repeats the header and holds at most max_sheet_rows - 1 data rows
+    assert [len(rows) for rows in sheets] == [4, 4, 3]
+    assert all(rows[0] == ("Day", "SKU", "Units") for rows in sheets)
+    units = [row[2] for rows in sheets for row in rows[1:]]
+    assert units == [0, 1, 2, 3, 4, 0, 1, 2]
+
+
+def test_empty_report_still_has_a_header(tmp_path):
+    path = tmp_path / "empty.xlsx"
+    writer = XlsxWriter(path, "Invoices", COLUMNS)
+    writer.close()
+
+    workbook = load_workbook(path, read_only=True)
+    assert workbook.sheetnames == ["Invoices"]
+    assert list(workbook.active.iter_rows(values_only=True)) == [("Day", "SKU", "Units")]
+
+
+def test_long_titles_keep_room_for_the_sheet_number(tmp_path):
+    writer = XlsxWriter(tmp_path / "long.xlsx", "X" * 40, COLUMNS, max_sheet_rows=2)
+    writer.append_rows(_rows(2))
+    writer.close()
+
+    names = load_workbook(tmp_path / "long.xlsx", read_only=True).sheetnames
+    assert names == ["X" * MAX_TITLE_LENGTH, "X" * (MAX_TITLE_LENGTH - 2) + " 2"]
+
+
+def test_abort_leaves_no_file(tmp_path):
+    path = tmp_path / "aborted.xlsx"
+    writer = XlsxWriter(path, "Invoices", COLUMNS)
+    writer.append_rows(_rows(3))
+    writer.abort()
+
+    assert not path.exists()
+    assert list(tmp_path.iterdir()) == []